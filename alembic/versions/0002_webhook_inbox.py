@@ -0,0 +1,31 @@
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers
+revision = '0002_webhook_inbox'
+down_revision = '0001_init'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "webhook_inbox",
+        sa.Column("id", sa.BigInteger(), primary_key=True, autoincrement=True),
+        sa.Column("payload", postgresql.JSONB(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("locked_until", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("failed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index(
+        "ix_webhook_inbox_pending", "webhook_inbox", ["id"],
+        postgresql_where=sa.text("failed_at IS NULL"),
+    )
+
+
+def downgrade():
+    op.drop_index("ix_webhook_inbox_pending", table_name="webhook_inbox")
+    op.drop_table("webhook_inbox")
@@ -0,0 +1,24 @@
+from alembic import op
+
+# revision identifiers
+revision = '0003_payments_keyset_index'
+down_revision = '0002_webhook_inbox'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # индекс под keyset-пагинацию истории платежей: WHERE user_id = ? ORDER BY created_at, id
+    # CONCURRENTLY, чтобы не блокировать запись платежей на время построения
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_payments_user_created_id", "payments", ["user_id", "created_at", "id"],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_payments_user_created_id", table_name="payments", postgresql_concurrently=True
+        )
@@ -0,0 +1,24 @@
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers
+revision = '0004_users_email_prefix_index'
+down_revision = '0003_payments_keyset_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # индекс под поиск пользователей по префиксу email: lower(email) LIKE 'prefix%'
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_users_email_lower_pattern", "users", [sa.text("lower(email) text_pattern_ops")],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_users_email_lower_pattern", table_name="users", postgresql_concurrently=True
+        )
@@ -0,0 +1,29 @@
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '0005_account_balance_deltas'
+down_revision = '0004_users_email_prefix_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "account_balance_deltas",
+        sa.Column("id", sa.BigInteger(), primary_key=True, autoincrement=True),
+        sa.Column(
+            "account_id", sa.Integer(),
+            sa.ForeignKey("accounts.id", ondelete="CASCADE"), nullable=False,
+        ),
+        sa.Column("amount", sa.Numeric(12, 2), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index(
+        "ix_account_balance_deltas_account_id", "account_balance_deltas", ["account_id"],
+    )
+
+
+def downgrade():
+    op.drop_index("ix_account_balance_deltas_account_id", table_name="account_balance_deltas")
+    op.drop_table("account_balance_deltas")
@@ -0,0 +1,25 @@
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '0006_account_balance_shards'
+down_revision = '0005_account_balance_deltas'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "account_balance_shards",
+        sa.Column(
+            "account_id", sa.Integer(),
+            sa.ForeignKey("accounts.id", ondelete="CASCADE"), primary_key=True,
+        ),
+        sa.Column("shard", sa.Integer(), primary_key=True),
+        sa.Column("balance", sa.Numeric(12, 2), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+
+
+def downgrade():
+    op.drop_table("account_balance_shards")
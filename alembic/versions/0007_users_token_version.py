@@ -0,0 +1,20 @@
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers
+revision = '0007_users_token_version'
+down_revision = '0006_account_balance_shards'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # версия токенов пользователя: растёт при изменении, токены со старой версией не принимаются
+    op.add_column(
+        "users",
+        sa.Column("token_version", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade():
+    op.drop_column("users", "token_version")
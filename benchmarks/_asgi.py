@@ -0,0 +1,70 @@
+import asyncio
+import json
+from typing import Any
+
+
+async def asgi_request(
+        app,
+        method: str,
+        url: str,
+        body: bytes = b"",
+        headers: dict[str, str] | None = None,
+) -> tuple[int, dict[str, str], bytes]:
+    """
+    Выполнить один HTTP-запрос к ASGI-приложению в текущем event loop, без сети.
+
+    :return: статус, заголовки ответа и тело
+    """
+    path, _, query = url.partition("?")
+    request_headers = {"host": "benchmark", **(headers or {})}
+    if body:
+        request_headers.setdefault("content-type", "application/json")
+        request_headers["content-length"] = str(len(body))
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(name.lower().encode(), value.encode()) for name, value in request_headers.items()],
+        "client": ("127.0.0.1", 50000),
+        "server": ("benchmark", 80),
+    }
+    request_sent = False
+    response_done = asyncio.Event()
+    status = 0
+    response_headers: dict[str, str] = {}
+    chunks: list[bytes] = []
+
+    async def receive() -> dict:
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        # отключение клиента — только после полного ответа, иначе стриминг оборвётся
+        await response_done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            response_headers.update(
+                (name.decode(), value.decode()) for name, value in message.get("headers", [])
+            )
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                response_done.set()
+
+    await app(scope, receive, send)
+    response_done.set()
+    return status, response_headers, b"".join(chunks)
+
+
+def json_body(payload: Any) -> bytes:
+    return json.dumps(payload, default=str).encode()
@@ -0,0 +1,18 @@
+import math
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Перцентиль по методу ближайшего ранга; values не обязаны быть отсортированы"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def format_latency(values: list[float]) -> str:
+    """p50/p95/p99/max в миллисекундах"""
+    return "  ".join(
+        f"{name} {percentile(values, pct) * 1000:8.2f} ms"
+        for name, pct in (("p50", 50), ("p95", 95), ("p99", 99), ("max", 100))
+    )
@@ -0,0 +1,82 @@
+"""
+Бенчмарк конкурентных webhook-платежей на один счёт.
+
+Все платежи идут на один account_id: в режиме in_place они ждут друг друга
+на блокировке строки счёта, в режиме ledger пишут дельты в журнал без неё,
+в режиме sharded делят блокировки между BALANCE_SHARDS подстроками.
+После прогона журнал сворачивается и проверяется итоговый баланс.
+
+Требуется PostgreSQL из .dev.env с применёнными миграциями:
+    python -m benchmarks.balance_contention --count 2000 --concurrency 32
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from decimal import Decimal
+
+from benchmarks._stats import format_latency
+from src.config import config
+from src.enums.balance_mode import BalanceMode
+from src.helpers.helper import get_session
+from src.schemas.payment_schemas import PaymentCreateSchema
+from src.services.account_service import AccountService
+from src.services.payment_service import PaymentService
+from src.services.user_service import UserService
+
+
+async def read_balance(user_id: int, account_id: int, mode: BalanceMode) -> Decimal:
+    async with get_session() as session:
+        accounts = await AccountService(session, balance_mode=mode).get_accounts_by_user_id(user_id)
+    return next((Decimal(str(a.balance)) for a in accounts if a.id == account_id), Decimal(0))
+
+
+async def compact_all() -> None:
+    while True:
+        async with get_session() as session:
+            if not await AccountService(session).compact_balances(config.BALANCE_COMPACTION_BATCH_SIZE):
+                return
+
+
+async def run(mode: BalanceMode, user_id: int, account_id: int, count: int, concurrency: int) -> None:
+    await compact_all()
+    before = await read_balance(user_id, account_id, mode)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+
+    async def worker() -> None:
+        payment = PaymentCreateSchema(
+            transaction_id=uuid.uuid4(), amount=1.0, user_id=user_id, account_id=account_id,
+        )
+        async with semaphore:
+            started = time.perf_counter()
+            async with get_session() as session:
+                await PaymentService(session, balance_mode=mode).create_with_balance(payment)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(count)))
+    elapsed = time.perf_counter() - started
+
+    await compact_all()
+    after = await read_balance(user_id, account_id, mode)
+    check = "ok" if after - before == count else f"MISMATCH {after - before} != {count}"
+    print(f"{mode:<10} {count:>7} webhooks  {elapsed:8.3f} s  {count / elapsed:10.1f} webhooks/s  balance {check}")
+    print(f"{'':<10} {format_latency(latencies)}")
+
+
+async def main(count: int, concurrency: int, account_id: int, modes: list[BalanceMode]) -> None:
+    async with get_session() as session:
+        user = await UserService(session).get_by_email(config.DEFAULT_USER_EMAIL)
+    for mode in modes:
+        await run(mode, user.id, account_id, count, concurrency)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--account-id", type=int, default=900_001, help="горячий счёт; создаётся первым платежом")
+    parser.add_argument("--modes", nargs="+", type=BalanceMode, default=list(BalanceMode))
+    args = parser.parse_args()
+    asyncio.run(main(args.count, args.concurrency, args.account_id, args.modes))
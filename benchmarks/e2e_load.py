@@ -0,0 +1,357 @@
+"""
+Сквозной нагрузочный прогон API платежей.
+
+Приложение собирается через src.main.create_app и запускается со своим lifespan
+(прогрев пула, загрузка recent_transactions, воркеры по настройкам), запросы идут
+напрямую через ASGI — без сети, но через все зависимости, сессии и пул соединений.
+Сценарии:
+  * webhook_burst          — всплеск POST /payments/webhook, часть запросов — повторы;
+  * login_storm            — параллельные POST /auth/login (bcrypt);
+  * webhook_during_logins  — одиночные webhook во время login_storm: их задержка
+                             показывает, как логины мешают приёму платежей;
+  * payment_reads          — GET /users/me/payments пользователя с большим числом платежей.
+Для каждого сценария: пропускная способность, p50/p95/p99, число SQL-запросов,
+выдач соединения из пула и ожидание пула на запрос. Результат пишется в JSON;
+с --baseline прогон сравнивается с сохранённым и завершается с кодом 1, если
+p95 или пропускная способность сценария ухудшились больше чем на --max-regression %.
+
+Требуется PostgreSQL из .dev.env с применёнными миграциями и тестовыми пользователями:
+    python -m benchmarks.e2e_load --seed-payments 10000 --output benchmarks/results/baseline.json
+    python -m benchmarks.e2e_load --baseline benchmarks/results/baseline.json --max-regression 10
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, UTC
+from pathlib import Path
+
+from fastapi import FastAPI
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from benchmarks._asgi import asgi_request, json_body
+from benchmarks._stats import percentile, format_latency
+from benchmarks.read_projection import seed
+from src.api.payments.service.signature_service import signature_service
+from src.config import config
+from src.helpers.helper import get_session, session_manager
+from src.main import create_app
+from src.schemas.payment_schemas import PaymentCreateSchema
+from src.services.account_service import AccountService
+from src.services.user_service import UserService
+
+API = "/api/v1"
+
+# Метрики, по которым работает --baseline: (метрика, True — чем больше, тем лучше)
+GATED_METRICS = (("throughput_rps", True), ("p95_ms", False))
+
+
+@dataclass(slots=True)
+class RequestStats:
+    """Что один запрос сделал с БД"""
+    queries: int = 0
+    checkouts: int = 0
+    pool_wait: float = 0.0
+
+
+# Статистика текущего запроса: каждый запрос выполняется в своей задаче asyncio,
+# а SQLAlchemy переносит контекст в greenlet, так что события пула и курсора её видят
+_request_stats: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+def instrument(engine: AsyncEngine) -> None:
+    """Подписаться на события движка и пула, чтобы считать их по запросам"""
+
+    def on_cursor_execute(*_) -> None:
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.queries += 1
+
+    def on_checkout(*_) -> None:
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.checkouts += 1
+
+    event.listen(engine.sync_engine, "before_cursor_execute", on_cursor_execute)
+    event.listen(engine.sync_engine, "checkout", on_checkout)
+
+    # Ожидание соединения замеряется там же, где его считает TimedAsyncQueuePool
+    pool = engine.pool
+    do_get = pool._do_get
+
+    def timed_do_get():
+        started = time.perf_counter()
+        try:
+            return do_get()
+        finally:
+            stats = _request_stats.get()
+            if stats is not None:
+                stats.pool_wait += time.perf_counter() - started
+
+    pool._do_get = timed_do_get
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    latencies: list[float] = field(default_factory=list)
+    stats: list[RequestStats] = field(default_factory=list)
+    errors: int = 0
+    elapsed: float = 0.0
+
+    def to_dict(self) -> dict:
+        count = max(len(self.latencies), 1)
+        return {
+            "requests": len(self.latencies),
+            "errors": self.errors,
+            "duration_s": round(self.elapsed, 3),
+            "throughput_rps": round(len(self.latencies) / self.elapsed, 1) if self.elapsed else 0.0,
+            "p50_ms": round(percentile(self.latencies, 50) * 1000, 3),
+            "p95_ms": round(percentile(self.latencies, 95) * 1000, 3),
+            "p99_ms": round(percentile(self.latencies, 99) * 1000, 3),
+            "max_ms": round(percentile(self.latencies, 100) * 1000, 3),
+            "queries_per_request": round(sum(s.queries for s in self.stats) / count, 2),
+            "pool_checkouts_per_request": round(sum(s.checkouts for s in self.stats) / count, 2),
+            "pool_wait_ms_per_request": round(sum(s.pool_wait for s in self.stats) / count * 1000, 3),
+            "pool_wait_ms_max": round(max((s.pool_wait for s in self.stats), default=0.0) * 1000, 3),
+        }
+
+    def print(self) -> None:
+        summary = self.to_dict()
+        print(
+            f"{self.name:<22} {summary['requests']:>6} req  {summary['errors']:>4} err  "
+            f"{summary['throughput_rps']:9.1f} req/s  {format_latency(self.latencies)}  "
+            f"{summary['queries_per_request']:5.1f} q/req  "
+            f"{summary['pool_checkouts_per_request']:4.1f} conn/req  "
+            f"pool wait {summary['pool_wait_ms_per_request']:7.3f} ms/req"
+        )
+
+
+async def timed_request(
+        app: FastAPI,
+        result: ScenarioResult,
+        method: str,
+        url: str,
+        body: bytes = b"",
+        headers: dict[str, str] | None = None,
+        expected: tuple[int, ...] = (200,),
+) -> bytes:
+    stats = RequestStats()
+    _request_stats.set(stats)
+    started = time.perf_counter()
+    status, _, response = await asgi_request(app, method, url, body, headers)
+    result.latencies.append(time.perf_counter() - started)
+    result.stats.append(stats)
+    if status not in expected:
+        result.errors += 1
+    return response
+
+
+async def run_concurrent(result: ScenarioResult, requests: list, concurrency: int) -> ScenarioResult:
+    """Выполнить корутины requests, не больше concurrency одновременно"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def worker(request) -> None:
+        async with semaphore:
+            await request
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(request) for request in requests))
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+def webhook_body(user_id: int, account_id: int, transaction_id: uuid.UUID) -> bytes:
+    payment = PaymentCreateSchema(
+        transaction_id=transaction_id, amount=1.0, user_id=user_id, account_id=account_id,
+    )
+    return json_body({
+        "transactionId": str(payment.transaction_id),
+        "amount": payment.amount,
+        "userId": payment.user_id,
+        "accountId": payment.account_id,
+        "signature": signature_service.create_signature(payment),
+    })
+
+
+async def webhook_burst(
+        app: FastAPI,
+        user_id: int,
+        account_id: int,
+        count: int,
+        duplicate_ratio: float,
+        concurrency: int,
+        rng: random.Random,
+) -> ScenarioResult:
+    """Всплеск webhook, где duplicate_ratio запросов — повторы уже отправленных платежей"""
+    duplicates = int(count * duplicate_ratio)
+    bodies = [webhook_body(user_id, account_id, uuid.uuid4()) for _ in range(count - duplicates)]
+    bodies += [rng.choice(bodies) for _ in range(duplicates)]
+    rng.shuffle(bodies)
+
+    result = ScenarioResult("webhook_burst")
+    return await run_concurrent(result, [
+        timed_request(app, result, "POST", f"{API}/payments/webhook", body, expected=(200, 202))
+        for body in bodies
+    ], concurrency)
+
+
+async def login_storm(
+        app: FastAPI,
+        user_id: int,
+        account_id: int,
+        logins: int,
+        concurrency: int,
+        probe_interval: float,
+) -> tuple[ScenarioResult, ScenarioResult]:
+    """Параллельные логины и одиночные webhook раз в probe_interval секунд, пока они идут"""
+    body = json_body({"email": config.DEFAULT_USER_EMAIL, "password": config.DEFAULT_USER_PASSWORD})
+    logins_result = ScenarioResult("login_storm")
+    webhooks_result = ScenarioResult("webhook_during_logins")
+    stop = asyncio.Event()
+
+    async def probe() -> None:
+        started = time.perf_counter()
+        while not stop.is_set():
+            await timed_request(
+                app, webhooks_result, "POST", f"{API}/payments/webhook",
+                webhook_body(user_id, account_id, uuid.uuid4()), expected=(200, 202),
+            )
+            await asyncio.sleep(probe_interval)
+        webhooks_result.elapsed = time.perf_counter() - started
+
+    probe_task = asyncio.create_task(probe())
+    await run_concurrent(logins_result, [
+        timed_request(app, logins_result, "POST", f"{API}/auth/login", body)
+        for _ in range(logins)
+    ], concurrency)
+    stop.set()
+    await probe_task
+    return logins_result, webhooks_result
+
+
+async def payment_reads(app: FastAPI, token: str, requests: int, limit: int, concurrency: int) -> ScenarioResult:
+    headers = {"authorization": f"Bearer {token}"}
+    result = ScenarioResult("payment_reads")
+    return await run_concurrent(result, [
+        timed_request(app, result, "GET", f"{API}/users/me/payments?limit={limit}", headers=headers)
+        for _ in range(requests)
+    ], concurrency)
+
+
+async def login_token(app: FastAPI) -> str:
+    body = json_body({"email": config.DEFAULT_USER_EMAIL, "password": config.DEFAULT_USER_PASSWORD})
+    status, _, response = await asgi_request(app, "POST", f"{API}/auth/login", body)
+    if status != 200:
+        raise RuntimeError(f"Не удалось войти тестовым пользователем: {status} {response!r}")
+    return json.loads(response)["accessToken"]
+
+
+async def run_scenarios(args: argparse.Namespace) -> list[ScenarioResult]:
+    app = create_app()
+    instrument(session_manager.engine)
+    rng = random.Random(args.random_seed)
+
+    async with app.router.lifespan_context(app):
+        async with get_session() as session:
+            user = await UserService(session).get_by_email(config.DEFAULT_USER_EMAIL)
+            accounts = await AccountService(session).get_accounts_by_user_id(user.id)
+        account_id = accounts[0].id
+        if args.seed_payments:
+            await seed(user.id, account_id, args.seed_payments)
+        token = await login_token(app)
+
+        results = [
+            await webhook_burst(
+                app, user.id, account_id, args.webhooks, args.duplicate_ratio, args.concurrency, rng,
+            ),
+            *await login_storm(
+                app, user.id, account_id, args.logins, args.concurrency, args.probe_interval,
+            ),
+            await payment_reads(app, token, args.reads, args.page_size, args.concurrency),
+        ]
+    return results
+
+
+def build_report(results: list[ScenarioResult], args: argparse.Namespace) -> dict:
+    return {
+        "created_at": datetime.now(UTC).isoformat(),
+        "settings": {
+            "balance_mode": str(config.BALANCE_MODE),
+            "webhook_ack_mode": config.WEBHOOK_ACK_MODE,
+            "db_pool_size": config.DB_POOL_SIZE,
+            "db_max_overflow": config.DB_MAX_OVERFLOW,
+            "concurrency": args.concurrency,
+            "webhooks": args.webhooks,
+            "duplicate_ratio": args.duplicate_ratio,
+            "logins": args.logins,
+            "reads": args.reads,
+            "page_size": args.page_size,
+        },
+        "scenarios": {result.name: result.to_dict() for result in results},
+    }
+
+
+def find_regressions(report: dict, baseline: dict, max_regression: float) -> list[str]:
+    """Сценарии, у которых p95 или пропускная способность хуже baseline больше чем на max_regression %"""
+    regressions = []
+    for name, current in report["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        for metric, higher_is_better in GATED_METRICS:
+            before, after = previous[metric], current[metric]
+            if not before:
+                continue
+            change = (after - before) / before * 100
+            worse = -change if higher_is_better else change
+            if worse > max_regression:
+                regressions.append(f"{name}.{metric}: {before} -> {after} ({change:+.1f}%)")
+    return regressions
+
+
+def main(args: argparse.Namespace) -> int:
+    # baseline читается до прогона: --output может указывать на тот же файл
+    baseline = json.loads(args.baseline.read_text()) if args.baseline is not None else None
+    results = asyncio.run(run_scenarios(args))
+    for result in results:
+        result.print()
+
+    report = build_report(results, args)
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+    print(f"Результаты записаны в {args.output}")
+
+    if baseline is None:
+        return 0
+    regressions = find_regressions(report, baseline, args.max_regression)
+    if regressions:
+        print(f"Регрессия больше {args.max_regression}% относительно {args.baseline}:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print(f"Регрессий больше {args.max_regression}% относительно {args.baseline} нет")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--webhooks", type=int, default=2000)
+    parser.add_argument("--duplicate-ratio", type=float, default=0.2, help="доля повторов во всплеске webhook")
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--probe-interval", type=float, default=0.01, help="пауза между webhook во время логинов")
+    parser.add_argument("--reads", type=int, default=200)
+    parser.add_argument("--page-size", type=int, default=config.PAYMENTS_PAGE_MAX_SIZE)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed-payments", type=int, default=0, help="сначала добавить столько платежей пользователю")
+    parser.add_argument("--random-seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=Path("benchmarks/results/e2e_load.json"))
+    parser.add_argument("--baseline", type=Path, default=None, help="JSON прошлого прогона для сравнения")
+    parser.add_argument("--max-regression", type=float, default=10.0, help="допустимое ухудшение, %%")
+    sys.exit(main(parser.parse_args()))
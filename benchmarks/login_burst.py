@@ -0,0 +1,64 @@
+"""
+Задержка event loop во время всплеска логинов.
+
+Пока выполняются N параллельных проверок bcrypt, «webhook-пробы» раз в
+--probe-interval секунд замеряют, насколько позже запланированного event loop
+их выполняет — это нижняя граница задержки любого webhook-запроса в процессе.
+Сравниваются синхронная verify_password и verify_password_async (пул потоков).
+
+Запуск (БД не нужна):
+    python -m benchmarks.login_burst --logins 64
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks._stats import format_latency
+from src.utils.security import (
+    hash_password, verify_password, verify_password_async, shutdown_password_executor,
+)
+
+
+async def probe(stop: asyncio.Event, interval: float, delays: list[float]) -> None:
+    while not stop.is_set():
+        scheduled = time.perf_counter()
+        await asyncio.sleep(interval)
+        delays.append(time.perf_counter() - scheduled - interval)
+
+
+async def sync_login(password: str, hashed: str) -> None:
+    verify_password(password, hashed)
+
+
+async def async_login(password: str, hashed: str) -> None:
+    await verify_password_async(password, hashed)
+
+
+async def run(name: str, login, logins: int, interval: float, hashed: str) -> None:
+    stop = asyncio.Event()
+    delays: list[float] = []
+    probe_task = asyncio.create_task(probe(stop, interval, delays))
+    await asyncio.sleep(interval * 5)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(login("user123", hashed) for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await probe_task
+    print(f"{name:<6} {logins} логинов за {elapsed:6.2f} s | задержка проб: {format_latency(delays)}")
+
+
+async def main(logins: int, interval: float) -> None:
+    hashed = hash_password("user123")
+    await run("sync", sync_login, logins, interval, hashed)
+    await run("async", async_login, logins, interval, hashed)
+    shutdown_password_executor()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--probe-interval", type=float, default=0.005)
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.probe_interval))
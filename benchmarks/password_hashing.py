@@ -0,0 +1,49 @@
+"""
+Стоимость хэширования и проверки пароля для каждой схемы.
+
+По умолчанию замеряются схемы из PASSWORD_HASH_SCHEMES с текущими
+настройками стоимости; список можно переопределить через --schemes.
+Для argon2 нужен пакет argon2-cffi.
+
+Запуск (БД не нужна):
+    python -m benchmarks.password_hashing --iterations 20 --schemes bcrypt argon2
+"""
+import argparse
+import time
+
+from passlib.exc import MissingBackendError
+
+from src.config import config
+from src.utils.security import create_password_context
+
+
+def measure(func, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - started) / iterations
+
+
+def main(schemes: list[str], iterations: int) -> None:
+    for scheme in schemes:
+        context = create_password_context([scheme])
+        try:
+            hashed = context.hash("user123")
+        except MissingBackendError as e:
+            print(f"{scheme:<8} пропущена: {e}")
+            continue
+
+        hash_time = measure(lambda: context.hash("user123"), iterations)
+        verify_time = measure(lambda: context.verify("user123", hashed), iterations)
+        print(
+            f"{scheme:<8} hash {hash_time * 1000:8.2f} ms ({1 / hash_time:7.1f}/s)  "
+            f"verify {verify_time * 1000:8.2f} ms ({1 / verify_time:7.1f}/s)"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--schemes", nargs="+", default=config.PASSWORD_HASH_SCHEMES)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+    main(args.schemes, args.iterations)
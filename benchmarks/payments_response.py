@@ -0,0 +1,88 @@
+"""
+Пропускная способность ответа /users/me/payments на большой странице.
+
+Одна и та же страница PaymentPageResponse отдаётся двумя маршрутами FastAPI:
+- before — возврат модели: повторная валидация по response_model,
+  jsonable_encoder и стандартный json;
+- after — schema_response: один проход сериализатора pydantic-core
+  (ответы по умолчанию — через orjson, если он установлен).
+Запросы выполняются напрямую через ASGI, без сети и БД.
+
+Запуск:
+    python -m benchmarks.payments_response --rows 10000 --requests 50
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime, UTC
+
+from fastapi import FastAPI
+
+from benchmarks._asgi import asgi_request
+from benchmarks._stats import format_latency
+from src.api.payments.payment_responses import PaymentPageResponse
+from src.helpers.responses import FastJSONResponse, schema_response
+from src.schemas.payment_schemas import PaymentReadSchema
+
+
+def build_page(rows: int) -> PaymentPageResponse:
+    now = datetime.now(UTC)
+    return PaymentPageResponse(
+        items=[
+            PaymentReadSchema(
+                id=index, transaction_id=uuid.uuid4(), amount=100.5,
+                user_id=1, account_id=1, created_at=now,
+            )
+            for index in range(rows)
+        ],
+        next_cursor=None,
+    )
+
+
+def build_apps(page: PaymentPageResponse) -> dict[str, FastAPI]:
+    before = FastAPI()
+
+    @before.get("/users/me/payments", response_model=PaymentPageResponse)
+    async def payments_before():
+        return page
+
+    after = FastAPI(default_response_class=FastJSONResponse)
+
+    @after.get("/users/me/payments", response_model=PaymentPageResponse)
+    async def payments_after():
+        return schema_response(page)
+
+    return {"before": before, "after": after}
+
+
+async def run(name: str, app: FastAPI, requests: int) -> bytes:
+    latencies: list[float] = []
+    body = b""
+    started = time.perf_counter()
+    for _ in range(requests):
+        request_started = time.perf_counter()
+        status, _, body = await asgi_request(app, "GET", "/users/me/payments")
+        latencies.append(time.perf_counter() - request_started)
+        assert status == 200, status
+    elapsed = time.perf_counter() - started
+    print(f"{name:<7} {requests / elapsed:8.1f} req/s  {len(body) / 1024:8.0f} KiB  {format_latency(latencies)}")
+    return body
+
+
+async def main(rows: int, requests: int) -> None:
+    page = build_page(rows)
+    apps = build_apps(page)
+    print(f"{rows} платежей на странице")
+    results = {name: await run(name, app, requests) for name, app in apps.items()}
+    before = PaymentPageResponse.model_validate_json(results["before"])
+    after = PaymentPageResponse.model_validate_json(results["after"])
+    assert before == after, "ответы before и after различаются"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.requests))
@@ -0,0 +1,88 @@
+"""
+Строк в секунду: ORM-сущности против проецированных строк репозиториев.
+
+Два сценария:
+  * users    — поиск пользователя по id, как в get_current_user при промахе кэша:
+               select(UserModel) против UserRepository.find_by_id (UserRow без hashed_password);
+  * payments — все платежи пользователя: select(PaymentModel) против
+               PaymentRepository.READ_COLUMNS в PaymentRow со __slots__.
+Схемы ответа не собираются — сравнивается только чтение из БД в объекты Python.
+
+Требуется PostgreSQL из .dev.env с применёнными миграциями:
+    python -m benchmarks.projected_reads --lookups 5000 --repeats 5
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import select
+
+from src.config import config
+from src.helpers.helper import get_session
+from src.models import PaymentModel, UserModel
+from src.repositories.payment_repositories import PaymentRepository
+from src.repositories.user_repositories import UserRepository
+from src.schemas.row_schemas import PaymentRow
+
+
+async def entity_users(user_id: int, lookups: int) -> int:
+    async with get_session() as session:
+        for _ in range(lookups):
+            await session.scalar(select(UserModel).where(UserModel.id == user_id))
+            # как отдельный запрос на каждый вызов get_current_user: identity map не переиспользуется
+            session.expunge_all()
+    return lookups
+
+
+async def projected_users(user_id: int, lookups: int) -> int:
+    async with get_session() as session:
+        repository = UserRepository(session)
+        for _ in range(lookups):
+            await repository.find_by_id(user_id)
+    return lookups
+
+
+async def entity_payments(user_id: int, repeats: int) -> int:
+    rows = 0
+    async with get_session() as session:
+        for _ in range(repeats):
+            rows += len((await session.scalars(
+                select(PaymentModel).where(PaymentModel.user_id == user_id)
+            )).all())
+            session.expunge_all()
+    return rows
+
+
+async def projected_payments(user_id: int, repeats: int) -> int:
+    rows = 0
+    stmt = select(*PaymentRepository.READ_COLUMNS).where(PaymentModel.user_id == user_id)
+    async with get_session() as session:
+        for _ in range(repeats):
+            rows += len([PaymentRow(*row) for row in await session.execute(stmt)])
+    return rows
+
+
+async def measure(name: str, read, user_id: int, times: int) -> None:
+    await read(user_id, 1)  # прогрев: пул соединений, кэш скомпилированных запросов
+    started = time.perf_counter()
+    rows = await read(user_id, times)
+    elapsed = time.perf_counter() - started
+    print(f"{name:<20} {rows:>9} rows  {rows / elapsed:12.0f} rows/s  {elapsed:7.2f} s")
+
+
+async def main(lookups: int, repeats: int) -> None:
+    async with get_session() as session:
+        user = await UserRepository(session).find_by_email(config.DEFAULT_USER_EMAIL)
+
+    await measure("users/entity", entity_users, user.id, lookups)
+    await measure("users/projected", projected_users, user.id, lookups)
+    await measure("payments/entity", entity_payments, user.id, repeats)
+    await measure("payments/projected", projected_payments, user.id, repeats)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lookups", type=int, default=5000, help="поисков пользователя по id")
+    parser.add_argument("--repeats", type=int, default=5, help="чтений всех платежей пользователя")
+    args = parser.parse_args()
+    asyncio.run(main(args.lookups, args.repeats))
@@ -0,0 +1,102 @@
+"""
+Память и время на строку при чтении страницы платежей.
+
+Сравнивает прежнюю цепочку (ORM-сущности -> PaymentReadSchema.model_validate ->
+ещё одна model_validate в слое API) с проекцией: кортежи нужных колонок из
+PaymentRepository и одна PaymentReadSchema.model_construct на строку.
+Аллокации считаются tracemalloc, время — отдельным прогоном без трассировки.
+
+Требуется PostgreSQL из .dev.env с применёнными миграциями:
+    python -m benchmarks.read_projection --rows 10000 --seed 10000
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+import uuid
+
+from sqlalchemy import select
+
+from src.config import config
+from src.helpers.helper import get_session
+from src.models import PaymentModel
+from src.schemas.payment_schemas import PaymentCreateSchema, PaymentFilterSchema, PaymentReadSchema
+from src.services.account_service import AccountService
+from src.services.payment_service import PaymentService
+from src.services.user_service import UserService
+
+
+async def legacy_read(user_id: int, rows: int) -> list[PaymentReadSchema]:
+    """Чтение так, как до проекции: сущности в identity map и две валидации"""
+    async with get_session() as session:
+        stmt = (
+            select(PaymentModel)
+            .where(PaymentModel.user_id == user_id)
+            .order_by(PaymentModel.created_at.desc(), PaymentModel.id.desc())
+            .limit(rows)
+        )
+        payments = [PaymentReadSchema.model_validate(p) for p in await session.scalars(stmt)]
+        return [PaymentReadSchema.model_validate(p) for p in payments]
+
+
+async def projected_read(user_id: int, rows: int) -> list[PaymentReadSchema]:
+    async with get_session() as session:
+        return await PaymentService(session).get_page_by_user_id(
+            user_id=user_id, filters=PaymentFilterSchema(), limit=rows
+        )
+
+
+async def measure(name: str, read, user_id: int, rows: int, repeats: int) -> None:
+    await read(user_id, rows)  # прогрев: пул соединений, кэш скомпилированных запросов
+
+    started = time.perf_counter()
+    for _ in range(repeats):
+        result = await read(user_id, rows)
+    elapsed = (time.perf_counter() - started) / repeats
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = await read(user_id, rows)
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    blocks = sum(stat.count_diff for stat in stats if stat.count_diff > 0)
+    size = sum(stat.size_diff for stat in stats if stat.size_diff > 0)
+
+    count = max(len(result), 1)
+    print(
+        f"{name:<10} {len(result):>7} rows  {count / elapsed:10.0f} rows/s  "
+        f"{blocks / count:7.1f} live blocks/row  {size / count:8.0f} B/row  peak {peak / 1024 / 1024:7.1f} MiB"
+    )
+
+
+async def seed(user_id: int, account_id: int, count: int) -> None:
+    for offset in range(0, count, 1000):
+        async with get_session() as session:
+            await PaymentService(session).create_many([
+                PaymentCreateSchema(
+                    transaction_id=uuid.uuid4(), amount=1.0, user_id=user_id, account_id=account_id,
+                )
+                for _ in range(min(1000, count - offset))
+            ])
+
+
+async def main(rows: int, repeats: int, seed_count: int) -> None:
+    async with get_session() as session:
+        user = await UserService(session).get_by_email(config.DEFAULT_USER_EMAIL)
+        accounts = await AccountService(session).get_accounts_by_user_id(user.id)
+    if seed_count:
+        await seed(user.id, accounts[0].id, seed_count)
+
+    await measure("legacy", legacy_read, user.id, rows, repeats)
+    await measure("projected", projected_read, user.id, rows, repeats)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0, help="сначала добавить столько платежей пользователю")
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.repeats, args.seed))
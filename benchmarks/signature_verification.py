@@ -0,0 +1,61 @@
+"""
+Скорость проверки подписи webhook-платежа.
+
+Сравнивает прежнюю проверку (get_concatenate_values: model_dump, сортировка,
+str() каждого значения, затем sha256 и сравнение через !=) с SignatureService.verify
+для обеих схем подписи, в том числе когда подпись сделана последним из нескольких ключей.
+
+Запуск (БД не нужна):
+    python -m benchmarks.signature_verification --iterations 200000
+"""
+import argparse
+import hashlib
+import time
+import uuid
+
+from src.api.payments.service.signature_service import SignatureService
+from src.enums.signature_algorithm import SignatureAlgorithm
+from src.schemas.payment_schemas import PaymentCreateSchema
+from src.utils.utils import get_concatenate_values
+
+SECRET = "benchmark-secret"
+
+
+def legacy_signature(payment: PaymentCreateSchema, secret_key: str) -> str:
+    """Подпись так, как её считал SignatureService.create_signature до оптимизации"""
+    return hashlib.sha256((get_concatenate_values(payment) + secret_key).encode("utf-8")).hexdigest()
+
+
+def measure(name: str, func, iterations: int) -> None:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    elapsed = time.perf_counter() - started
+    print(f"{name:<28} {iterations / elapsed:12.0f} verifications/s  {elapsed / iterations * 1e6:8.2f} µs")
+
+
+def main(iterations: int, keys: int) -> None:
+    payment = PaymentCreateSchema(
+        transaction_id=uuid.uuid4(), amount=100.5, user_id=1, account_id=1,
+    )
+    legacy = legacy_signature(payment, SECRET)
+    assert SignatureService([SECRET], SignatureAlgorithm.SHA256).create_signature(payment) == legacy, \
+        "канонические строки старой и новой реализации разошлись"
+
+    measure("legacy sha256", lambda: legacy_signature(payment, SECRET) == legacy, iterations)
+    for algorithm in SignatureAlgorithm:
+        service = SignatureService([SECRET], algorithm)
+        signature = service.create_signature(payment)
+        measure(f"{algorithm}", lambda: service.verify(payment, signature), iterations)
+
+        # подпись последним ключом: худший случай при ротации
+        rotated = SignatureService([f"{SECRET}-{i}" for i in range(keys - 1)] + [SECRET], algorithm)
+        measure(f"{algorithm} ({keys} keys)", lambda: rotated.verify(payment, signature), iterations)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200_000)
+    parser.add_argument("--keys", type=int, default=3)
+    args = parser.parse_args()
+    main(args.iterations, args.keys)
@@ -0,0 +1,119 @@
+"""
+Бенчмарк приёма webhook-платежей.
+
+Сравнивает прежний последовательный путь (5 запросов к БД и 3 коммита на платеж;
+из приложения он удалён и воспроизводится здесь как «до»), объединённый
+PaymentService.create_with_balance (один запрос, один коммит) и пакетный
+PaymentService.create_many. В конце печатается ускорение относительно «до».
+
+Требуется PostgreSQL из .dev.env с применёнными миграциями:
+    python -m benchmarks.webhook_ingestion --count 2000 --concurrency 16
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from sqlalchemy import select, update
+
+from src.config import config
+from src.helpers.helper import get_session
+from src.models import AccountModel, PaymentModel
+from src.schemas.payment_schemas import PaymentCreateSchema
+from src.services.account_service import AccountService
+from src.services.payment_service import PaymentService
+from src.services.user_service import UserService
+
+
+async def sequential_ingest(payment: PaymentCreateSchema) -> None:
+    """Путь до объединения: отдельные SELECT/INSERT/UPDATE и коммит на каждом шаге."""
+    async with get_session() as session:
+        existing = await session.scalar(
+            select(PaymentModel.id).where(PaymentModel.transaction_id == payment.transaction_id)
+        )
+        if existing:
+            return
+        account = await session.scalar(
+            select(AccountModel).where(AccountModel.id == payment.account_id, AccountModel.user_id == payment.user_id)
+        )
+        if not account:
+            account = AccountModel(id=payment.account_id, user_id=payment.user_id, balance=0)
+            session.add(account)
+            await session.commit()
+        await session.execute(
+            update(AccountModel)
+            .where(AccountModel.id == account.id)
+            .values(balance=AccountModel.balance + payment.amount)
+        )
+        await session.commit()
+        session.add(PaymentModel(
+            transaction_id=payment.transaction_id,
+            amount=payment.amount,
+            user_id=payment.user_id,
+            account_id=payment.account_id,
+        ))
+        await session.commit()
+
+
+async def fused_ingest(payment: PaymentCreateSchema) -> None:
+    async with get_session() as session:
+        await PaymentService(session).create_with_balance(payment)
+
+
+async def batch_ingest(payments: list[PaymentCreateSchema]) -> None:
+    async with get_session() as session:
+        await PaymentService(session).create_many(payments)
+
+
+def report(name: str, count: int, elapsed: float) -> float:
+    rate = count / elapsed
+    print(f"{name:<12} {count:>7} webhooks  {elapsed:8.3f} s  {rate:10.1f} webhooks/s")
+    return rate
+
+
+async def run_batches(payments: list[PaymentCreateSchema], batch_size: int) -> float:
+    started = time.perf_counter()
+    for offset in range(0, len(payments), batch_size):
+        await batch_ingest(payments[offset:offset + batch_size])
+    return report("batch", len(payments), time.perf_counter() - started)
+
+
+async def run(name: str, ingest, payments: list[PaymentCreateSchema], concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def worker(payment: PaymentCreateSchema) -> None:
+        async with semaphore:
+            await ingest(payment)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(payment) for payment in payments))
+    return report(name, len(payments), time.perf_counter() - started)
+
+
+async def main(count: int, concurrency: int, batch_size: int) -> None:
+    async with get_session() as session:
+        user = await UserService(session).get_by_email(config.DEFAULT_USER_EMAIL)
+        accounts = await AccountService(session).get_accounts_by_user_id(user.id)
+    account_id = accounts[0].id
+
+    def make_payments() -> list[PaymentCreateSchema]:
+        return [
+            PaymentCreateSchema(
+                transaction_id=uuid.uuid4(), amount=1.0, user_id=user.id, account_id=account_id,
+            )
+            for _ in range(count)
+        ]
+
+    before = await run("sequential", sequential_ingest, make_payments(), concurrency)
+    fused = await run("fused", fused_ingest, make_payments(), concurrency)
+    batch = await run_batches(make_payments(), batch_size)
+    print(f"ускорение относительно sequential: fused ×{fused / before:.1f}, batch ×{batch / before:.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(main(args.count, args.concurrency, args.batch_size))
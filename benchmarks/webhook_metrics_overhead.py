@@ -0,0 +1,59 @@
+"""
+Цена метрик конвейера webhook на один платеж.
+
+Повторяет то, что PaymentApiService.create_payment добавляет к принятому платежу:
+четыре вызова perf_counter, наблюдения этапов signature и store и счётчик исхода,
+на тех же заранее созданных дочерних метриках. Для сравнения — пустой цикл той же длины.
+Завершается с кодом 1, если цена выше --budget-us микросекунд.
+
+Запуск (БД не нужна):
+    python -m benchmarks.webhook_metrics_overhead --iterations 1000000
+"""
+import argparse
+import sys
+import time
+
+from src.api.payments.service.payments_api_service import SIGNATURE_STAGE, STORE_STAGE, ACCEPTED
+
+
+def empty(iterations: int) -> None:
+    for _ in range(iterations):
+        pass
+
+
+def instrumented(iterations: int) -> None:
+    for _ in range(iterations):
+        started = time.perf_counter()
+        SIGNATURE_STAGE.observe(time.perf_counter() - started)
+        started = time.perf_counter()
+        STORE_STAGE.observe(time.perf_counter() - started)
+        ACCEPTED.inc()
+
+
+def measure(func, iterations: int, repeats: int) -> float:
+    """Лучшее из repeats время на итерацию, в секундах"""
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func(iterations)
+        best = min(best, time.perf_counter() - started)
+    return best / iterations
+
+
+def main(iterations: int, repeats: int, budget_us: float) -> int:
+    baseline = measure(empty, iterations, repeats)
+    total = measure(instrumented, iterations, repeats)
+    overhead_us = (total - baseline) * 1e6
+    print(f"пустой цикл      {baseline * 1e9:8.1f} ns/итерация")
+    print(f"с метриками      {total * 1e9:8.1f} ns/итерация")
+    print(f"цена на webhook  {overhead_us:8.3f} µs (бюджет {budget_us} µs)")
+    return 0 if overhead_us <= budget_us else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=1_000_000)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--budget-us", type=float, default=3.0)
+    args = parser.parse_args()
+    sys.exit(main(args.iterations, args.repeats, args.budget_us))
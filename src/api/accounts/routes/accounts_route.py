@@ -3,8 +3,10 @@ from starlette import status
 
 from src.api.accounts.accounts_response import AccountsResponseSchema
 from src.api.accounts.service.accounts_api_service import AccountsApiService
-from src.api.dependencies import get_current_user, get_account_api_service
-from src.schemas.user_shemas import UserReadSchema
+from src.api.dependencies import get_current_principal, get_account_api_service, require_roles
+from src.enums.user_role import UserRole
+from src.helpers.responses import schema_response
+from src.schemas.auth_schemas import PrincipalSchema
 from src.api.accounts.accounts_response import AccountResponseSchema
 
 account_router = APIRouter(
@@ -19,7 +21,23 @@ account_router = APIRouter(
 )
 
 async def get_me(
-        current_user: UserReadSchema = Depends(get_current_user),
+        current_user: PrincipalSchema = Depends(get_current_principal),
         account_api_service: AccountsApiService = Depends(get_account_api_service)
 ):
-    return await account_api_service.get_accounts_by_user_id(current_user.id)
\ No newline at end of file
+    accounts = await account_api_service.get_accounts_by_user_id(current_user.id)
+    return schema_response(AccountsResponseSchema(accounts=accounts))
+
+
+@account_router.post(
+    "/{account_id}/balance-shards/collapse",
+    response_model=AccountResponseSchema,
+    status_code=status.HTTP_200_OK,
+    summary="Свернуть подстроки баланса счёта",
+    description="Переносит подстроки баланса (BALANCE_MODE=sharded) в основной баланс счёта. Доступно только администраторам."
+)
+async def collapse_balance_shards(
+        account_id: int,
+        _: PrincipalSchema = Depends(require_roles(UserRole.ADMIN)),
+        account_api_service: AccountsApiService = Depends(get_account_api_service)
+):
+    return await account_api_service.collapse_balance_shards(account_id)
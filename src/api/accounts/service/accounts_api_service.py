@@ -1,9 +1,14 @@
+import logging
+from http import HTTPStatus
+
+from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.util import await_only
 
 from src.api.accounts.accounts_response import AccountResponseSchema
 from src.services.account_service import AccountService
-from src.schemas.account_schemas import AccountReadSchema
+
+logger = logging.getLogger(__name__)
 
 
 class AccountsApiService:
@@ -11,8 +16,23 @@ class AccountsApiService:
         self.account_service = AccountService(session)
 
     async def get_accounts_by_user_id(self, user_id: int) -> list[AccountResponseSchema]:
-        accounts = await self.account_service.get_accounts_by_user_id(user_id=user_id)
-        return [
-            AccountResponseSchema.model_validate(account)
-            for account in accounts
-        ]
\ No newline at end of file
+        return await self.account_service.get_accounts_by_user_id(
+            user_id=user_id, schema=AccountResponseSchema
+        )
+
+    async def collapse_balance_shards(self, account_id: int) -> AccountResponseSchema:
+        """
+        Переносит подстроки баланса счёта в основной баланс.
+
+        :param account_id: ID счёта
+        :raises HTTPException: 404, если счёт не найден
+        :return: счёт с итоговым балансом
+        """
+        logger.info("🧮 Свёртка подстрок баланса счёта ID=%s", account_id)
+        account = await self.account_service.collapse_balance_shards(account_id)
+        if account is None:
+            raise HTTPException(
+                status_code=HTTPStatus.NOT_FOUND,
+                detail="Счёт не найден"
+            )
+        return AccountResponseSchema.model_validate(account)
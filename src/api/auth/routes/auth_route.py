@@ -78,4 +78,4 @@ async def login(
     - **password**: пароль
     """
     user = await auth_service.authenticate(request.email, request.password)
-    return jwt_service.create_token_pair(user_id=user.id, role=user.role)
+    return jwt_service.create_token_pair(user_id=user.id, role=user.role, token_version=user.token_version)
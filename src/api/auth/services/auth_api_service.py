@@ -6,7 +6,7 @@ from src.schemas.auth_schemas import UserAuthSchema
 from src.schemas.user_shemas import UserReadSchema, UserCreateSchema
 from src.services.user_service import UserService
 from src.api.auth.request import AuthLoginRequest
-from src.utils.security import verify_password, hash_password
+from src.utils.security import verify_and_update_password_async, hash_password_async
 from src.enums.user_role import UserRole
 
 logger = logging.getLogger(__name__)
@@ -34,24 +34,29 @@ class AuthAPIService:
                                401, если пароль неверный
         :return: UserAuthSchema
         """
-        logger.info(f"🔍 Попытка входа: email={email}")
+        logger.info("🔍 Попытка входа: email=%s", email)
 
         user = await self.user_service.get_user_with_password(email=email)
         if not user:
-            logger.warning(f"❌ Пользователь с email={email} не найден")
+            logger.warning("❌ Пользователь с email=%s не найден", email)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Пользователь с email {email} не найден"
             )
 
-        if not verify_password(password, user.hashed_password):
-            logger.warning(f"🔑 Неверный пароль для email={email}")
+        verified, new_hash = await verify_and_update_password_async(password, user.hashed_password)
+        if not verified:
+            logger.warning("🔑 Неверный пароль для email=%s", email)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Неверный email или пароль"
             )
 
-        logger.info(f"✅ Успешная аутентификация пользователя: id={user.id}, email={email}")
+        if new_hash:
+            await self.user_service.update_password_hash(user.id, new_hash)
+            logger.info("🔁 Хэш пароля пользователя id=%s обновлён до текущей схемы", user.id)
+
+        logger.info("✅ Успешная аутентификация пользователя: id=%s, email=%s", user.id, email)
         return user
 
     async def register_user(self, email: str, password: str, role: UserRole, full_name: str) -> UserReadSchema:
@@ -65,11 +70,11 @@ class AuthAPIService:
         :raises HTTPException: 400, если пользователь уже существует
         :return: UserReadSchema
         """
-        logger.info(f"📝 Регистрация пользователя: email={email}, role={role}")
+        logger.info("📝 Регистрация пользователя: email=%s, role=%s", email, role)
 
         existing_user = await self.user_service.get_by_email(email=email)
         if existing_user:
-            logger.warning(f"⚠️ Пользователь с email={email} уже существует")
+            logger.warning("⚠️ Пользователь с email=%s уже существует", email)
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Пользователь с email {email} уже зарегистрирован"
@@ -77,11 +82,11 @@ class AuthAPIService:
 
         new_user = UserCreateSchema(
             email=email,
-            hashed_password=hash_password(password),
+            hashed_password=await hash_password_async(password),
             role=role,
             full_name=full_name,
         )
         created_user = await self.user_service.create(new_user)
 
-        logger.info(f"🎉 Пользователь успешно зарегистрирован: id={created_user.id}, email={email}")
+        logger.info("🎉 Пользователь успешно зарегистрирован: id=%s, email=%s", created_user.id, email)
         return created_user
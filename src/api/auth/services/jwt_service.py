@@ -11,35 +11,37 @@ class JWTService:
     def __init__(self) -> None:
         self.secret_key: str = config.JWT_SECRET_KEY
         self.algorithm: str = config.JWT_ALGORITHM
-        self.access_token_expire_minutes: int = config.JWT_ACCESS_TOKEN_EXPIRE_MINUTES
+        self.access_token_expire_minutes: int = config.get_access_token_expire_minutes()
         self.refresh_token_expire_days: int = config.JWT_REFRESH_TOKEN_EXPIRE_DAYS
 
     def _create_token(self, payload: dict[str, Any], expires_delta: timedelta) -> str:
-        expire = datetime.now(timezone.utc) + expires_delta
-        payload.update({"exp": expire})
+        issued_at = datetime.now(timezone.utc)
+        payload.update({"iat": issued_at, "exp": issued_at + expires_delta})
         return jwt.encode(payload, self.secret_key, algorithm=self.algorithm)
 
-    def create_access_token(self, user_id: int, role: UserRole) -> str:
+    def create_access_token(self, user_id: int, role: UserRole, token_version: int = 0) -> str:
         payload = {
             "sub": str(user_id),
             "role": role.value,
+            "ver": token_version,
         }
         return self._create_token(payload, timedelta(minutes=self.access_token_expire_minutes))
 
-    def create_refresh_token(self, user_id: int) -> str:
+    def create_refresh_token(self, user_id: int, token_version: int = 0) -> str:
         payload = {
             "sub": str(user_id),
             "type": "refresh",
+            "ver": token_version,
         }
         return self._create_token(payload, timedelta(days=self.refresh_token_expire_days))
 
     def decode_token(self, token: str) -> dict[str, Any]:
         return jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
 
-    def create_token_pair(self, user_id: int, role: UserRole) -> AuthTokensSchema:
+    def create_token_pair(self, user_id: int, role: UserRole, token_version: int = 0) -> AuthTokensSchema:
         return AuthTokensSchema(
-            access_token=self.create_access_token(user_id=user_id, role=role),
-            refresh_token=self.create_refresh_token(user_id=user_id),
+            access_token=self.create_access_token(user_id=user_id, role=role, token_version=token_version),
+            refresh_token=self.create_refresh_token(user_id=user_id, token_version=token_version),
             token_type="Bearer",
         )
 
@@ -1,5 +1,5 @@
 
-from typing import Annotated
+from typing import Annotated, Any
 
 from fastapi import Depends
 from fastapi.security import OAuth2PasswordBearer, HTTPBearer, HTTPAuthorizationCredentials
@@ -10,26 +10,28 @@ from src.api.payments.service.payments_api_service import PaymentApiService
 from src.api.accounts.service.accounts_api_service import AccountsApiService
 from src.api.auth.services.jwt_service import JWTService
 from src.helpers.helper import get_jwt_service
+from src.config import config
+from src.schemas.auth_schemas import PrincipalSchema
 from src.schemas.user_shemas import UserReadSchema
 from src.services.user_service import UserService
 from src.helpers.exceptions.http_exceptions import ForbiddenError
 
 from src.enums.user_role import UserRole
 from src.api.users.user_api_service import UserApiService
-from src.helpers.helper import get_session
+from src.helpers.helper import get_db_session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 
 security = HTTPBearer()
 
-async def get_user_service() -> UserService:
-    async with get_session() as session:
-        return UserService(session)
+async def get_user_service(session: AsyncSession = Depends(get_db_session)) -> UserService:
+    return UserService(session)
 
-async def get_current_user(
+async def decode_access_token(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     jwt_service: JWTService = Depends(get_jwt_service),
     user_service: UserService = Depends(get_user_service),
-) -> UserReadSchema:  # ✅ корректно
+) -> dict[str, Any]:
     token = credentials.credentials
 
     try:
@@ -47,7 +49,20 @@ async def get_current_user(
             detail="Токен не содержит идентификатор пользователя",
         )
 
-    user = await user_service.get_by_id(int(user_id))
+    # токены, выпущенные до изменения или удаления пользователя, несут старую версию
+    if config.AUTH_STATELESS and payload.get("ver", 0) != await user_service.get_token_version(int(user_id)):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Токен отозван",
+        )
+
+    return payload
+
+async def get_current_user(
+    payload: dict[str, Any] = Depends(decode_access_token),
+    user_service: UserService = Depends(get_user_service),
+) -> UserReadSchema:  # ✅ корректно
+    user = await user_service.get_by_id(int(payload["sub"]))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -56,24 +71,43 @@ async def get_current_user(
 
     return user  # если это UserReadSchema — всё ок
 
+async def get_current_principal(
+    payload: dict[str, Any] = Depends(decode_access_token),
+    user_service: UserService = Depends(get_user_service),
+) -> PrincipalSchema:
+    """
+    Субъект запроса для проверки прав.
+    В stateless-режиме строится из claims токена без обращения к БД,
+    иначе — из пользователя, загруженного по sub.
+    """
+    if config.AUTH_STATELESS:
+        try:
+            role = UserRole(payload.get("role"))
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Токен не содержит роль пользователя",
+            )
+        return PrincipalSchema(id=int(payload["sub"]), role=role)
+
+    user = await get_current_user(payload=payload, user_service=user_service)
+    return PrincipalSchema(id=user.id, role=user.role)
+
 def require_roles(*allowed_roles: UserRole):
     """Фабрика зависимостей для проверки роли"""
     async def dependency(
-        user: Annotated[UserReadSchema, Depends(get_current_user)]
-    ) -> UserReadSchema:
-        if user.role not in allowed_roles:
+        principal: Annotated[PrincipalSchema, Depends(get_current_principal)]
+    ) -> PrincipalSchema:
+        if principal.role not in allowed_roles:
             raise ForbiddenError()
-        return user
+        return principal
     return dependency
 
-async def get_user_api_service() -> UserApiService:
-    async with get_session() as session:
-        return UserApiService(session)
+async def get_user_api_service(session: AsyncSession = Depends(get_db_session)) -> UserApiService:
+    return UserApiService(session)
 
-async def get_account_api_service() -> AccountsApiService:
-    async with get_session() as session:
-        return AccountsApiService(session)
+async def get_account_api_service(session: AsyncSession = Depends(get_db_session)) -> AccountsApiService:
+    return AccountsApiService(session)
 
-async def get_payment_api_service() -> PaymentApiService:
-    async with get_session() as session:
-        return PaymentApiService(session)
\ No newline at end of file
+async def get_payment_api_service(session: AsyncSession = Depends(get_db_session)) -> PaymentApiService:
+    return PaymentApiService(session)
\ No newline at end of file
@@ -4,4 +4,8 @@ class IncorrectSignatureError(Exception):
 
 class TransactionDuplicateError(Exception):
     def __init__(self, transaction_id: str):
-        super().__init__(f"Транзакция {transaction_id} уже проходила")
\ No newline at end of file
+        super().__init__(f"Транзакция {transaction_id} уже проходила")
+
+class AccountOwnershipError(Exception):
+    def __init__(self, account_id: int, user_id: int):
+        super().__init__(f"Счёт {account_id} не принадлежит пользователю {user_id}")
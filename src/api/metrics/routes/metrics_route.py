@@ -0,0 +1,17 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from src.helpers.metrics import registry
+
+metrics_router = APIRouter(tags=["metrics"])
+
+
+@metrics_router.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    summary="Метрики в формате Prometheus",
+    include_in_schema=False,
+)
+async def metrics():
+    await registry.collect()
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
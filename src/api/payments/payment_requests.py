@@ -1,6 +1,8 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 from pydantic.alias_generators import to_camel
 
+from src.config import config
+
 
 class PaymentCreateRequest(BaseModel):
     account_id: int
@@ -9,4 +11,9 @@ class PaymentCreateRequest(BaseModel):
     transaction_id: str
     signature: str
 
-    model_config = ConfigDict(from_attributes=True, populate_by_name = True, alias_generator = to_camel)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True, populate_by_name = True, alias_generator = to_camel)
+
+class PaymentBatchCreateRequest(BaseModel):
+    payments: list[PaymentCreateRequest] = Field(min_length=1, max_length=config.WEBHOOK_BATCH_MAX_SIZE)
+
+    model_config = ConfigDict(from_attributes=True, populate_by_name = True, alias_generator = to_camel)
@@ -0,0 +1,23 @@
+from pydantic import BaseModel, ConfigDict
+from pydantic.alias_generators import to_camel
+
+from src.enums.payment_status import PaymentStatus
+from src.schemas.payment_schemas import PaymentReadSchema
+
+
+class PaymentBatchItemResponse(BaseModel):
+    transaction_id: str
+    status: PaymentStatus
+    model_config = ConfigDict(
+        from_attributes=True, populate_by_name=True, alias_generator=to_camel
+    )
+
+class PaymentBatchResponse(BaseModel):
+    items: list[PaymentBatchItemResponse]
+
+class PaymentPageResponse(BaseModel):
+    items: list[PaymentReadSchema]
+    next_cursor: str | None
+    model_config = ConfigDict(
+        from_attributes=True, populate_by_name=True, alias_generator=to_camel
+    )
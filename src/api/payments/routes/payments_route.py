@@ -1,7 +1,11 @@
-from fastapi import APIRouter, Depends
+from http import HTTPStatus
+
+from fastapi import APIRouter, Depends, Response
 
 from src.api.dependencies import get_payment_api_service
-from src.api.payments.payment_requests import PaymentCreateRequest
+from src.config import config
+from src.api.payments.payment_requests import PaymentCreateRequest, PaymentBatchCreateRequest
+from src.api.payments.payment_responses import PaymentBatchResponse
 from src.api.payments.service.payments_api_service import PaymentApiService
 
 payments_router = APIRouter(
@@ -24,12 +28,46 @@ payments_router = APIRouter(
     - `user_id` — ID пользователя
     - `account_id` — ID счёта пользователя
     - `signature` — подпись для проверки подлинности
+
+    Повтор уже сохранённого платежа с тем же содержимым снова получает
+    `200`, платеж с занятым `transaction_id` и другим содержимым — `409`.
+
+    При включённом `WEBHOOK_ACK_MODE` после проверки подписи платеж ставится
+    в очередь и сразу возвращается `202 Accepted`.
     """
 )
 async def webhook(
         payment: PaymentCreateRequest,
+        response: Response,
         service: PaymentApiService = Depends(get_payment_api_service)
 ):
+    if config.WEBHOOK_ACK_MODE:
+        await service.enqueue_payment(payment)
+        response.status_code = HTTPStatus.ACCEPTED
+        return {"status": "accepted"}
+
     await service.create_payment(payment)
 
     return {"status": "success"}
+
+
+@payments_router.post(
+    "/webhook/batch",
+    response_model=PaymentBatchResponse,
+    summary="Пакетная обработка webhook-платежей",
+    description="""
+    Принимает пачку платежей от внешней платёжной системы.
+
+    Подпись проверяется для каждого платежа, дубли внутри пачки и уже
+    сохранённые транзакции пропускаются, остальные платежи записываются
+    одной транзакцией, баланс каждого счёта обновляется один раз.
+
+    Для каждого платежа возвращается статус:
+    `accepted`, `duplicate`, `conflict` (transaction_id занят другим платежом), `invalid`, `invalid_signature`, `account_mismatch`.
+    """
+)
+async def webhook_batch(
+        batch: PaymentBatchCreateRequest,
+        service: PaymentApiService = Depends(get_payment_api_service)
+):
+    return await service.create_payments(batch)
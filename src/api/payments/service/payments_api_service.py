@@ -1,19 +1,71 @@
+import csv
+import io
 import logging
+import time
+import uuid
+from collections.abc import AsyncIterator
+from datetime import datetime
 from http import HTTPStatus
 
 from fastapi import HTTPException
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.schemas.account_schemas import AccountCreateSchema
+from src.api.exceptions.payments_exceptions import TransactionDuplicateError, AccountOwnershipError
 from src.services.account_service import AccountService
 from src.config import config
-from src.api.payments.payment_requests import PaymentCreateRequest
-from src.schemas.payment_schemas import PaymentReadSchema, PaymentCreateSchema
+from src.api.payments.payment_requests import PaymentCreateRequest, PaymentBatchCreateRequest
+from src.api.payments.payment_responses import (
+    PaymentBatchResponse,
+    PaymentBatchItemResponse,
+    PaymentPageResponse,
+)
+from src.enums.export_format import ExportFormat
+from src.enums.payment_status import PaymentStatus
+from src.enums.webhook_outcome import WebhookOutcome
+from src.helpers.helper import get_session
+from src.helpers.metrics import registry
+from src.utils.pagination import encode_cursor, decode_cursor
+from src.schemas.payment_schemas import PaymentReadSchema, PaymentCreateSchema, PaymentFilterSchema
 from src.services.payment_service import PaymentService
-from src.api.payments.service.signature_service import SignatureService
+from src.services.webhook_inbox_service import WebhookInboxService
+from src.api.payments.service.signature_service import signature_service
 
 logger = logging.getLogger(__name__)
 
+EXPORT_CSV_COLUMNS = ("id", "transaction_id", "account_id", "user_id", "amount", "created_at")
+
+STAGE_DURATION = registry.histogram(
+    "webhook_stage_duration_seconds",
+    "Длительность этапов обработки webhook-платежа",
+    ["stage"],
+    buckets=(0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+)
+# signature — валидация и проверка подписи; store — запись платежа вместе с проверкой дубля,
+# созданием счёта и обновлением баланса (один запрос и коммит); retry_check — сравнение
+# дубля с сохранённым платежом; enqueue — постановка в webhook_inbox
+SIGNATURE_STAGE = STAGE_DURATION.labels("signature")
+STORE_STAGE = STAGE_DURATION.labels("store")
+RETRY_CHECK_STAGE = STAGE_DURATION.labels("retry_check")
+ENQUEUE_STAGE = STAGE_DURATION.labels("enqueue")
+
+OUTCOMES_TOTAL = registry.counter(
+    "webhook_payments_total", "Исходы обработки webhook-платежей", ["outcome"]
+)
+OUTCOMES = {outcome: OUTCOMES_TOTAL.labels(outcome) for outcome in WebhookOutcome}
+# поиск по ключу-enum вызывает Python-уровневый __hash__, поэтому одиночный путь
+# берёт дочерние счётчики из констант
+ACCEPTED = OUTCOMES[WebhookOutcome.ACCEPTED]
+QUEUED = OUTCOMES[WebhookOutcome.QUEUED]
+DUPLICATE = OUTCOMES[WebhookOutcome.DUPLICATE]
+CONFLICT = OUTCOMES[WebhookOutcome.CONFLICT]
+INVALID_SIGNATURE = OUTCOMES[WebhookOutcome.INVALID_SIGNATURE]
+ACCOUNT_MISMATCH = OUTCOMES[WebhookOutcome.ACCOUNT_MISMATCH]
+BATCH_OUTCOMES = {status: OUTCOMES[WebhookOutcome(status)] for status in PaymentStatus}
+ACCOUNTS_CREATED = registry.counter(
+    "webhook_accounts_created_total", "Счета, автоматически созданные при приёме webhook-платежа"
+)
+
 
 class PaymentApiService:
     """
@@ -36,81 +88,259 @@ class PaymentApiService:
         self.session = session
         self.payment_service = PaymentService(session)
         self.account_service = AccountService(session)
-        self.signature_service = SignatureService()
+        self.inbox_service = WebhookInboxService(session)
+        self.signature_service = signature_service
 
-    async def create_payment(self, payment_request: PaymentCreateRequest) -> PaymentReadSchema:
+    def _validate_signature(self, payment_request: PaymentCreateRequest) -> PaymentCreateSchema:
         """
-        Обрабатывает входящий webhook-платеж.
-
-        Шаги:
-        1. Проверка подписи
-        2. Проверка уникальности transaction_id
-        3. Получение или создание счёта
-        4. Обновление баланса
-        5. Сохранение платежа
+        Проверяет подпись платежа.
 
         :param payment_request: объект запроса на создание платежа
-        :return: данные созданного платежа
+        :raises HTTPException: 400, если подпись не действительна
+        :return: провалидированные данные платежа
         """
-        logger.info("📩 Получен webhook-платеж: %s", payment_request)
-
+        started = time.perf_counter()
         # Преобразуем входящие данные в схему для валидации
         payment_data = PaymentCreateSchema.model_validate(payment_request)
+        valid = self.signature_service.verify(payment_data, payment_request.signature)
+        SIGNATURE_STAGE.observe(time.perf_counter() - started)
 
-        # 1. Проверка подписи
-        expected_signature = self.signature_service.create_signature(
-            payment_data, config.WEBHOOK_SECRET_KEY
-        )
-        if payment_request.signature != expected_signature:
-            logger.warning("❌ Некорректная подпись. Ожидалось: %s, Получено: %s",
-                           expected_signature, payment_request.signature)
+        if not valid:
+            INVALID_SIGNATURE.inc()
+            logger.warning("❌ Некорректная подпись платежа transaction_id=%s", payment_data.transaction_id)
             raise HTTPException(
                 status_code=HTTPStatus.BAD_REQUEST,
                 detail="Подпись не действительна"
             )
+        return payment_data
 
-        # 2. Проверка уникальности транзакции
-        existing_payment = await self.payment_service.get_by_transaction_id(payment_data.transaction_id)
-        if existing_payment:
+    async def enqueue_payment(self, payment_request: PaymentCreateRequest) -> int | None:
+        """
+        Проверяет подпись и ставит webhook-платеж в очередь webhook_inbox.
+        Платеж будет записан фоновыми обработчиками.
+
+        :param payment_request: объект запроса на создание платежа
+        :raises HTTPException: 409, если transaction_id занят другим платежом
+        :return: ID события в очереди или None, если платеж уже известен как сохранённый
+        """
+        payment_data = self._validate_signature(payment_request)
+        status = self.payment_service.recent_retry_status(payment_data)
+        if status == PaymentStatus.DUPLICATE:
+            # повтор уже записанного платежа: в очередь его ставить незачем
+            DUPLICATE.inc()
+            logger.info("♻️ Повтор платежа transaction_id=%s не поставлен в очередь", payment_data.transaction_id)
+            return None
+        if status == PaymentStatus.CONFLICT:
+            CONFLICT.inc()
             logger.warning("⚠️ Платеж с transaction_id=%s уже существует", payment_data.transaction_id)
             raise HTTPException(
                 status_code=HTTPStatus.CONFLICT,
                 detail="Данная транзакция использовалась ранее"
             )
+        started = time.perf_counter()
+        event_id = await self.inbox_service.enqueue(payment_request.model_dump())
+        ENQUEUE_STAGE.observe(time.perf_counter() - started)
+        QUEUED.inc()
+        logger.info("📥 Платеж transaction_id=%s поставлен в очередь, событие ID=%s",
+                    payment_request.transaction_id, event_id)
+        return event_id
 
-        # 3. Получение или создание счёта пользователя
-        account = await self.account_service.get_by_account_user_pair(
-            account_id=payment_data.account_id,
-            user_id=payment_data.user_id
-        )
-        if not account:
-            logger.info("🏦 Создание нового счёта для пользователя ID=%s", payment_data.user_id)
-            account = await self.account_service.create(AccountCreateSchema(
-                balance=0.0,
-                user_id=payment_data.user_id,
-                id=payment_data.account_id,
-            ))
-
-        # 4. Обновление баланса счёта
-        logger.info("💰 Обновление баланса счёта ID=%s на сумму %.2f", account.id, payment_data.amount)
-        await self.account_service.update_balance(
-            account_id=account.id,
-            delta=payment_data.amount
-        )
+    async def create_payment(self, payment_request: PaymentCreateRequest) -> PaymentReadSchema | None:
+        """
+        Обрабатывает входящий webhook-платеж.
+
+        Шаги:
+        1. Проверка подписи
+        2. Сохранение платежа, создание/пополнение счёта одним запросом:
+           дубли transaction_id отсекаются уникальным индексом,
+           всё фиксируется одним коммитом
+        3. Для дубля: повтор с тем же содержимым считается успешным,
+           платеж с другим содержимым — конфликтом
+
+        :param payment_request: объект запроса на создание платежа
+        :raises HTTPException: 409, если transaction_id занят другим платежом
+        :return: данные созданного платежа или None для повтора уже сохранённого
+        """
+        logger.info("📩 Получен webhook-платеж transaction_id=%s, счёт ID=%s, пользователь ID=%s",
+                    payment_request.transaction_id, payment_request.account_id, payment_request.user_id)
+
+        # 1. Проверка подписи
+        payment_data = self._validate_signature(payment_request)
+
+        # 2. Сохранение платежа и обновление баланса счёта
+        started = time.perf_counter()
+        try:
+            new_payment, account_created = await self.payment_service.create_with_balance(payment_data)
+        except TransactionDuplicateError:
+            STORE_STAGE.observe(time.perf_counter() - started)
+            started = time.perf_counter()
+            identical = await self.payment_service.is_identical_retry(payment_data)
+            RETRY_CHECK_STAGE.observe(time.perf_counter() - started)
+            if identical:
+                DUPLICATE.inc()
+                logger.info("♻️ Повтор платежа transaction_id=%s, возвращён прежний результат",
+                            payment_data.transaction_id)
+                return None
+            CONFLICT.inc()
+            logger.warning("⚠️ Платеж с transaction_id=%s уже существует", payment_data.transaction_id)
+            raise HTTPException(
+                status_code=HTTPStatus.CONFLICT,
+                detail="Данная транзакция использовалась ранее"
+            )
+        except AccountOwnershipError:
+            STORE_STAGE.observe(time.perf_counter() - started)
+            ACCOUNT_MISMATCH.inc()
+            logger.warning("❌ Счёт ID=%s не принадлежит пользователю ID=%s",
+                           payment_data.account_id, payment_data.user_id)
+            raise HTTPException(
+                status_code=HTTPStatus.BAD_REQUEST,
+                detail="Счёт не принадлежит пользователю"
+            )
+
+        STORE_STAGE.observe(time.perf_counter() - started)
+        ACCEPTED.inc()
+
+        if account_created:
+            ACCOUNTS_CREATED.inc()
+            logger.info("🏦 Создан новый счёт ID=%s для пользователя ID=%s",
+                        new_payment.account_id, new_payment.user_id)
+        logger.info("✅ Платеж успешно сохранен: transaction_id=%s, сумма %.2f",
+                    new_payment.transaction_id, new_payment.amount)
+
+        return new_payment
+
+    async def create_payments(self, batch_request: PaymentBatchCreateRequest) -> PaymentBatchResponse:
+        """
+        Обрабатывает пачку webhook-платежей.
+
+        Шаги:
+        1. Проверка подписи каждого платежа
+        2. Отсев дублей внутри пачки (учитывается первое вхождение;
+           повтор с другим содержимым получает CONFLICT)
+        3. Сохранение оставшихся платежей одной транзакцией
 
-        # 5. Сохранение платежа
-        new_payment = await self.payment_service.create(payment_data)
-        logger.info("✅ Платеж успешно сохранен: transaction_id=%s", new_payment.transaction_id)
+        :param batch_request: пачка запросов на создание платежей
+        :return: статус по каждому платежу в порядке запроса
+        """
+        logger.info("📦 Получена пачка webhook-платежей: %s шт.", len(batch_request.payments))
+
+        statuses: list[PaymentStatus | None] = []
+        positions: dict[uuid.UUID, int] = {}
+        accepted: list[PaymentCreateSchema] = []
+        firsts: dict[uuid.UUID, PaymentCreateSchema] = {}
+        for payment_request in batch_request.payments:
+            try:
+                payment_data = PaymentCreateSchema.model_validate(payment_request)
+            except ValidationError:
+                statuses.append(PaymentStatus.INVALID)
+                continue
+
+            if not self.signature_service.verify(payment_data, payment_request.signature):
+                statuses.append(PaymentStatus.INVALID_SIGNATURE)
+            elif payment_data.transaction_id in positions:
+                first = firsts[payment_data.transaction_id]
+                statuses.append(
+                    PaymentStatus.DUPLICATE
+                    if self.payment_service.fingerprint(first.account_id, first.user_id, first.amount)
+                    == self.payment_service.fingerprint(payment_data.account_id, payment_data.user_id, payment_data.amount)
+                    else PaymentStatus.CONFLICT
+                )
+            else:
+                positions[payment_data.transaction_id] = len(statuses)
+                firsts[payment_data.transaction_id] = payment_data
+                statuses.append(None)
+                accepted.append(payment_data)
+
+        for transaction_id, status in (await self.payment_service.create_many(accepted)).items():
+            statuses[positions[transaction_id]] = status
+        for status in statuses:
+            BATCH_OUTCOMES[status].inc()
 
-        return PaymentReadSchema.model_validate(new_payment)
+        logger.info("✅ Пачка обработана: принято %s из %s",
+                    statuses.count(PaymentStatus.ACCEPTED), len(statuses))
+        return PaymentBatchResponse(items=[
+            PaymentBatchItemResponse(transaction_id=payment_request.transaction_id, status=status)
+            for payment_request, status in zip(batch_request.payments, statuses)
+        ])
 
-    async def get_user_payments(self, user_id: int) -> list[PaymentReadSchema]:
+    async def get_user_payments(
+            self,
+            user_id: int,
+            filters: PaymentFilterSchema,
+            limit: int,
+            cursor: str | None = None,
+    ) -> PaymentPageResponse:
         """
-        Возвращает список платежей пользователя.
+        Возвращает страницу платежей пользователя, от новых к старым.
 
         :param user_id: ID пользователя
-        :return: список платежей
+        :param filters: фильтры по дате создания и счёту
+        :param limit: размер страницы
+        :param cursor: курсор следующей страницы из предыдущего ответа
+        :raises HTTPException: 400, если курсор некорректен
+        :return: платежи и курсор следующей страницы
         """
         logger.info("📜 Получение списка платежей для пользователя ID=%s", user_id)
-        payments = await self.payment_service.get_by_user_id(user_id)
-        return [PaymentReadSchema.model_validate(p) for p in payments]
+        after = None
+        if cursor:
+            try:
+                created_at, payment_id = decode_cursor(cursor)
+                after = (datetime.fromisoformat(created_at), int(payment_id))
+            except (TypeError, ValueError):
+                raise HTTPException(
+                    status_code=HTTPStatus.BAD_REQUEST,
+                    detail="Некорректный курсор"
+                )
+
+        # Запрашиваем на одну строку больше, чтобы узнать, есть ли следующая страница
+        payments = await self.payment_service.get_page_by_user_id(
+            user_id=user_id, filters=filters, limit=limit + 1, after=after
+        )
+        next_cursor = None
+        if len(payments) > limit:
+            payments = payments[:limit]
+            next_cursor = encode_cursor(payments[-1].created_at, payments[-1].id)
+        return PaymentPageResponse(items=payments, next_cursor=next_cursor)
+
+    async def export_user_payments(
+            self,
+            user_id: int,
+            filters: PaymentFilterSchema,
+            export_format: ExportFormat,
+    ) -> AsyncIterator[str]:
+        """
+        Выгружает все платежи пользователя в NDJSON или CSV.
+
+        Строки читаются серверным курсором и отдаются частями, поэтому память
+        не зависит от числа платежей. Выгрузка идёт после завершения обработчика
+        запроса, поэтому использует собственную сессию.
+
+        :param user_id: ID пользователя
+        :param filters: фильтры по дате создания и счёту
+        :param export_format: формат выгрузки
+        """
+        logger.info("📤 Выгрузка платежей пользователя ID=%s в %s", user_id, export_format)
+        chunk_size = config.PAYMENTS_EXPORT_CHUNK_SIZE
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if export_format == ExportFormat.CSV:
+            writer.writerow(EXPORT_CSV_COLUMNS)
+
+        rows = 0
+        async with get_session() as session:
+            async for payment in PaymentService(session).stream_by_user_id(
+                user_id=user_id, filters=filters, chunk_size=chunk_size
+            ):
+                if export_format == ExportFormat.CSV:
+                    writer.writerow([getattr(payment, column) for column in EXPORT_CSV_COLUMNS])
+                else:
+                    buffer.write(payment.model_dump_json(by_alias=True))
+                    buffer.write("\n")
+                rows += 1
+                if rows % chunk_size == 0:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+
+        yield buffer.getvalue()
+        logger.info("✅ Выгружено %s платежей пользователя ID=%s", rows, user_id)
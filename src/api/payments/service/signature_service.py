@@ -1,10 +1,56 @@
 import hashlib
+import hmac
 import logging
+import math
+import time
+from datetime import datetime
+from pathlib import Path
+
+from src.config import config
+from src.enums.signature_algorithm import SignatureAlgorithm
+from src.helpers.metrics import registry
 from src.schemas.payment_schemas import PaymentCreateSchema
-from src.utils.utils import get_concatenate_values
+from src.schemas.signature_shemas import SignatureKeyringSchema
 
 logger = logging.getLogger(__name__)
 
+VERIFICATIONS = registry.counter(
+    "webhook_signature_verifications_total",
+    "Проверки подписи webhook по ключу, которым подпись подтверждена (none — не подошёл ни один)",
+    ["key"],
+)
+REJECTED = VERIFICATIONS.labels("none")
+
+
+def _timestamp(value: datetime | None, default: float) -> float:
+    return value.timestamp() if value is not None else default
+
+
+class SignatureKey:
+    """
+    Подготовленный ключ подписи: байты секрета, HMAC с обработанным ключом,
+    окно действия в секундах epoch и счётчик проверок этим ключом.
+    """
+
+    __slots__ = ("id", "secret", "hmac", "not_before", "not_after", "verified")
+
+    def __init__(
+            self,
+            key_id: str,
+            secret: str,
+            not_before: datetime | None = None,
+            not_after: datetime | None = None,
+    ):
+        self.id = key_id
+        self.secret = secret.encode("utf-8")
+        self.hmac = hmac.new(self.secret, digestmod=hashlib.sha256)
+        self.not_before = _timestamp(not_before, -math.inf)
+        self.not_after = _timestamp(not_after, math.inf)
+        self.verified = VERIFICATIONS.labels(key_id)
+
+    def is_active(self, now: float) -> bool:
+        return self.not_before <= now < self.not_after
+
 
 class SignatureService:
     """
@@ -12,24 +58,124 @@ class SignatureService:
 
     Подпись формируется по формуле:
     {account_id}{amount}{transaction_id}{user_id}{secret_key}
-    с последующим хэшированием через SHA-256.
+    с последующим хэшированием через SHA-256, либо как HMAC-SHA256
+    от {account_id}{amount}{transaction_id}{user_id} (WEBHOOK_SIGNATURE_ALGORITHM).
+
+    Ключи хранятся неизменяемым кортежем. Перезагрузка собирает новый кортеж
+    и подменяет ссылку одним присваиванием, поэтому проверка работает со
+    снимком ключей без блокировок. Подпись принимается, если она сделана
+    любым ключом, окно действия которого включает текущий момент.
     """
 
-    def create_signature(self, payment: PaymentCreateSchema, secret_key: str) -> str:
+    def __init__(
+            self,
+            secret_keys: list[str] | None = None,
+            algorithm: SignatureAlgorithm | None = None,
+    ):
+        """
+        :param secret_keys: активные ключи, первый — текущий; по умолчанию из
+            WEBHOOK_KEYRING_FILE, а если он не задан — из WEBHOOK_*SECRET_KEY*
+        :param algorithm: схема подписи; по умолчанию WEBHOOK_SIGNATURE_ALGORITHM
+        """
+        self.algorithm = algorithm or config.WEBHOOK_SIGNATURE_ALGORITHM
+        if secret_keys is not None:
+            self._keys = self._keys_from_secrets(secret_keys)
+        elif config.WEBHOOK_KEYRING_FILE is not None:
+            self._keys = self.load_keyring_file(config.WEBHOOK_KEYRING_FILE)
+        else:
+            self._keys = self._keys_from_secrets(config.get_webhook_secret_keys())
+
+    @staticmethod
+    def _keys_from_secrets(secret_keys: list[str]) -> tuple[SignatureKey, ...]:
+        return tuple(
+            SignatureKey("current" if index == 0 else f"previous-{index}", secret)
+            for index, secret in enumerate(secret_keys)
+        )
+
+    @staticmethod
+    def load_keyring_file(path: Path) -> tuple[SignatureKey, ...]:
         """
-        Создает цифровую подпись для объекта платежа.
+        Прочитать ключи из JSON-файла вида
+        {"keys": [{"id": "2024-10", "secret": "...", "notBefore": "...", "notAfter": "..."}]}.
+
+        :raises OSError: если файл не читается
+        :raises ValidationError: если содержимое некорректно
+        """
+        keyring = SignatureKeyringSchema.model_validate_json(Path(path).read_bytes())
+        return tuple(
+            SignatureKey(key.id, key.secret.get_secret_value(), key.not_before, key.not_after)
+            for key in keyring.keys
+        )
+
+    @property
+    def keys(self) -> tuple[SignatureKey, ...]:
+        return self._keys
+
+    def replace_keys(self, keys: tuple[SignatureKey, ...]) -> None:
+        """Атомарно заменить набор ключей; проверки в процессе доработают со старым снимком"""
+        self._keys = keys
+        logger.info("🔑 Ключи подписи webhook обновлены: %s", ", ".join(key.id for key in keys))
+
+    def reload(self, path: Path) -> None:
+        """Перечитать ключи из файла; при ошибке текущие ключи остаются в силе"""
+        self.replace_keys(self.load_keyring_file(path))
+
+    @staticmethod
+    def canonical(payment: PaymentCreateSchema) -> bytes:
+        """
+        Строка для подписи: значения полей в алфавитном порядке имён,
+        как в прежнем get_concatenate_values, но без model_dump и сортировки.
+        """
+        return (
+            f"{payment.account_id}{payment.amount}{payment.transaction_id}{payment.user_id}"
+        ).encode("utf-8")
+
+    def _digest(self, message: bytes, key: SignatureKey) -> str:
+        if self.algorithm == SignatureAlgorithm.HMAC_SHA256:
+            mac = key.hmac.copy()
+            mac.update(message)
+            return mac.hexdigest()
+        return hashlib.sha256(message + key.secret).hexdigest()
+
+    def create_signature(self, payment: PaymentCreateSchema) -> str:
+        """
+        Создает цифровую подпись платежа первым действующим ключом.
 
         :param payment: объект платежа
-        :param secret_key: секретный ключ, известный только серверу
-        :return: хэш SHA-256 в виде строки
+        :raises LookupError: если действующих ключей нет
+        :return: подпись в шестнадцатеричном виде
+        """
+        now = time.time()
+        for key in self._keys:
+            if key.is_active(now):
+                return self._digest(self.canonical(payment), key)
+        raise LookupError("Нет действующих ключей подписи")
+
+    def find_key(self, payment: PaymentCreateSchema, signature: str) -> SignatureKey | None:
+        """
+        Найти действующий ключ, которым сделана подпись.
+
+        :return: ключ или None, если подпись не подходит ни к одному
         """
-        # Объединяем значения платежа в строку и добавляем секретный ключ
-        raw_signature = get_concatenate_values(payment) + secret_key
-        logger.debug("📝 Сырая строка для подписи: %s", raw_signature)
+        keys = self._keys
+        now = time.time()
+        message = self.canonical(payment)
+        for key in keys:
+            if not key.is_active(now):
+                continue
+            try:
+                if hmac.compare_digest(self._digest(message, key), signature):
+                    key.verified.inc()
+                    return key
+            except TypeError:
+                # не-ASCII символы в подписи: заведомо не наша
+                break
+        REJECTED.inc()
+        return None
 
-        # Возвращаем SHA-256 хэш в шестнадцатеричном виде
-        signature = hashlib.sha256(raw_signature.encode("utf-8")).hexdigest()
-        logger.debug("🔑 Сформированная подпись: %s", signature)
+    def verify(self, payment: PaymentCreateSchema, signature: str) -> bool:
+        """Проверить подпись за постоянное время относительно её содержимого"""
+        return self.find_key(payment, signature) is not None
 
-        return signature
 
+signature_service = SignatureService()
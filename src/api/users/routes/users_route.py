@@ -1,15 +1,25 @@
-from fastapi import APIRouter, Depends
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
 from typing import List, Annotated
 
-from src.api.dependencies import get_user_api_service, require_roles, get_current_user
+from src.api.dependencies import get_user_api_service, require_roles, get_current_user, get_current_principal
 from src.api.users.user_request import UserCreateRequest, UserUpdateRequest
 from src.api.users.user_api_service import UserApiService
+from src.api.accounts.accounts_response import AccountResponseSchema
 from src.api.accounts.service.accounts_api_service import AccountsApiService
 from src.api.payments.service.payments_api_service import PaymentApiService
-from src.models import UserModel
+from src.api.payments.payment_responses import PaymentPageResponse
+from src.config import config
+from src.enums.count_mode import CountMode
+from src.enums.export_format import ExportFormat
 from src.enums.user_role import UserRole
-from src.schemas.user_shemas import UserReadSchema
-from src.api.users.users_response import UserResponse
+from src.helpers.responses import schema_response
+from src.schemas.auth_schemas import PrincipalSchema
+from src.schemas.payment_schemas import PaymentFilterSchema
+from src.schemas.user_shemas import UserReadSchema, UserFilterSchema
+from src.api.users.users_response import UserResponse, UserPageResponse
 from src.api.dependencies import get_account_api_service, get_payment_api_service
 
 users_router = APIRouter(
@@ -26,44 +36,102 @@ users_router = APIRouter(
     description="Возвращает информацию о текущем аутентифицированном пользователе."
 )
 async def get_me(current_user: UserReadSchema = Depends(get_current_user)):
-    return current_user
+    return schema_response(current_user)
 
 
 @users_router.get(
     "/me/accounts",
+    response_model=list[AccountResponseSchema],
     summary="Получить аккаунты текущего пользователя",
     description="Возвращает список всех аккаунтов, принадлежащих текущему пользователю."
 )
 async def get_my_accounts(
-    current_user: UserReadSchema = Depends(get_current_user),
+    current_user: PrincipalSchema = Depends(get_current_principal),
     service: AccountsApiService = Depends(get_account_api_service),
 ):
-    return await service.get_accounts_by_user_id(current_user.id)
+    accounts = await service.get_accounts_by_user_id(current_user.id)
+    return schema_response(accounts, list[AccountResponseSchema])
+
+
+def get_payment_filters(
+    created_from: datetime | None = Query(None, alias="createdFrom", description="Начало периода (включительно)"),
+    created_to: datetime | None = Query(None, alias="createdTo", description="Конец периода (не включительно)"),
+    account_id: int | None = Query(None, alias="accountId", description="Только платежи по этому счёту"),
+) -> PaymentFilterSchema:
+    return PaymentFilterSchema(created_from=created_from, created_to=created_to, account_id=account_id)
 
 
 @users_router.get(
     "/me/payments",
+    response_model=PaymentPageResponse,
     summary="Получить платежи текущего пользователя",
-    description="Возвращает все платежи, совершенные текущим пользователем."
+    description="""
+Возвращает платежи текущего пользователя от новых к старым, постранично.
+Для следующей страницы передайте `cursor` из `nextCursor` предыдущего ответа.
+    """
 )
 async def get_my_payments(
-    current_user: UserModel = Depends(get_current_user),
+    current_user: PrincipalSchema = Depends(get_current_principal),
+    filters: PaymentFilterSchema = Depends(get_payment_filters),
+    limit: int = Query(config.PAYMENTS_PAGE_DEFAULT_SIZE, ge=1, le=config.PAYMENTS_PAGE_MAX_SIZE),
+    cursor: str | None = Query(None),
     service: PaymentApiService = Depends(get_payment_api_service),
 ):
-    return await service.get_user_payments(current_user.id)
+    page = await service.get_user_payments(current_user.id, filters=filters, limit=limit, cursor=cursor)
+    return schema_response(page)
+
+
+@users_router.get(
+    "/me/payments/export",
+    response_class=StreamingResponse,
+    summary="Выгрузить платежи текущего пользователя",
+    description="Потоково выгружает все платежи текущего пользователя в NDJSON или CSV."
+)
+async def export_my_payments(
+    current_user: PrincipalSchema = Depends(get_current_principal),
+    filters: PaymentFilterSchema = Depends(get_payment_filters),
+    export_format: ExportFormat = Query(ExportFormat.NDJSON, alias="format"),
+    service: PaymentApiService = Depends(get_payment_api_service),
+):
+    media_type = "text/csv" if export_format == ExportFormat.CSV else "application/x-ndjson"
+    return StreamingResponse(
+        service.export_user_payments(current_user.id, filters=filters, export_format=export_format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="payments.{export_format}"'},
+    )
+
+
+def get_user_filters(
+    role: UserRole | None = Query(None, description="Только пользователи с этой ролью"),
+    email_prefix: str | None = Query(
+        None, alias="emailPrefix", min_length=1, max_length=255,
+        description="Начало email, без учёта регистра",
+    ),
+) -> UserFilterSchema:
+    return UserFilterSchema(role=role, email_prefix=email_prefix)
 
 
 @users_router.get(
     "/",
-    response_model=list[UserResponse],
-    summary="Список всех пользователей",
-    description="Возвращает список всех пользователей. Доступно только администраторам."
+    response_model=UserPageResponse,
+    summary="Список пользователей",
+    description="""
+Возвращает пользователей по возрастанию id, постранично. Доступно только администраторам.
+Для следующей страницы передайте `cursor` из `nextCursor` предыдущего ответа.
+`count` задаёт подсчёт `total`: `exact` — точный, `estimated` — по статистике Postgres
+(`totalIsEstimate` показывает, что число приблизительное), `none` — без подсчёта.
+    """
 )
 async def list_users(
-    _: UserModel = Depends(require_roles(UserRole.ADMIN)),
+    _: PrincipalSchema = Depends(require_roles(UserRole.ADMIN)),
+    filters: UserFilterSchema = Depends(get_user_filters),
+    limit: int = Query(config.USERS_PAGE_DEFAULT_SIZE, ge=1, le=config.USERS_PAGE_MAX_SIZE),
+    cursor: str | None = Query(None),
+    count: CountMode = Query(CountMode.ESTIMATED),
     service: UserApiService = Depends(get_user_api_service),
 ):
-    return await service.get_users()
+    page = await service.get_users(filters=filters, limit=limit, cursor=cursor, count_mode=count)
+    return schema_response(page)
 
 
 @users_router.get(
@@ -74,7 +142,7 @@ async def list_users(
 )
 async def get_user(
     user_id: int,
-    _: UserModel = Depends(require_roles(UserRole.ADMIN)),
+    _: PrincipalSchema = Depends(require_roles(UserRole.ADMIN)),
     service: UserApiService = Depends(get_user_api_service),
 ):
     return await service.get_user_by_id(user_id)
@@ -89,7 +157,7 @@ async def get_user(
 )
 async def create_user(
     body: UserCreateRequest,
-    _: Annotated[UserReadSchema, Depends(require_roles(UserRole.ADMIN))],
+    _: Annotated[PrincipalSchema, Depends(require_roles(UserRole.ADMIN))],
     service: UserApiService = Depends(get_user_api_service),
 ):
     user = await service.create_user(body.email, body.password, body.role, body.full_name)
@@ -106,7 +174,7 @@ async def create_user(
 async def update_user(
     user_id: int,
     request: UserUpdateRequest,
-    _: Annotated[UserReadSchema, Depends(require_roles(UserRole.ADMIN))],
+    _: Annotated[PrincipalSchema, Depends(require_roles(UserRole.ADMIN))],
     service: UserApiService = Depends(get_user_api_service),
 ):
     return await service.update_user(user_id, request)
@@ -119,7 +187,7 @@ async def update_user(
 )
 async def delete_user(
     user_id: int,
-    _: UserModel = Depends(require_roles(UserRole.ADMIN)),
+    _: PrincipalSchema = Depends(require_roles(UserRole.ADMIN)),
     service: UserApiService = Depends(get_user_api_service),
 ):
     await service.delete_user(user_id)
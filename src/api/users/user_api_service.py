@@ -4,12 +4,14 @@ from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.api.users.user_request import UserUpdateRequest
+from src.enums.count_mode import CountMode
 from src.enums.user_role import UserRole
-from src.schemas.user_shemas import UserUpdateSchema, UserReadSchema, UserCreateSchema
+from src.schemas.user_shemas import UserUpdateSchema, UserReadSchema, UserCreateSchema, UserFilterSchema
 from src.services.user_service import UserService
 from src.api.exceptions.user_exceptions import UserNotFoundError, UserAlreadyExistsError
-from src.utils.security import hash_password
-from src.api.users.users_response import UserResponse
+from src.utils.security import hash_password_async
+from src.api.users.users_response import UserResponse, UserPageResponse
+from src.utils.pagination import encode_cursor, decode_cursor
 
 logger = logging.getLogger(__name__)
 
@@ -27,15 +29,48 @@ class UserApiService:
         """
         self.user_service = UserService(session)
 
-    async def get_users(self) -> list[UserResponse]:
+    async def get_users(
+            self,
+            filters: UserFilterSchema,
+            limit: int,
+            cursor: str | None = None,
+            count_mode: CountMode = CountMode.ESTIMATED,
+    ) -> UserPageResponse:
         """
-        Получить список всех пользователей.
-
-        :return: список пользователей в формате UserResponse
+        Получить страницу пользователей по возрастанию id.
+
+        :param filters: фильтры по роли и префиксу email
+        :param limit: размер страницы
+        :param cursor: курсор следующей страницы из предыдущего ответа
+        :param count_mode: как считать total — точно, по оценке или не считать
+        :raises HTTPException: 400, если курсор некорректен
+        :return: пользователи, курсор следующей страницы и total
         """
-        logger.info("👀 Запрос списка всех пользователей")
-        users = await self.user_service.get()
-        return [UserResponse.model_validate(user) for user in users]
+        logger.info("👀 Запрос списка пользователей: %s", filters)
+        after_id = None
+        if cursor:
+            try:
+                (after_id,) = decode_cursor(cursor)
+                after_id = int(after_id)
+            except (TypeError, ValueError):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Некорректный курсор"
+                )
+
+        # Строки собираются сразу в UserResponse через model_construct, без валидации:
+        # колонки find_page должны уже иметь типы полей схемы
+        users = await self.user_service.get_page(
+            filters=filters, limit=limit + 1, after_id=after_id, schema=UserResponse
+        )
+        next_cursor = None
+        if len(users) > limit:
+            users = users[:limit]
+            next_cursor = encode_cursor(users[-1].id)
+        total, total_is_estimate = await self.user_service.count(filters, count_mode)
+        return UserPageResponse(
+            items=users, next_cursor=next_cursor, total=total, total_is_estimate=total_is_estimate
+        )
 
     async def get_user_by_id(self, user_id: int) -> UserReadSchema:
         """
@@ -45,15 +80,15 @@ class UserApiService:
         :return: данные пользователя в формате UserReadSchema
         :raises HTTPException: если пользователь не найден
         """
-        logger.info(f"🔍 Получение пользователя с id={user_id}")
+        logger.info("🔍 Получение пользователя с id=%s", user_id)
         user = await self.user_service.get_by_id(user_id)
         if user is None:
-            logger.warning(f"⚠️ Пользователь с id={user_id} не найден")
+            logger.warning("⚠️ Пользователь с id=%s не найден", user_id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Пользователь с id={user_id} не найден"
             )
-        logger.info(f"✅ Пользователь с id={user_id} найден")
+        logger.info("✅ Пользователь с id=%s найден", user_id)
         return user
 
     async def create_user(self, email: str, password: str, role: UserRole, full_name: str) -> UserReadSchema:
@@ -67,10 +102,10 @@ class UserApiService:
         :return: данные созданного пользователя в формате UserReadSchema
         :raises HTTPException: если пользователь с таким email уже существует
         """
-        logger.info(f"✍️ Создание пользователя с email={email}")
+        logger.info("✍️ Создание пользователя с email=%s", email)
         existing_user = await self.user_service.get_by_email(email=email)
         if existing_user:
-            logger.warning(f"⚠️ Пользователь с email={email} уже существует")
+            logger.warning("⚠️ Пользователь с email=%s уже существует", email)
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Пользователь с email={email} уже зарегистрирован"
@@ -78,12 +113,12 @@ class UserApiService:
 
         user_data = UserCreateSchema(
             email=email,
-            hashed_password=hash_password(password),
+            hashed_password=await hash_password_async(password),
             full_name=full_name,
             role=role
         )
         user = await self.user_service.create(user_data)
-        logger.info(f"🎉 Пользователь с email={email} успешно создан")
+        logger.info("🎉 Пользователь с email=%s успешно создан", email)
         return user
 
     async def update_user(self, user_id: int, request: UserUpdateRequest) -> UserReadSchema:
@@ -95,10 +130,10 @@ class UserApiService:
         :return: обновленные данные пользователя в формате UserReadSchema
         :raises HTTPException: если пользователь не найден
         """
-        logger.info(f"✏️ Обновление пользователя с id={user_id}")
+        logger.info("✏️ Обновление пользователя с id=%s", user_id)
         user = await self.user_service.get_by_id(user_id)
         if user is None:
-            logger.warning(f"⚠️ Попытка обновить несуществующего пользователя id={user_id}")
+            logger.warning("⚠️ Попытка обновить несуществующего пользователя id=%s", user_id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Пользователь не найден"
@@ -106,7 +141,7 @@ class UserApiService:
 
         updated_data = UserUpdateSchema.model_validate(request)
         user = await self.user_service.update(user_id, updated_data)
-        logger.info(f"✅ Пользователь с id={user_id} успешно обновлен")
+        logger.info("✅ Пользователь с id=%s успешно обновлен", user_id)
         return user
 
     async def delete_user(self, user_id: int) -> None:
@@ -117,12 +152,12 @@ class UserApiService:
         :return: None
         :raises HTTPException: если пользователь не найден
         """
-        logger.info(f"🗑️ Удаление пользователя с id={user_id}")
+        logger.info("🗑️ Удаление пользователя с id=%s", user_id)
         try:
             await self.user_service.delete(user_id)
-            logger.info(f"✅ Пользователь с id={user_id} успешно удален")
+            logger.info("✅ Пользователь с id=%s успешно удален", user_id)
         except UserNotFoundError:
-            logger.warning(f"⚠️ Попытка удалить несуществующего пользователя id={user_id}")
+            logger.warning("⚠️ Попытка удалить несуществующего пользователя id=%s", user_id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Пользователь не найден"
@@ -12,3 +12,14 @@ class UserResponse(BaseModel):
     model_config = ConfigDict(
         from_attributes=True, populate_by_name=True, alias_generator=to_camel
     )
+
+
+class UserPageResponse(BaseModel):
+    items: list[UserResponse]
+    next_cursor: str | None
+    # None, если подсчёт отключён (count=none)
+    total: int | None = None
+    total_is_estimate: bool = False
+    model_config = ConfigDict(
+        from_attributes=True, populate_by_name=True, alias_generator=to_camel
+    )
@@ -1,6 +1,11 @@
 from pathlib import Path
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+from src.enums.balance_mode import BalanceMode
+from src.enums.signature_algorithm import SignatureAlgorithm
+
 PRODUCTION = False
 ENV_FILE_NAME = ".env" if PRODUCTION else ".dev.env"
 
@@ -14,13 +19,114 @@ class Config(BaseSettings):
     POSTGRES_PASSWORD: str
     POSTGRES_HOST: str
     POSTGRES_PORT: str
+    # SQLAlchemy engine и пул соединений
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = False
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    DB_APPLICATION_NAME: str = "tz-dimatech"
+    DB_JIT: bool = False
+    # сколько соединений открыть при старте приложения
+    DB_WARMUP_CONNECTIONS: int = 0
+    # max_connections сервера PostgreSQL и сколько из них оставить миграциям и администрированию:
+    # src.server урезает пул каждого воркера, чтобы воркеры × (pool_size + max_overflow) помещались в остаток
+    DB_MAX_CONNECTIONS: int = 100
+    DB_RESERVED_CONNECTIONS: int = 10
+    # запросы дольше порога пишутся в лог (0 — не писать) с заданной долей выборки
+    DB_SLOW_QUERY_THRESHOLD_MS: float = 200
+    DB_SLOW_QUERY_SAMPLE_RATE: float = 1.0
+    # заголовок Server-Timing с числом и временем SQL-запросов в ответах
+    SERVER_TIMING_ENABLED: bool = True
+    # продакшен-запуск (python -m src.server); SERVER_WORKERS=0 — по числу доступных CPU
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int = 0
+    SERVER_BACKLOG: int = 2048
+    SERVER_KEEP_ALIVE_SECONDS: int = 5
+    # максимум одновременных соединений и запросов на воркер, сверх — 503; None — без ограничения
+    SERVER_LIMIT_CONCURRENCY: int | None = None
+    # сколько ждать завершения начатых запросов (в том числе webhook) при остановке
+    SERVER_GRACEFUL_SHUTDOWN_SECONDS: int = 30
+    # каталог снимков метрик воркеров: /metrics любого воркера отдаёт сумму по всем.
+    # python -m src.server с несколькими воркерами создаёт временный каталог сам
+    METRICS_MULTIPROCESS_DIR: Path | None = None
+    METRICS_SNAPSHOT_INTERVAL_SECONDS: float = 5.0
+    # логирование: JSON или текст, вывод из отдельного потока через очередь
+    LOG_LEVEL: str = "INFO"
+    LOG_JSON: bool = True
+    LOG_QUEUE_SIZE: int = 10000
+    # доля INFO-записей, попадающих в лог, по префиксу имени логгера, например
+    # {"src.api.payments.service.payments_api_service": 0.01}
+    LOG_SAMPLING: dict[str, float] = {}
+    # поля, значения которых маскируются в сообщениях
+    LOG_REDACT_FIELDS: list[str] = [
+        "signature", "password", "hashed_password", "secret", "secret_key",
+        "access_token", "refresh_token", "authorization",
+    ]
     # JWT
     JWT_ALGORITHM: str
     JWT_SECRET_KEY: str
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
     JWT_REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    # stateless-режим: роль берётся из токена без запроса к users, access-токен живёт недолго
+    AUTH_STATELESS: bool = False
+    JWT_STATELESS_ACCESS_TOKEN_EXPIRE_MINUTES: int = 5
+    # кэш users.token_version; TTL — сколько другие процессы принимают отозванные токены
+    TOKEN_VERSION_CACHE_TTL_SECONDS: float = 5
+    # пул для bcrypt: "thread" или "process"
+    PASSWORD_HASH_EXECUTOR: Literal["thread", "process"] = "thread"
+    PASSWORD_HASH_WORKERS: int = 4
+    # первая схема — для новых хэшей, остальные устаревшие и перехэшируются при входе
+    PASSWORD_HASH_SCHEMES: list[str] = ["bcrypt"]
+    PASSWORD_BCRYPT_ROUNDS: int = 12
+    PASSWORD_ARGON2_TIME_COST: int = 3
+    PASSWORD_ARGON2_MEMORY_COST: int = 65536
+    PASSWORD_ARGON2_PARALLELISM: int = 4
+    # кэш пользователей для get_current_user; TTL — граница устаревания роли в других процессах
+    USER_CACHE_MAX_SIZE: int = 10000
+    USER_CACHE_TTL_SECONDS: float = 30
+    # список пользователей для администраторов
+    USERS_PAGE_DEFAULT_SIZE: int = 50
+    USERS_PAGE_MAX_SIZE: int = 500
+    # до этого порога total с фильтрами считается точно, выше — по оценке планировщика
+    USERS_COUNT_EXACT_LIMIT: int = 10000
     # payment webhooks
     WEBHOOK_SECRET_KEY: str
+    # при ротации: прежние ключи, подписи которыми ещё принимаются
+    WEBHOOK_PREVIOUS_SECRET_KEYS: list[str] = []
+    WEBHOOK_SIGNATURE_ALGORITHM: SignatureAlgorithm = SignatureAlgorithm.SHA256
+    # JSON-файл с ключами и окнами их действия; если задан, заменяет ключи выше
+    # и перечитывается по SIGHUP и при изменении (проверка раз в интервал, 0 — только SIGHUP)
+    WEBHOOK_KEYRING_FILE: Path | None = None
+    WEBHOOK_KEYRING_POLL_INTERVAL_SECONDS: float = 5.0
+    WEBHOOK_BATCH_MAX_SIZE: int = 10000
+    # отпечатки недавних transaction_id в памяти процесса: повтор webhook разрешается без обращения к БД —
+    # тот же платёж получает 200, другой платёж с тем же transaction_id — 409
+    RECENT_TRANSACTIONS_MAX_SIZE: int = 100000
+    RECENT_TRANSACTIONS_TTL_SECONDS: float = 86400
+    # сколько последних платежей загрузить в память при старте
+    RECENT_TRANSACTIONS_WARMUP: int = 100000
+    # история платежей
+    PAYMENTS_PAGE_DEFAULT_SIZE: int = 50
+    PAYMENTS_PAGE_MAX_SIZE: int = 500
+    PAYMENTS_EXPORT_CHUNK_SIZE: int = 1000
+    # режим «подтвердить, затем обработать»: webhook кладётся в webhook_inbox и сразу получает 202
+    WEBHOOK_ACK_MODE: bool = False
+    WEBHOOK_WORKERS: int = 4
+    WEBHOOK_WORKER_BATCH_SIZE: int = 100
+    WEBHOOK_WORKER_POLL_INTERVAL_SECONDS: float = 0.5
+    WEBHOOK_INBOX_VISIBILITY_TIMEOUT_SECONDS: int = 30
+    WEBHOOK_INBOX_MAX_ATTEMPTS: int = 10
+    # учёт балансов: in_place — UPDATE счёта на каждый платеж,
+    # ledger — платеж пишет дельту, фоновая задача сворачивает дельты в accounts.balance
+    BALANCE_MODE: BalanceMode = BalanceMode.IN_PLACE
+    BALANCE_COMPACTION_INTERVAL_SECONDS: float = 1.0
+    BALANCE_COMPACTION_BATCH_SIZE: int = 10000
+    # число подстрок баланса на счёт в режиме sharded
+    BALANCE_SHARDS: int = 16
 
     #test data
     DEFAULT_ADMIN_EMAIL: str
@@ -34,6 +140,20 @@ class Config(BaseSettings):
 
     model_config = SettingsConfigDict(env_file=str(ENV_FILE), env_file_encoding="utf-8")
 
+    def get_access_token_expire_minutes(self) -> int:
+        if self.AUTH_STATELESS:
+            return self.JWT_STATELESS_ACCESS_TOKEN_EXPIRE_MINUTES
+        return self.JWT_ACCESS_TOKEN_EXPIRE_MINUTES
+
+    def get_webhook_secret_keys(self) -> list[str]:
+        return [self.WEBHOOK_SECRET_KEY, *self.WEBHOOK_PREVIOUS_SECRET_KEYS]
+
+    def get_db_server_settings(self) -> dict[str, str]:
+        return {
+            "application_name": self.DB_APPLICATION_NAME,
+            "jit": "on" if self.DB_JIT else "off",
+        }
+
     def get_async_postgres_url_connection(self) -> str:
         return (
             f"postgresql+asyncpg://"
@@ -0,0 +1,9 @@
+from enum import StrEnum
+
+class BalanceMode(StrEnum):
+    # UPDATE accounts SET balance = balance + x на каждый платеж
+    IN_PLACE = "in_place"
+    # платеж добавляет строку в account_balance_deltas, баланс сворачивается фоновой задачей
+    LEDGER = "ledger"
+    # дельта прибавляется к одной из BALANCE_SHARDS подстрок счёта, баланс = сумма подстрок
+    SHARDED = "sharded"
@@ -0,0 +1,6 @@
+from enum import StrEnum
+
+class CountMode(StrEnum):
+    EXACT = "exact"
+    ESTIMATED = "estimated"
+    NONE = "none"
@@ -0,0 +1,5 @@
+from enum import StrEnum
+
+class ExportFormat(StrEnum):
+    NDJSON = "ndjson"
+    CSV = "csv"
@@ -0,0 +1,9 @@
+from enum import StrEnum
+
+class PaymentStatus(StrEnum):
+    ACCEPTED = "accepted"
+    DUPLICATE = "duplicate"
+    CONFLICT = "conflict"
+    INVALID = "invalid"
+    INVALID_SIGNATURE = "invalid_signature"
+    ACCOUNT_MISMATCH = "account_mismatch"
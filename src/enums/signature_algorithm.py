@@ -0,0 +1,7 @@
+from enum import StrEnum
+
+class SignatureAlgorithm(StrEnum):
+    # sha256(значения платежа + секрет) — исходная схема провайдера
+    SHA256 = "sha256"
+    # HMAC-SHA256(секрет, значения платежа)
+    HMAC_SHA256 = "hmac-sha256"
@@ -0,0 +1,12 @@
+from enum import StrEnum
+
+
+class WebhookOutcome(StrEnum):
+    """Исход обработки webhook-платежа для метрик"""
+    ACCEPTED = "accepted"
+    QUEUED = "queued"
+    DUPLICATE = "duplicate"
+    CONFLICT = "conflict"
+    INVALID = "invalid"
+    INVALID_SIGNATURE = "invalid_signature"
+    ACCOUNT_MISMATCH = "account_mismatch"
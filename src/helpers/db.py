@@ -1,3 +1,7 @@
+import asyncio
+import logging
+import time
+
 from sqlalchemy.ext.asyncio import (
     create_async_engine,
     async_sessionmaker,
@@ -5,9 +9,47 @@ from sqlalchemy.ext.asyncio import (
     AsyncEngine,
 
 )
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from typing import AsyncGenerator
 from contextlib import asynccontextmanager
 
+from src.helpers.metrics import registry
+from src.helpers.sql_instrumentation import QueryInstrumentation
+from src.schemas.pool_schemas import PoolStatsSchema
+
+logger = logging.getLogger(__name__)
+
+POOL_WAIT = registry.histogram(
+    "db_pool_wait_seconds",
+    "Время ожидания соединения из пула",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0),
+)
+POOL_SIZE = registry.gauge("db_pool_size", "Размер пула соединений")
+POOL_CHECKED_OUT = registry.gauge("db_pool_checked_out", "Соединения, выданные из пула")
+POOL_CHECKED_IN = registry.gauge("db_pool_checked_in", "Свободные соединения в пуле")
+POOL_OVERFLOW = registry.gauge("db_pool_overflow", "Соединения сверх pool_size")
+
+
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """Пул соединений, замеряющий ожидание выдачи соединения"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_count = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - started
+            self.wait_count += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+            POOL_WAIT.observe(waited)
+
 
 class SessionManagerHelper:
     def __init__(
@@ -15,17 +57,81 @@ class SessionManagerHelper:
             url: str,
             echo: bool = False,
             expire_on_commit: bool = False,
-
-
+            pool_size: int = 5,
+            max_overflow: int = 10,
+            pool_timeout: float = 30,
+            pool_recycle: int = -1,
+            pool_pre_ping: bool = False,
+            statement_cache_size: int = 100,
+            server_settings: dict[str, str] | None = None,
+            slow_query_threshold: float = 0,
+            slow_query_sample_rate: float = 1.0,
     ):
         self.engine: AsyncEngine = create_async_engine(
             url,
-            echo=echo
+            echo=echo,
+            poolclass=TimedAsyncQueuePool,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=pool_timeout,
+            pool_recycle=pool_recycle,
+            pool_pre_ping=pool_pre_ping,
+            connect_args={
+                # кэш подготовленных выражений asyncpg и адаптера SQLAlchemy
+                "statement_cache_size": statement_cache_size,
+                "prepared_statement_cache_size": statement_cache_size,
+                "server_settings": server_settings or {},
+            },
         )
         self.session_factory: async_sessionmaker[AsyncSession] = async_sessionmaker(
             bind=self.engine,
             expire_on_commit=expire_on_commit
         )
+        self.query_instrumentation = QueryInstrumentation(slow_query_threshold, slow_query_sample_rate)
+        self.query_instrumentation.attach(self.engine)
+        registry.add_collector(self.refresh_metrics)
+
+    def pool_stats(self) -> PoolStatsSchema:
+        pool: TimedAsyncQueuePool = self.engine.pool
+        return PoolStatsSchema(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+            wait_count=pool.wait_count,
+            wait_seconds_total=pool.wait_seconds_total,
+            wait_seconds_max=pool.wait_seconds_max,
+        )
+
+    async def refresh_metrics(self) -> None:
+        stats = self.pool_stats()
+        POOL_SIZE.set(stats.size)
+        POOL_CHECKED_OUT.set(stats.checked_out)
+        POOL_CHECKED_IN.set(stats.checked_in)
+        POOL_OVERFLOW.set(stats.overflow)
+
+    async def warmup(self, connections: int) -> None:
+        """
+        Заранее открыть соединения, чтобы первые запросы после старта
+        не платили за установку соединения.
+
+        :param connections: сколько соединений открыть (не больше pool_size)
+        """
+        connections = min(connections, self.engine.pool.size())
+        if connections <= 0:
+            return
+
+        started = time.perf_counter()
+        opened = [self.engine.connect() for _ in range(connections)]
+        try:
+            await asyncio.gather(*(connection.start() for connection in opened))
+            await asyncio.gather(*(connection.exec_driver_sql("SELECT 1") for connection in opened))
+        finally:
+            await asyncio.gather(*(connection.close() for connection in opened), return_exceptions=True)
+        logger.info("🔥 Прогрето %s соединений с БД за %.3f с", connections, time.perf_counter() - started)
+
+    async def dispose(self) -> None:
+        await self.engine.dispose()
 
     @asynccontextmanager
     async def _get_session(self) -> AsyncGenerator[AsyncSession, None]:
@@ -42,4 +148,4 @@ class SessionManagerHelper:
     @asynccontextmanager
     async def get_async_session(self) -> AsyncGenerator[AsyncSession, None]:
         async with self._get_session() as session:
-            yield session
\ No newline at end of file
+            yield session
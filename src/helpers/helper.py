@@ -1,3 +1,5 @@
+from fastapi import Depends
+
 from src.api.auth.services.auth_api_service import AuthAPIService
 from src.api.auth.services.jwt_service import JWTService
 from src.config import config
@@ -7,7 +9,17 @@ from typing import AsyncGenerator
 from sqlalchemy.ext.asyncio import  AsyncSession
 
 session_manager = SessionManagerHelper(
-    url=config.get_async_postgres_url_connection()
+    url=config.get_async_postgres_url_connection(),
+    echo=config.DB_ECHO,
+    pool_size=config.DB_POOL_SIZE,
+    max_overflow=config.DB_MAX_OVERFLOW,
+    pool_timeout=config.DB_POOL_TIMEOUT_SECONDS,
+    pool_recycle=config.DB_POOL_RECYCLE_SECONDS,
+    pool_pre_ping=config.DB_POOL_PRE_PING,
+    statement_cache_size=config.DB_STATEMENT_CACHE_SIZE,
+    server_settings=config.get_db_server_settings(),
+    slow_query_threshold=config.DB_SLOW_QUERY_THRESHOLD_MS / 1000,
+    slow_query_sample_rate=config.DB_SLOW_QUERY_SAMPLE_RATE,
 )
 
 @asynccontextmanager
@@ -15,8 +27,15 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
     async with session_manager.get_async_session() as session:
         yield session
 
-async def get_auth_service() -> AuthAPIService:
-    async with get_session() as session:
-        return AuthAPIService(session)
+async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Сессия на время запроса. FastAPI кэширует зависимость в пределах запроса,
+    поэтому все сервисы одного запроса работают через одну сессию.
+    """
+    async with session_manager.get_async_session() as session:
+        yield session
+
+async def get_auth_service(session: AsyncSession = Depends(get_db_session)) -> AuthAPIService:
+    return AuthAPIService(session)
 def get_jwt_service() -> JWTService:
     return JWTService()
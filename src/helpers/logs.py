@@ -0,0 +1,234 @@
+"""
+Настройка логирования приложения.
+
+Записи из event loop только кладутся в ограниченную очередь (LazyQueueHandler),
+а форматирование, маскирование секретов и вывод выполняет поток QueueListener.
+Сообщения форматируются лениво — в потоке вывода, а не в месте вызова logger.info.
+Частые INFO-события отдельных логгеров можно прореживать (LOG_SAMPLING).
+"""
+import atexit
+import json
+import logging
+import queue
+import random
+import re
+import sys
+from collections.abc import Iterable
+from datetime import datetime, date, UTC
+from decimal import Decimal
+from enum import Enum
+from logging.handlers import QueueHandler, QueueListener
+from uuid import UUID
+
+from src.helpers.metrics import registry
+
+try:
+    import orjson
+except ImportError:  # orjson необязателен: без него остаётся стандартный json
+    orjson = None
+
+DROPPED = registry.counter(
+    "log_records_dropped_total", "Записи лога, отброшенные до вывода", ["reason"]
+)
+DROPPED_SAMPLED = DROPPED.labels("sampled")
+DROPPED_QUEUE_FULL = DROPPED.labels("queue_full")
+
+# Аргументы этих типов неизменяемы и безопасны для форматирования в другом потоке;
+# прочие (ORM-объекты, изменяемые модели) форматируются сразу, в месте вызова
+_SAFE_ARG_TYPES = (str, int, float, bool, Decimal, UUID, datetime, date, Enum, type(None))
+
+# Стандартные атрибуты LogRecord: всё остальное пришло через extra и попадает в JSON
+# (color_message — копия сообщения с ANSI-цветами, которую добавляет uvicorn)
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {
+    "message", "asctime", "color_message",
+}
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+
+class SecretRedactor:
+    """
+    Маскирует значения полей с секретами: key=value, key='value', "key": "value",
+    Bearer-токены; значение в кавычках маскируется целиком, до парной кавычки.
+    """
+
+    def __init__(self, fields: Iterable[str]):
+        self.fields = frozenset(name.lower() for name in fields)
+        names = "|".join(re.escape(name) for name in sorted(self.fields))
+        # значение: строка в кавычках с экранированием внутри или слово без кавычек
+        self._field = re.compile(
+            rf"""(?i)(["']?\b(?:{names})\b["']?\s*[:=]\s*)"""
+            rf"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|["']?[^"',\s)}}]+)"""
+            if names else r"(?!)"
+        )
+        self._bearer = re.compile(r"(?i)(bearer\s+)[\w\-.~+/]+=*")
+
+    @staticmethod
+    def _mask(match: re.Match) -> str:
+        prefix, value = match.groups()
+        quote = value[0] if value[0] in "\"'" else ""
+        closing = quote if len(value) > 1 and value.endswith(quote) else ""
+        return f"{prefix}{quote}***{closing}"
+
+    def __call__(self, text: str) -> str:
+        # сначала токены: иначе поле authorization замаскирует только слово Bearer
+        return self._field.sub(self._mask, self._bearer.sub(r"\1***", text))
+
+    def redact_extra(self, key: str, value):
+        """Значение поля extra: целиком под маской, если это секретное поле, строки — как текст"""
+        if key.lower() in self.fields:
+            return "***"
+        if isinstance(value, str):
+            return self(value)
+        return value
+
+
+class RedactingFilter(logging.Filter):
+    """Подставляет аргументы в сообщение и маскирует секреты; работает в потоке вывода"""
+
+    def __init__(self, redactor: SecretRedactor):
+        super().__init__()
+        self.redactor = redactor
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.msg = self.redactor(record.getMessage())
+        record.args = None
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Пропускает долю rate записей уровня INFO и ниже для логгеров из rates
+    (по самому длинному совпавшему префиксу имени); WARNING и выше проходят всегда.
+    """
+
+    def __init__(self, rates: dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self._resolved: dict[str, float] = {}
+
+    def _rate(self, name: str) -> float:
+        rate = self._resolved.get(name)
+        if rate is None:
+            prefixes = [p for p in self.rates if name == p or name.startswith(p + ".")]
+            rate = self._resolved[name] = self.rates[max(prefixes, key=len)] if prefixes else 1.0
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO:
+            return True
+        rate = self._rate(record.name)
+        if rate >= 1.0 or random.random() < rate:
+            return True
+        DROPPED_SAMPLED.inc()
+        return False
+
+
+class LazyQueueHandler(QueueHandler):
+    """
+    QueueHandler без форматирования в месте вызова.
+
+    Стандартный prepare() форматирует сообщение до постановки в очередь, то есть
+    в event loop; здесь запись уходит в очередь как есть, если её аргументы
+    неизменяемы. При переполненной очереди запись отбрасывается, а не блокирует loop.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        args = record.args
+        if args and not all(isinstance(arg, _SAFE_ARG_TYPES) for arg in (
+            args.values() if isinstance(args, dict) else args
+        )):
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DROPPED_QUEUE_FULL.inc()
+
+
+def _json_default(value):
+    return str(value)
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна JSON-строка на запись: время, уровень, логгер, сообщение, исключение и поля extra"""
+
+    def __init__(self, redactor: SecretRedactor | None = None):
+        """
+        :param redactor: маскирование полей extra; сообщение маскирует RedactingFilter
+        """
+        super().__init__()
+        self.redactor = redactor
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "time": datetime.fromtimestamp(record.created, UTC).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                payload[key] = self.redactor.redact_extra(key, value) if self.redactor else value
+        if orjson is not None:
+            return orjson.dumps(payload, default=_json_default).decode()
+        return json.dumps(payload, ensure_ascii=False, default=_json_default)
+
+
+_listener: QueueListener | None = None
+
+
+def configure_logging(
+        level: str = "INFO",
+        json_format: bool = True,
+        sampling: dict[str, float] | None = None,
+        redact_fields: Iterable[str] = (),
+        queue_size: int = 10000,
+) -> QueueListener:
+    """
+    Перенастроить корневой логгер: очередь в event loop, вывод в stderr из потока.
+    Повторный вызов останавливает прежний поток вывода и заменяет обработчики.
+
+    :param sampling: доля пропускаемых INFO-записей по префиксу имени логгера
+    :param redact_fields: имена полей, значения которых маскируются
+    :param queue_size: размер очереди; при переполнении записи отбрасываются
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+
+    redactor = SecretRedactor(redact_fields)
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(JsonFormatter(redactor) if json_format else logging.Formatter(TEXT_FORMAT))
+    output.addFilter(RedactingFilter(redactor))
+
+    records: queue.Queue = queue.Queue(maxsize=queue_size)
+    handler = LazyQueueHandler(records)
+    if sampling:
+        handler.addFilter(SamplingFilter(sampling))
+
+    root = logging.getLogger()
+    for old in root.handlers[:]:
+        root.removeHandler(old)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    _listener = QueueListener(records, output, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging() -> None:
+    """Дописать оставшиеся записи и остановить поток вывода"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
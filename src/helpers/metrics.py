@@ -0,0 +1,331 @@
+"""
+Минимальный реестр метрик в формате Prometheus.
+
+Дочерние метрики с метками создаются один раз через labels(...) и
+сохраняются вызывающим кодом, поэтому горячий путь (inc/observe)
+не создаёт словарей меток и не ищет их по имени.
+
+При нескольких процессах (python -m src.server) каждый воркер держит свои
+значения и периодически сбрасывает их снимком в общий каталог
+(enable_multiprocess). Воркер, ответивший на /metrics, суммирует снимки всех
+воркеров, так что счётчики и гистограммы описывают весь сервер целиком.
+"""
+import json
+import os
+from bisect import bisect_left
+from collections.abc import Awaitable, Callable, Iterable
+from pathlib import Path
+from typing import Literal
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def state(self) -> float:
+        return self.value
+
+    def merge(self, state: float) -> None:
+        self.value += state
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: tuple[float, ...]) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def state(self) -> list:
+        return [self.counts, self.sum]
+
+    def merge(self, state: list) -> None:
+        counts, total = state
+        # снимок с другими границами (другая версия кода) не складывается
+        if len(counts) == len(self.counts):
+            self.counts = [a + b for a, b in zip(self.counts, counts)]
+            self.sum += total
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], object] = {}
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: object):
+        """Вернуть дочернюю метрику для значений меток (в порядке labelnames)"""
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name}: ожидались метки {self.labelnames}")
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children[key] = self._new_child()
+        return child
+
+    def snapshot(self) -> list:
+        """Значения дочерних метрик для снимка процесса: [[значения меток, состояние], ...]"""
+        return [[list(key), child.state()] for key, child in self._children.items()]
+
+    def _render_samples(self, children: dict[tuple[str, ...], object]) -> list[str]:
+        raise NotImplementedError
+
+    def render(self, children: dict[tuple[str, ...], object] | None = None) -> str:
+        """
+        :param children: дочерние метрики вместо собственных, например сумма снимков воркеров
+        """
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self._render_samples(self._children if children is None else children))
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default.inc(amount)
+
+    def _render_samples(self, children: dict[tuple[str, ...], object]) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+            for key, child in children.items()
+        ]
+
+
+class Gauge(Counter):
+    type_name = "gauge"
+
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            labelnames: Iterable[str] = (),
+            multiprocess_mode: Literal["sum", "local"] = "sum",
+    ) -> None:
+        """
+        :param multiprocess_mode: sum — сумма по живым воркерам (например, соединения пулов),
+            local — значение отвечающего процесса (общие для всех величины, например из БД)
+        """
+        self.multiprocess_mode = multiprocess_mode
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._default.dec(amount)
+
+    def set(self, value: float) -> None:
+        self._default.set(value)
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            labelnames: Iterable[str] = (),
+            buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.bounds = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.bounds)
+
+    def observe(self, value: float) -> None:
+        self._default.observe(value)
+
+    def _render_samples(self, children: dict[tuple[str, ...], object]) -> list[str]:
+        lines = []
+        for key, child in children.items():
+            cumulative = 0
+            for bound, count in zip(self.bounds + (float("inf"),), child.counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+def _is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+        self._collectors: list[Callable[[], Awaitable[None]]] = []
+        self._shared_collectors: list[Callable[[], Awaitable[None]]] = []
+        self._directory: Path | None = None
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Метрика {metric.name} уже зарегистрирована")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(
+            self,
+            name: str,
+            documentation: str,
+            labelnames: Iterable[str] = (),
+            multiprocess_mode: Literal["sum", "local"] = "sum",
+    ) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames, multiprocess_mode))
+
+    def histogram(
+            self,
+            name: str,
+            documentation: str,
+            labelnames: Iterable[str] = (),
+            buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], Awaitable[None]], shared: bool = False) -> None:
+        """
+        Добавить корутину, обновляющую метрики перед каждым сбором.
+
+        :param shared: метрики общие для всех процессов (например, из БД) — при нескольких
+            воркерах их обновляет только процесс, отвечающий на /metrics, а не каждый снимок
+        """
+        (self._shared_collectors if shared else self._collectors).append(collector)
+
+    def remove_collector(self, collector: Callable[[], Awaitable[None]]) -> None:
+        for collectors in (self._collectors, self._shared_collectors):
+            if collector in collectors:
+                collectors.remove(collector)
+
+    async def collect(self, shared: bool = True) -> None:
+        """
+        :param shared: обновить и общие метрики (перед ответом на /metrics)
+        """
+        for collector in self._collectors:
+            await collector()
+        if shared:
+            for collector in self._shared_collectors:
+                await collector()
+
+    def enable_multiprocess(self, directory: Path) -> None:
+        """Сбрасывать снимки в directory и отдавать сумму снимков всех процессов"""
+        directory.mkdir(parents=True, exist_ok=True)
+        self._directory = directory
+
+    def write_snapshot(self) -> None:
+        """Записать значения процесса в <directory>/<pid>.json (атомарно, через переименование)"""
+        if self._directory is None:
+            return
+        snapshot = {name: metric.snapshot() for name, metric in self._metrics.items()}
+        path = self._directory / f"{os.getpid()}.json"
+        temporary = path.with_name(f".{path.name}.tmp")
+        temporary.write_text(json.dumps(snapshot))
+        os.replace(temporary, path)
+
+    def _read_snapshots(self) -> dict[int, dict]:
+        snapshots = {}
+        for path in self._directory.glob("*.json"):
+            try:
+                snapshots[int(path.stem)] = json.loads(path.read_text())
+            except (OSError, ValueError):
+                # файл удалили между glob и чтением
+                continue
+        return snapshots
+
+    def _render_merged(self) -> str:
+        # свой снимок пишется перед чтением: все процессы читаются из файлов, значения
+        # в которых только растут, поэтому сумма счётчиков между сборами не убывает
+        self.write_snapshot()
+        snapshots = self._read_snapshots()
+        pid = os.getpid()
+        alive = {other for other in snapshots if other == pid or _is_alive(other)}
+        parts = []
+        for metric in self._metrics.values():
+            gauge_mode = metric.multiprocess_mode if isinstance(metric, Gauge) else None
+            if gauge_mode == "local":
+                parts.append(metric.render())
+                continue
+            children: dict[tuple[str, ...], object] = {}
+            for other, snapshot in snapshots.items():
+                # счётчики завершившихся воркеров остаются в сумме, их текущие значения — нет
+                if gauge_mode == "sum" and other not in alive:
+                    continue
+                for key, state in snapshot.get(metric.name, ()):
+                    key = tuple(key)
+                    child = children.get(key)
+                    if child is None:
+                        child = children[key] = metric._new_child()
+                    child.merge(state)
+            parts.append(metric.render(children))
+        return "\n".join(parts) + "\n"
+
+    def render(self) -> str:
+        if self._directory is not None:
+            return self._render_merged()
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+registry = MetricsRegistry()
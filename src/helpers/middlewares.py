@@ -0,0 +1,72 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.helpers.metrics import registry
+from src.helpers.sql_instrumentation import QueryStats, current_query_stats
+
+REQUEST_QUERIES = registry.histogram(
+    "http_request_db_queries",
+    "Число SQL-запросов на HTTP-запрос",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100),
+)
+REQUEST_DB_DURATION = registry.histogram(
+    "http_request_db_duration_seconds",
+    "Суммарное время SQL-запросов на HTTP-запрос",
+    ["route"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+)
+
+
+class QueryTimingMiddleware:
+    """
+    Чистый ASGI-middleware: заводит QueryStats на запрос, добавляет в ответ
+    Server-Timing (db — время и число SQL-запросов, app — всё время до начала ответа)
+    и пишет итоги запроса в метрики с меткой шаблона маршрута.
+    """
+
+    def __init__(self, app: ASGIApp, server_timing: bool = True):
+        """
+        :param server_timing: добавлять ли заголовок Server-Timing в ответы
+        """
+        self.app = app
+        self.server_timing = server_timing
+        # шаблон маршрута -> дочерние гистограммы, чтобы не собирать метки на каждый запрос
+        self._routes: dict[str, tuple[object, object]] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = current_query_stats.set(stats)
+        started = time.perf_counter()
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                elapsed = time.perf_counter() - started
+                value = (
+                    f'db;dur={stats.duration * 1000:.2f};desc="{stats.count} queries", '
+                    f"app;dur={elapsed * 1000:.2f}"
+                )
+                message["headers"] = [*message.get("headers", ()), (b"server-timing", value.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing if self.server_timing else send)
+        finally:
+            current_query_stats.reset(token)
+            self._observe(scope, stats)
+
+    def _observe(self, scope: Scope, stats: QueryStats) -> None:
+        # маршрут FastAPI кладёт в scope при сопоставлении; без него (404) — общая метка
+        route = scope.get("route")
+        path = getattr(route, "path", None) or "unmatched"
+        children = self._routes.get(path)
+        if children is None:
+            children = self._routes[path] = (REQUEST_QUERIES.labels(path), REQUEST_DB_DURATION.labels(path))
+        queries, duration = children
+        queries.observe(stats.count)
+        duration.observe(stats.duration)
@@ -0,0 +1,43 @@
+import functools
+from typing import Any
+
+from fastapi.responses import JSONResponse, Response
+from pydantic import TypeAdapter
+
+try:
+    import orjson
+except ImportError:  # orjson необязателен: без него остаётся стандартный json
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse, который рендерит через orjson, если пакет установлен"""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+@functools.cache
+def get_type_adapter(schema: Any) -> TypeAdapter:
+    """TypeAdapter строится один раз на схему: сборка сериализатора дороже самой сериализации"""
+    return TypeAdapter(schema)
+
+
+def schema_response(content: Any, schema: Any = None, status_code: int = 200) -> Response:
+    """
+    Ответ из уже собранной схемы без повторной валидации по response_model.
+
+    FastAPI не трогает возвращённый Response, поэтому объект сериализуется один раз
+    сериализатором pydantic-core, с алиасами, как при обычном ответе.
+
+    :param content: схема ответа или список схем
+    :param schema: тип для сериализации, обязателен для списков, например list[AccountResponseSchema]
+    """
+    adapter = get_type_adapter(schema if schema is not None else type(content))
+    return Response(
+        content=adapter.dump_json(content, by_alias=True),
+        status_code=status_code,
+        media_type="application/json",
+    )
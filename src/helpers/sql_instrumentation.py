@@ -0,0 +1,129 @@
+"""
+Учёт SQL-запросов: число и время выполнения по нормализованному тексту запроса
+и итог по текущему HTTP-запросу.
+
+Слушатели курсора движка пишут время каждого запроса в гистограмму
+db_query_duration_seconds{statement} и в QueryStats текущего запроса
+(contextvar, его выставляет QueryTimingMiddleware). Медленные запросы
+логируются с заданной долей выборки.
+"""
+import logging
+import random
+import re
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.helpers.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+QUERY_DURATION = registry.histogram(
+    "db_query_duration_seconds",
+    "Время выполнения SQL-запроса по нормализованному тексту",
+    ["statement"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+)
+SLOW_QUERIES = registry.counter(
+    "db_slow_queries_total", "SQL-запросы дольше порога DB_SLOW_QUERY_THRESHOLD_MS"
+)
+
+# Сколько разных запросов получают свою метку; остальные попадают в "other",
+# чтобы число рядов в /metrics оставалось ограниченным
+MAX_STATEMENT_LABELS = 500
+STATEMENT_LABEL_LENGTH = 200
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w$])\d+(?:\.\d+)?\b")
+_PARAMETER = re.compile(r"\$\d+|%\(\w+\)s|\?")
+# asyncpg-диалект добавляет к параметрам приведение типа: $1::INTEGER, $2::NUMERIC(12, 2),
+# $3::TIMESTAMP WITH TIME ZONE, $4::VARCHAR[]; к этому шагу числа в нём уже заменены на ?
+_CAST = r"(?:::\w+(?: VARYING| PRECISION| WITH(?:OUT)? TIME ZONE)?(?:\(\?(?:, \?)?\))?(?:\[\])*)?"
+_PARAMETER_LIST = re.compile(rf"\?{_CAST}(?:, \?{_CAST})+")
+_VALUES_LIST = re.compile(rf"\(\?\.\.\.\)(?:, \(\?\.\.\.\))+|\(\?{_CAST}\)(?:, \(\?{_CAST}\))+")
+
+
+def normalize_statement(statement: str) -> str:
+    """
+    Текст запроса без значений: параметры и литералы заменяются на ?,
+    списки параметров (IN, VALUES нескольких строк) сворачиваются,
+    так что запросы, отличающиеся только данными, получают одну метку.
+    """
+    normalized = _WHITESPACE.sub(" ", statement).strip()
+    normalized = _STRING_LITERAL.sub("?", normalized)
+    normalized = _PARAMETER.sub("?", normalized)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _PARAMETER_LIST.sub("?...", normalized)
+    normalized = _VALUES_LIST.sub(lambda match: match.group(0).split(", ", 1)[0] + ", ...", normalized)
+    return normalized[:STATEMENT_LABEL_LENGTH]
+
+
+@dataclass(slots=True)
+class QueryStats:
+    """SQL-запросы одного HTTP-запроса"""
+    count: int = 0
+    duration: float = 0.0
+
+
+# Статистика текущего HTTP-запроса; вне запроса (воркеры, lifespan) — None
+current_query_stats: ContextVar[QueryStats | None] = ContextVar("current_query_stats", default=None)
+
+
+class QueryInstrumentation:
+    """Слушатели before/after_cursor_execute одного движка"""
+
+    def __init__(self, slow_query_threshold: float, slow_query_sample_rate: float = 1.0):
+        """
+        :param slow_query_threshold: порог медленного запроса в секундах, 0 — не логировать
+        :param slow_query_sample_rate: доля медленных запросов, попадающих в лог
+        """
+        self.slow_query_threshold = slow_query_threshold
+        self.slow_query_sample_rate = slow_query_sample_rate
+        # сырой текст запроса -> (нормализованный, дочерняя гистограмма): SQLAlchemy
+        # кэширует скомпилированные запросы, поэтому строк немного и нормализация разовая
+        self._statements: dict[str, tuple[str | None, object]] = {}
+        self._other = (None, QUERY_DURATION.labels("other"))
+
+    def attach(self, engine: AsyncEngine) -> None:
+        event.listen(engine.sync_engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine.sync_engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def _statement(self, statement: str) -> tuple[str | None, object]:
+        known = self._statements.get(statement)
+        if known is not None:
+            return known
+        if len(self._statements) >= MAX_STATEMENT_LABELS:
+            return self._other
+        normalized = normalize_statement(statement)
+        known = self._statements[statement] = (normalized, QUERY_DURATION.labels(normalized))
+        return known
+
+    @staticmethod
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+        # соединение выполняет запросы по одному, так что хватает одного значения
+        conn.info["query_started"] = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        started = conn.info.pop("query_started", None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        normalized, histogram = self._statement(statement)
+        histogram.observe(elapsed)
+
+        stats = current_query_stats.get()
+        if stats is not None:
+            stats.count += 1
+            stats.duration += elapsed
+
+        if self.slow_query_threshold and elapsed >= self.slow_query_threshold:
+            SLOW_QUERIES.inc()
+            if random.random() < self.slow_query_sample_rate:
+                logger.warning(
+                    "🐢 Медленный SQL-запрос: %.1f мс, %s",
+                    elapsed * 1000, normalized or normalize_statement(statement),
+                )
@@ -1,12 +1,98 @@
+import logging
+from contextlib import asynccontextmanager
+from datetime import timedelta
+
 from fastapi import FastAPI
 import uvicorn
 
 from src.api.api_router_v1 import api_router_v1
+from src.api.metrics.routes.metrics_route import metrics_router
+from src.api.payments.service.signature_service import signature_service
+from src.config import config
+from src.enums.balance_mode import BalanceMode
+from src.helpers.helper import session_manager, get_session
+from src.helpers.logs import configure_logging
+from src.helpers.metrics import registry
+from src.helpers.middlewares import QueryTimingMiddleware
+from src.helpers.responses import FastJSONResponse
+from src.services.payment_service import PaymentService
+from src.utils.security import shutdown_password_executor
+from src.workers.balance_compaction_worker import BalanceCompactionWorker
+from src.workers.metrics_snapshot_writer import MetricsSnapshotWriter
+from src.workers.signature_keyring_watcher import SignatureKeyringWatcher
+from src.workers.webhook_inbox_worker import WebhookInboxWorkerPool
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    metrics_writer = None
+    if config.METRICS_MULTIPROCESS_DIR is not None:
+        registry.enable_multiprocess(config.METRICS_MULTIPROCESS_DIR)
+        metrics_writer = MetricsSnapshotWriter(interval=config.METRICS_SNAPSHOT_INTERVAL_SECONDS)
+        metrics_writer.start()
+
+    await session_manager.warmup(config.DB_WARMUP_CONNECTIONS)
+    if config.RECENT_TRANSACTIONS_WARMUP > 0:
+        async with get_session() as session:
+            loaded = await PaymentService(session).warm_recent_transactions(config.RECENT_TRANSACTIONS_WARMUP)
+        logger.info("♻️ В память загружено %s последних transaction_id", loaded)
+
+    webhook_workers = None
+    if config.WEBHOOK_ACK_MODE:
+        webhook_workers = WebhookInboxWorkerPool(
+            workers=config.WEBHOOK_WORKERS,
+            batch_size=config.WEBHOOK_WORKER_BATCH_SIZE,
+            poll_interval=config.WEBHOOK_WORKER_POLL_INTERVAL_SECONDS,
+            visibility_timeout=timedelta(seconds=config.WEBHOOK_INBOX_VISIBILITY_TIMEOUT_SECONDS),
+            max_attempts=config.WEBHOOK_INBOX_MAX_ATTEMPTS,
+        )
+        webhook_workers.start()
+
+    balance_compaction = None
+    if config.BALANCE_MODE == BalanceMode.LEDGER:
+        balance_compaction = BalanceCompactionWorker(
+            interval=config.BALANCE_COMPACTION_INTERVAL_SECONDS,
+            batch_size=config.BALANCE_COMPACTION_BATCH_SIZE,
+        )
+        balance_compaction.start()
+
+    keyring_watcher = None
+    if config.WEBHOOK_KEYRING_FILE is not None:
+        keyring_watcher = SignatureKeyringWatcher(
+            service=signature_service,
+            path=config.WEBHOOK_KEYRING_FILE,
+            interval=config.WEBHOOK_KEYRING_POLL_INTERVAL_SECONDS,
+        )
+        keyring_watcher.start()
+
+    yield
+
+    if keyring_watcher:
+        await keyring_watcher.stop()
+    if webhook_workers:
+        await webhook_workers.stop()
+    if balance_compaction:
+        await balance_compaction.stop()
+    shutdown_password_executor()
+    if metrics_writer:
+        await metrics_writer.stop()
+    await session_manager.dispose()
 
 
 def create_app():
-    app = FastAPI()
+    configure_logging(
+        level=config.LOG_LEVEL,
+        json_format=config.LOG_JSON,
+        sampling=config.LOG_SAMPLING,
+        redact_fields=config.LOG_REDACT_FIELDS,
+        queue_size=config.LOG_QUEUE_SIZE,
+    )
+    app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
+    app.add_middleware(QueryTimingMiddleware, server_timing=config.SERVER_TIMING_ENABLED)
     app.include_router(api_router_v1)
+    app.include_router(metrics_router)
 
     return app
 
@@ -14,4 +100,5 @@ app = create_app()
 
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    # локальная разработка: один процесс с перезагрузкой; продакшен — python -m src.server
+    uvicorn.run("src.main:app", host="0.0.0.0", port=8000, reload=True)
@@ -1,3 +1,6 @@
 from src.models.account_model import AccountModel
 from src.models.user_model import UserModel
-from src.models.payment_model import PaymentModel
\ No newline at end of file
+from src.models.payment_model import PaymentModel
+from src.models.webhook_inbox_model import WebhookInboxModel
+from src.models.account_balance_delta_model import AccountBalanceDeltaModel
+from src.models.account_balance_shard_model import AccountBalanceShardModel
@@ -0,0 +1,30 @@
+from decimal import Decimal
+
+from sqlalchemy import BigInteger, ForeignKey, Numeric, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from src.models.base_model import BaseModel
+
+
+class AccountBalanceDeltaModel(BaseModel):
+    """
+    Ещё не свёрнутое в accounts.balance изменение баланса (режим BALANCE_MODE=ledger).
+
+    accounts.balance служит снимком, а строки этой таблицы — изменениями после него.
+    Фоновая задача периодически переносит их в снимок и удаляет.
+
+    Атрибуты:
+    - account_id — счёт (FK на accounts.id)
+    - amount — изменение баланса
+    """
+
+    __tablename__ = "account_balance_deltas"
+    __table_args__ = (
+        Index("ix_account_balance_deltas_account_id", "account_id"),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    account_id: Mapped[int] = mapped_column(
+        ForeignKey("accounts.id", ondelete="CASCADE"),
+        nullable=False
+    )
+    amount: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False)
@@ -0,0 +1,29 @@
+from decimal import Decimal
+
+from sqlalchemy import ForeignKey, Integer, Numeric
+from sqlalchemy.orm import Mapped, mapped_column
+from src.models.base_model import BaseModel
+
+
+class AccountBalanceShardModel(BaseModel):
+    """
+    Подстрока баланса счёта (режим BALANCE_MODE=sharded).
+
+    Платеж прибавляет сумму к подстроке, выбранной по transaction_id, поэтому
+    платежи на один счёт конкурируют за BALANCE_SHARDS строк, а не за одну.
+    Баланс счёта = accounts.balance + сумма его подстрок.
+
+    Атрибуты:
+    - account_id — счёт (FK на accounts.id)
+    - shard — номер подстроки
+    - balance — накопленная в подстроке сумма
+    """
+
+    __tablename__ = "account_balance_shards"
+
+    account_id: Mapped[int] = mapped_column(
+        ForeignKey("accounts.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    shard: Mapped[int] = mapped_column(Integer, primary_key=True)
+    balance: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False, default=0)
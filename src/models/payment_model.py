@@ -20,6 +20,7 @@ class PaymentModel(BaseModel):
         Index("ix_payments_user_id", "user_id"),
         Index("ix_payments_account_id", "account_id"),
         Index("ix_payments_user_account", "user_id", "account_id"),
+        Index("ix_payments_user_created_id", "user_id", "created_at", "id"),
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
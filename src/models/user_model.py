@@ -1,4 +1,4 @@
-from sqlalchemy import String, Enum, Integer, Index
+from sqlalchemy import String, Enum, Integer, Index, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from src.models.base_model import BaseModel
 from src.enums.user_role import UserRole
@@ -16,6 +16,7 @@ class UserModel(BaseModel):
     - захэшированный пароль
     - полное имя
     - роль (пользователь или администратор)
+    - версию токенов (claim ver в JWT)
     """
 
     __tablename__ = "users"
@@ -28,6 +29,8 @@ class UserModel(BaseModel):
     hashed_password: Mapped[str] = mapped_column(String(255), nullable=False)
     full_name: Mapped[str] = mapped_column(String(255), nullable=False)
     role: Mapped[UserRole] = mapped_column(Enum(UserRole), nullable=False, default=UserRole.USER)
+    # увеличивается при изменении пользователя; access-токены с другой версией отклоняются
+    token_version: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
 
     # Relationships
     accounts: Mapped[list["AccountModel"]] = relationship(
@@ -40,3 +43,10 @@ class UserModel(BaseModel):
     )
 
 
+# Поиск по префиксу email без учёта регистра: lower(email) LIKE 'prefix%'.
+# text_pattern_ops нужен, чтобы LIKE мог идти по btree при любой collation базы.
+Index(
+    "ix_users_email_lower_pattern",
+    func.lower(UserModel.email).label("email_lower"),
+    postgresql_ops={"email_lower": "text_pattern_ops"},
+)
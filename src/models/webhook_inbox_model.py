@@ -0,0 +1,31 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Integer, Text, TIMESTAMP, Index, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+from src.models.base_model import BaseModel
+
+
+class WebhookInboxModel(BaseModel):
+    """
+    Очередь входящих webhook-платежей для режима «подтвердить, затем обработать».
+
+    Атрибуты:
+    - payload — тело webhook-запроса с уже проверенной подписью
+    - attempts — число попыток обработки
+    - locked_until — до какого момента событие занято обработчиком
+    - failed_at — когда событие отклонено без повторов
+    - last_error — причина последней неудачи
+    """
+
+    __tablename__ = "webhook_inbox"
+    __table_args__ = (
+        Index("ix_webhook_inbox_pending", "id", postgresql_where=text("failed_at IS NULL")),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    payload: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    locked_until: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
+    failed_at: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
@@ -1,39 +1,216 @@
-from sqlalchemy import select, ScalarResult
+from collections.abc import Sequence
+from decimal import Decimal
+
+from sqlalchemy import select, Numeric, Float, Row, bindparam, cast, delete, func
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import update
 
 from src.models.account_model import AccountModel
+from src.models.account_balance_delta_model import AccountBalanceDeltaModel
+from src.models.account_balance_shard_model import AccountBalanceShardModel
+
+# Ключ advisory-блокировки свёртки дельт: одновременно сворачивает один процесс,
+# иначе две свёртки могли бы обновлять одни и те же счета в разном порядке
+BALANCE_COMPACTION_LOCK_KEY = 0x62616c616e6365
 
 class AccountRepositories:
     def __init__(self, session: AsyncSession):
         self.session = session
 
-    async def find_by_user_id(self, user_id: int) -> ScalarResult[AccountModel]:
+    async def find_by_user_id(self, user_id: int) -> Sequence[Row]:
+        """Счета пользователя строками (id, user_id, balance); balance приведён к float в SQL"""
+        stmt = (
+            select(AccountModel.id, AccountModel.user_id, cast(AccountModel.balance, Float).label("balance"))
+            .where(AccountModel.user_id == user_id)
+        )
+        result = await self.session.execute(stmt)
+        return result.all()
+
+    async def create_missing(self, accounts: dict[int, int]) -> None:
+        """
+        Создать счета, которых ещё нет, с нулевым балансом.
+
+        :param accounts: account_id -> user_id
+        """
         stmt = (
-            select(AccountModel).where(AccountModel.user_id == user_id)
+            insert(AccountModel.__table__)
+            .on_conflict_do_nothing(index_elements=[AccountModel.id])
         )
-        return await self.session.scalars(stmt)
+        await self.session.execute(stmt, [
+            {"id": account_id, "user_id": user_id, "balance": 0}
+            for account_id, user_id in accounts.items()
+        ])
 
-    async def find_by_id_user_id_pair(self, find_id: int, user_id: int) -> AccountModel | None:
+    async def find_owners(self, account_ids: list[int]) -> dict[int, int]:
+        """Вернуть account_id -> user_id для существующих счетов"""
         stmt = (
-            select(AccountModel).where(
-    AccountModel.id == find_id,
-                AccountModel.user_id==user_id
+            select(AccountModel.id, AccountModel.user_id)
+            .where(AccountModel.id.in_(account_ids))
+        )
+        result = await self.session.execute(stmt)
+        return {account_id: user_id for account_id, user_id in result}
+
+    async def update_balance_deltas(self, deltas: dict[int, Decimal]) -> None:
+        """
+        Прибавить к каждому счёту его суммарную дельту одним executemany.
+        Счета обновляются в порядке id, чтобы параллельные пакеты не взаимоблокировались.
+        """
+        accounts = AccountModel.__table__
+        stmt = (
+            update(accounts)
+            .where(accounts.c.id == bindparam("account_id"))
+            .values(balance=accounts.c.balance + bindparam("delta", type_=Numeric(12, 2)))
+        )
+        await self.session.execute(stmt, [
+            {"account_id": account_id, "delta": delta}
+            for account_id, delta in sorted(deltas.items())
+        ])
+
+    async def create_if_missing(self, account_id: int, user_id: int) -> bool:
+        """
+        Создать счёт с нулевым балансом, если его ещё нет. Существующий счёт не блокируется.
+
+        :return: True, если счёт создан
+        """
+        stmt = (
+            insert(AccountModel)
+            .values(id=account_id, user_id=user_id, balance=0)
+            .on_conflict_do_nothing(index_elements=[AccountModel.id])
+            .returning(AccountModel.id)
+        )
+        return await self.session.scalar(stmt) is not None
+
+    async def find_with_pending_by_user_id(self, user_id: int) -> Sequence[Row]:
+        """
+        Счета пользователя с балансом = снимок + ещё не свёрнутые дельты (режим ledger).
+        Число дельт на счёт ограничено интервалом свёртки, поэтому чтение не растёт с историей.
+        """
+        pending = (
+            select(func.coalesce(func.sum(AccountBalanceDeltaModel.amount), 0))
+            .where(AccountBalanceDeltaModel.account_id == AccountModel.id)
+            .scalar_subquery()
+        )
+        stmt = (
+            select(
+                AccountModel.id,
+                AccountModel.user_id,
+                cast(AccountModel.balance + pending, Float).label("balance"),
             )
+            .where(AccountModel.user_id == user_id)
+        )
+        result = await self.session.execute(stmt)
+        return result.all()
+
+    async def add_balance_deltas(self, deltas: dict[int, Decimal]) -> None:
+        """Записать дельты балансов в журнал одним executemany, не трогая строки accounts"""
+        await self.session.execute(insert(AccountBalanceDeltaModel.__table__), [
+            {"account_id": account_id, "amount": delta}
+            for account_id, delta in deltas.items()
+        ])
+
+    async def try_lock_balance_compaction(self) -> bool:
+        """Захватить блокировку свёртки до конца транзакции; False, если её держит другой процесс"""
+        stmt = select(func.pg_try_advisory_xact_lock(BALANCE_COMPACTION_LOCK_KEY))
+        return await self.session.scalar(stmt)
+
+    async def compact_balance_deltas(self, limit: int) -> int:
+        """
+        Перенести до limit самых старых дельт в accounts.balance одним запросом:
+        DELETE ... RETURNING из журнала, суммы по счетам и UPDATE accounts.
+
+        :return: число свёрнутых дельт. Коммит на уровне сервиса.
+        """
+        deltas = AccountBalanceDeltaModel.__table__
+        accounts = AccountModel.__table__
+        batch = (
+            select(deltas.c.id)
+            .order_by(deltas.c.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        moved = (
+            delete(deltas)
+            .where(deltas.c.id.in_(batch))
+            .returning(deltas.c.account_id, deltas.c.amount)
+            .cte("moved")
+        )
+        totals = (
+            select(
+                moved.c.account_id,
+                func.sum(moved.c.amount).label("amount"),
+                func.count().label("moved"),
+            )
+            .group_by(moved.c.account_id)
+            .cte("totals")
+        )
+        stmt = (
+            update(accounts)
+            .where(accounts.c.id == totals.c.account_id)
+            .values(balance=accounts.c.balance + totals.c.amount)
+            .returning(totals.c.moved)
         )
         result = await self.session.scalars(stmt)
-        return result.first()
+        return sum(result)
+
+    async def find_with_shards_by_user_id(self, user_id: int) -> Sequence[Row]:
+        """Счета пользователя с балансом = accounts.balance + сумма подстрок (режим sharded)"""
+        shards = (
+            select(func.coalesce(func.sum(AccountBalanceShardModel.balance), 0))
+            .where(AccountBalanceShardModel.account_id == AccountModel.id)
+            .scalar_subquery()
+        )
+        stmt = (
+            select(
+                AccountModel.id,
+                AccountModel.user_id,
+                cast(AccountModel.balance + shards, Float).label("balance"),
+            )
+            .where(AccountModel.user_id == user_id)
+        )
+        result = await self.session.execute(stmt)
+        return result.all()
+
+    async def add_balance_shard_deltas(self, deltas: dict[tuple[int, int], Decimal]) -> None:
+        """
+        Прибавить дельты к подстрокам балансов одним executemany.
+        Подстроки обновляются в порядке (account_id, shard), чтобы параллельные пакеты не взаимоблокировались.
+
+        :param deltas: (account_id, shard) -> дельта
+        """
+        stmt = insert(AccountBalanceShardModel.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[AccountBalanceShardModel.account_id, AccountBalanceShardModel.shard],
+            set_={"balance": AccountBalanceShardModel.__table__.c.balance + stmt.excluded.balance},
+        )
+        await self.session.execute(stmt, [
+            {"account_id": account_id, "shard": shard, "balance": delta}
+            for (account_id, shard), delta in sorted(deltas.items())
+        ])
 
-    async def create(self, account: AccountModel) -> AccountModel:
-        self.session.add(account)
-        await self.session.flush()
-        return account
+    async def collapse_balance_shards(self, account_id: int) -> Row | None:
+        """
+        Перенести сумму подстрок счёта в accounts.balance и удалить подстроки одним запросом.
 
-    async def update_balance_delta(self, account_id: int, balance: float) -> None:
+        :return: строка счёта (id, user_id, balance) после переноса или None, если счёта нет.
+                 Коммит на уровне сервиса.
+        """
+        shards = AccountBalanceShardModel.__table__
+        accounts = AccountModel.__table__
+        moved = (
+            delete(shards)
+            .where(shards.c.account_id == account_id)
+            .returning(shards.c.balance)
+            .cte("moved")
+        )
         stmt = (
-            update(AccountModel)
-            .where(AccountModel.id==account_id)
-            .values(balance=AccountModel.balance + balance)
-            .returning(AccountModel.id)
+            update(accounts)
+            .where(accounts.c.id == account_id)
+            .values(
+                balance=accounts.c.balance
+                + select(func.coalesce(func.sum(moved.c.balance), 0)).scalar_subquery()
+            )
+            .returning(accounts.c.id, accounts.c.user_id, accounts.c.balance)
         )
-        return await self.session.scalar(stmt)
\ No newline at end of file
+        result = await self.session.execute(stmt)
+        return result.first()
@@ -1,28 +1,303 @@
-from sqlalchemy import select, ScalarResult
+import uuid
+from collections.abc import Sequence
+from datetime import datetime
 
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, Row, Select, CTE, Float, Uuid, any_, bindparam, cast, literal, literal_column, tuple_, true
+from sqlalchemy.dialects.postgresql import ARRAY, insert
 
+from sqlalchemy.ext.asyncio import AsyncSession, AsyncResult
+
+from src.models.account_model import AccountModel
+from src.models.account_balance_delta_model import AccountBalanceDeltaModel
+from src.models.account_balance_shard_model import AccountBalanceShardModel
 from src.models.payment_model import PaymentModel
+from src.schemas.payment_schemas import PaymentFilterSchema
+from src.schemas.row_schemas import PaymentRow
 
 
 class PaymentRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
 
-    async def find_by_user_id(self, user_id: int) -> ScalarResult[PaymentModel]:
+    # Колонки PaymentReadSchema и PaymentRow: строки читаются кортежами, без сущностей и identity map.
+    # amount приводится к float в SQL, чтобы схему можно было собрать без валидации.
+    READ_COLUMNS = (
+        PaymentModel.id,
+        PaymentModel.transaction_id,
+        cast(PaymentModel.amount, Float).label("amount"),
+        PaymentModel.user_id,
+        PaymentModel.account_id,
+        PaymentModel.created_at,
+    )
+
+    @staticmethod
+    def _user_payments_query(user_id: int, filters: PaymentFilterSchema) -> Select:
+        """Платежи пользователя от новых к старым, порядок (created_at, id) совпадает с индексом"""
+        stmt = (
+            select(*PaymentRepository.READ_COLUMNS)
+            .where(PaymentModel.user_id == user_id)
+            .order_by(PaymentModel.created_at.desc(), PaymentModel.id.desc())
+        )
+        if filters.created_from is not None:
+            stmt = stmt.where(PaymentModel.created_at >= filters.created_from)
+        if filters.created_to is not None:
+            stmt = stmt.where(PaymentModel.created_at < filters.created_to)
+        if filters.account_id is not None:
+            stmt = stmt.where(PaymentModel.account_id == filters.account_id)
+        return stmt
+
+    async def find_page_by_user_id(
+            self,
+            user_id: int,
+            filters: PaymentFilterSchema,
+            limit: int,
+            after: tuple[datetime, int] | None = None,
+    ) -> Sequence[Row]:
+        """
+        Страница платежей пользователя (keyset-пагинация), строки с колонками READ_COLUMNS.
+
+        :param after: (created_at, id) последнего платежа предыдущей страницы
+        """
+        stmt = self._user_payments_query(user_id, filters).limit(limit)
+        if after is not None:
+            stmt = stmt.where(tuple_(PaymentModel.created_at, PaymentModel.id) < tuple_(*after))
+        result = await self.session.execute(stmt)
+        return result.all()
+
+    async def stream_by_user_id(
+            self,
+            user_id: int,
+            filters: PaymentFilterSchema,
+            chunk_size: int,
+    ) -> AsyncResult:
+        """Все платежи пользователя через серверный курсор, по chunk_size строк за раз"""
+        stmt = self._user_payments_query(user_id, filters).execution_options(yield_per=chunk_size)
+        return await self.session.stream(stmt)
+
+    async def find_by_transaction_id(self, transaction_id: str) -> PaymentRow | None:
+        stmt = (
+            select(*self.READ_COLUMNS).where(PaymentModel.transaction_id == transaction_id)
+        )
+        row = (await self.session.execute(stmt)).first()
+        return PaymentRow(*row) if row else None
+
+    async def find_recent(self, limit: int) -> Sequence[Row]:
+        """(transaction_id, account_id, user_id, amount) последних limit платежей, от новых к старым"""
+        stmt = (
+            select(
+                PaymentModel.transaction_id,
+                PaymentModel.account_id,
+                PaymentModel.user_id,
+                PaymentModel.amount,
+            )
+            .order_by(PaymentModel.id.desc())
+            .limit(limit)
+        )
+        result = await self.session.execute(stmt)
+        return result.all()
+
+    async def find_fingerprints(self, transaction_ids: list[uuid.UUID]) -> Sequence[Row]:
+        """
+        (transaction_id, account_id, user_id, amount) платежей с данными transaction_id.
+        Один запрос с = ANY(:ids): текст не зависит от числа id, план кэшируется.
+        """
+        stmt = select(
+            PaymentModel.transaction_id,
+            PaymentModel.account_id,
+            PaymentModel.user_id,
+            PaymentModel.amount,
+        ).where(
+            PaymentModel.transaction_id == any_(bindparam("transaction_ids", transaction_ids, type_=ARRAY(Uuid)))
+        )
+        result = await self.session.execute(stmt)
+        return result.all()
+
+    async def create_many(self, payments: list[dict]) -> list[Row]:
+        """
+        Вставить платежи пачкой (executemany), пропуская уже существующие transaction_id.
+
+        :return: строки (transaction_id, account_id, amount) реально вставленных платежей
+        """
+        stmt = (
+            insert(PaymentModel.__table__)
+            .on_conflict_do_nothing(index_elements=[PaymentModel.transaction_id])
+            .returning(PaymentModel.transaction_id, PaymentModel.account_id, PaymentModel.amount)
+        )
+        result = await self.session.execute(stmt, payments)
+        return list(result)
+
+    async def create_with_balance(
+            self,
+            transaction_id: str,
+            amount: float,
+            user_id: int,
+            account_id: int,
+    ) -> Row | None:
+        """
+        Сохраняет платеж и зачисляет сумму на счёт одним запросом.
+
+        INSERT платежа с ON CONFLICT (transaction_id) DO NOTHING отсекает дубли,
+        затем upsert счёта создаёт его с балансом = amount или прибавляет amount
+        к существующему, если счёт принадлежит тому же пользователю.
+
+        :return: строка платежа с флагом created (True — счёт создан,
+                 False — пополнен, None — счёт принадлежит другому пользователю)
+                 или None, если транзакция уже существует.
+                 Коммит на уровне сервиса.
+        """
+        payment_insert = (
+            insert(PaymentModel)
+            .values(
+                transaction_id=transaction_id,
+                amount=amount,
+                user_id=user_id,
+                account_id=account_id,
+            )
+            .on_conflict_do_nothing(index_elements=[PaymentModel.transaction_id])
+            .returning(
+                PaymentModel.id,
+                PaymentModel.transaction_id,
+                PaymentModel.amount,
+                PaymentModel.user_id,
+                PaymentModel.account_id,
+                PaymentModel.created_at,
+            )
+            .cte("payment_insert")
+        )
+
+        account_insert = insert(AccountModel).from_select(
+            ["id", "user_id", "balance"],
+            select(payment_insert.c.account_id, payment_insert.c.user_id, payment_insert.c.amount),
+            include_defaults=False,
+        )
+        account_upsert = (
+            account_insert.on_conflict_do_update(
+                index_elements=[AccountModel.id],
+                set_={"balance": AccountModel.balance + account_insert.excluded.balance},
+                where=AccountModel.user_id == account_insert.excluded.user_id,
+            )
+            .returning(AccountModel.id, literal_column("xmax = 0").label("created"))
+            .cte("account_upsert")
+        )
+
         stmt = (
-            select(PaymentModel).where(PaymentModel.user_id == user_id)
+            select(payment_insert, account_upsert.c.created)
+            .select_from(
+                payment_insert.outerjoin(
+                    account_upsert, account_upsert.c.id == payment_insert.c.account_id
+                )
+            )
         )
-        return await self.session.scalars(stmt)
+        result = await self.session.execute(stmt)
+        return result.first()
 
-    async def find_by_transaction_id(self, transaction_id: str) -> PaymentModel | None:
+    @staticmethod
+    def _guarded_payment_insert(
+            transaction_id: str,
+            amount: float,
+            user_id: int,
+            account_id: int,
+    ) -> tuple[CTE, CTE]:
+        """
+        CTE владельца счёта и INSERT платежа, который выполняется, только если
+        счёт принадлежит user_id; дубли transaction_id пропускаются.
+        """
+        owner = (
+            select(AccountModel.user_id)
+            .where(AccountModel.id == account_id)
+            .cte("owner")
+        )
+        payment_insert = (
+            insert(PaymentModel)
+            .from_select(
+                ["transaction_id", "amount", "user_id", "account_id"],
+                select(
+                    literal(transaction_id, PaymentModel.transaction_id.type),
+                    literal(amount, PaymentModel.amount.type),
+                    literal(user_id),
+                    literal(account_id),
+                ).where(owner.c.user_id == user_id),
+                include_defaults=False,
+            )
+            .on_conflict_do_nothing(index_elements=[PaymentModel.transaction_id])
+            .returning(
+                PaymentModel.id,
+                PaymentModel.transaction_id,
+                PaymentModel.amount,
+                PaymentModel.user_id,
+                PaymentModel.account_id,
+                PaymentModel.created_at,
+            )
+            .cte("payment_insert")
+        )
+        return owner, payment_insert
+
+    async def _execute_guarded(self, owner: CTE, payment_insert: CTE, balance_write: CTE) -> Row | None:
         stmt = (
-            select(PaymentModel).where(PaymentModel.transaction_id == transaction_id)
+            select(owner.c.user_id.label("owner_id"), payment_insert)
+            .select_from(owner.outerjoin(payment_insert, true()))
+            .add_cte(balance_write)
         )
-        result = await self.session.scalars(stmt)
+        result = await self.session.execute(stmt)
         return result.first()
 
-    async def create(self, payment: PaymentModel) -> PaymentModel:
-        self.session.add(payment)
-        await self.session.flush()
-        return payment
\ No newline at end of file
+    async def create_with_ledger_delta(
+            self,
+            transaction_id: str,
+            amount: float,
+            user_id: int,
+            account_id: int,
+    ) -> Row | None:
+        """
+        Сохраняет платеж и дельту баланса одним запросом, не блокируя строку счёта.
+
+        Платеж вставляется, только если счёт принадлежит user_id; ON CONFLICT
+        (transaction_id) DO NOTHING отсекает дубли, дельта пишется в журнал
+        account_balance_deltas только для реально вставленного платежа.
+        Счёт к этому моменту должен существовать (см. AccountRepositories.create_if_missing).
+
+        :return: строка с owner_id владельца счёта и колонками платежа
+                 (id = None, если платеж не вставлен), или None, если счёта нет.
+                 Коммит на уровне сервиса.
+        """
+        owner, payment_insert = self._guarded_payment_insert(transaction_id, amount, user_id, account_id)
+        delta_insert = (
+            insert(AccountBalanceDeltaModel)
+            .from_select(
+                ["account_id", "amount"],
+                select(payment_insert.c.account_id, payment_insert.c.amount),
+                include_defaults=False,
+            )
+            .cte("delta_insert")
+        )
+        return await self._execute_guarded(owner, payment_insert, delta_insert)
+
+    async def create_with_balance_shard(
+            self,
+            transaction_id: str,
+            amount: float,
+            user_id: int,
+            account_id: int,
+            shard: int,
+    ) -> Row | None:
+        """
+        Сохраняет платеж и прибавляет сумму к подстроке баланса shard одним запросом.
+
+        Строка accounts не блокируется: платежи на один счёт ждут друг друга,
+        только если попали в одну подстроку. Условия вставки и результат —
+        как у create_with_ledger_delta.
+        """
+        owner, payment_insert = self._guarded_payment_insert(transaction_id, amount, user_id, account_id)
+        shard_insert = insert(AccountBalanceShardModel).from_select(
+            ["account_id", "shard", "balance"],
+            select(payment_insert.c.account_id, literal(shard), payment_insert.c.amount),
+            include_defaults=False,
+        )
+        shard_upsert = (
+            shard_insert.on_conflict_do_update(
+                index_elements=[AccountBalanceShardModel.account_id, AccountBalanceShardModel.shard],
+                set_={"balance": AccountBalanceShardModel.balance + shard_insert.excluded.balance},
+            )
+            .cte("shard_upsert")
+        )
+        return await self._execute_guarded(owner, payment_insert, shard_upsert)
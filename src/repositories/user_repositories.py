@@ -1,33 +1,120 @@
-from sqlalchemy import select, update, delete, ScalarResult
+import json
+from collections.abc import Sequence
+
+from sqlalchemy import select, update, delete, func, text, Row, Select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm.exc import NoResultFound
 
 from src.models.user_model import UserModel
+from src.schemas.row_schemas import UserRow, UserAuthRow
+from src.schemas.user_shemas import UserFilterSchema
+from src.utils.sql import Explain
 
 
 class UserRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
 
-    async def find(self) -> ScalarResult[UserModel]:
-        stmt = select(UserModel)
-        return await self.session.scalars(stmt)
+    # Колонки UserRow: без hashed_password, кортежами мимо identity map
+    READ_COLUMNS = (UserModel.id, UserModel.email, UserModel.full_name, UserModel.role)
+
+    @staticmethod
+    def _apply_filters(stmt: Select, filters: UserFilterSchema) -> Select:
+        """Фильтры по роли (ix_users_role) и префиксу email (ix_users_email_lower_pattern)"""
+        if filters.role is not None:
+            stmt = stmt.where(UserModel.role == filters.role)
+        if filters.email_prefix:
+            # Шаблон собирается здесь, а не конкатенацией в SQL, чтобы планировщик
+            # видел константный префикс и мог пройти по индексу text_pattern_ops
+            escaped = (
+                filters.email_prefix.lower()
+                .replace("\\", "\\\\")
+                .replace("%", "\\%")
+                .replace("_", "\\_")
+            )
+            stmt = stmt.where(func.lower(UserModel.email).like(escaped + "%", escape="\\"))
+        return stmt
+
+    async def find_page(
+            self,
+            filters: UserFilterSchema,
+            limit: int,
+            after_id: int | None = None,
+    ) -> Sequence[Row]:
+        """
+        Страница пользователей по возрастанию id (keyset-пагинация),
+        строки (id, email, full_name, role) — без hashed_password и ORM-сущностей.
+
+        :param after_id: id последнего пользователя предыдущей страницы
+        """
+        stmt = (
+            self._apply_filters(select(*self.READ_COLUMNS), filters)
+            .order_by(UserModel.id)
+            .limit(limit)
+        )
+        if after_id is not None:
+            stmt = stmt.where(UserModel.id > after_id)
+        result = await self.session.execute(stmt)
+        return result.all()
+
+    async def count(self, filters: UserFilterSchema, limit: int | None = None) -> int:
+        """
+        Точное число пользователей под фильтрами.
 
-    async def find_by_email(self, email: str) -> UserModel | None:
+        :param limit: считать не дальше limit строк — стоимость ограничена сверху
+        """
+        inner = self._apply_filters(select(UserModel.id), filters)
+        if limit is not None:
+            inner = inner.limit(limit)
+        stmt = select(func.count()).select_from(inner.subquery())
+        return await self.session.scalar(stmt)
+
+    async def estimate_total(self) -> int | None:
+        """Оценка размера таблицы из статистики (pg_class.reltuples); None, если ANALYZE ещё не было"""
+        stmt = text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'users'::regclass")
+        estimate = await self.session.scalar(stmt)
+        if estimate is None or estimate < 0:
+            return None
+        return estimate
+
+    async def estimate_count(self, filters: UserFilterSchema) -> int:
+        """Оценка числа строк под фильтрами по плану запроса (EXPLAIN), без чтения таблицы"""
+        stmt = self._apply_filters(select(UserModel.id), filters)
+        plan = await self.session.scalar(Explain(stmt))
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    async def find_by_email(self, email: str) -> UserRow | None:
         """Получить пользователя по email"""
-        stmt = select(UserModel).where(
+        stmt = select(*self.READ_COLUMNS).where(
             UserModel.email == email,
         )
+        row = (await self.session.execute(stmt)).first()
+        return UserRow(*row) if row else None
 
-        return await self.session.scalar(stmt)
+    async def find_auth_by_email(self, email: str) -> UserAuthRow | None:
+        """Пользователь с hashed_password — только для проверки пароля"""
+        stmt = select(
+            UserModel.id, UserModel.email, UserModel.hashed_password, UserModel.role, UserModel.token_version
+        ).where(
+            UserModel.email == email,
+        )
+        row = (await self.session.execute(stmt)).first()
+        return UserAuthRow(*row) if row else None
 
-    async def find_by_id(self, find_id: int) -> UserModel | None:
-        print("Hereeeeeeeeeeeee:", find_id)
-        stmt = select(UserModel).where(
+    async def find_by_id(self, find_id: int) -> UserRow | None:
+        stmt = select(*self.READ_COLUMNS).where(
             UserModel.id == find_id,
         )
+        row = (await self.session.execute(stmt)).first()
+        return UserRow(*row) if row else None
+
+    async def find_token_version(self, user_id: int) -> int | None:
+        """Текущая версия токенов пользователя; None — пользователя нет"""
+        stmt = select(UserModel.token_version).where(UserModel.id == user_id)
+        return (await self.session.execute(stmt)).scalar_one_or_none()
 
-        return await self.session.scalar(stmt)
     async def create(self, user: UserModel) -> UserModel:
         """Создать нового пользователя"""
         self.session.add(user)
@@ -35,7 +122,6 @@ class UserRepository:
         return user
 
     async def update(self, user_id: int, **fields) -> UserModel:
-        print("Fields",fields)
         """
         Обновить пользователя через UPDATE и вернуть обновленный объект.
         Коммит будет на уровне сервиса.
@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update, delete, func, or_, Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.webhook_inbox_model import WebhookInboxModel
+
+
+class WebhookInboxRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def create(self, payload: dict) -> WebhookInboxModel:
+        event = WebhookInboxModel(payload=payload)
+        self.session.add(event)
+        await self.session.flush()
+        return event
+
+    async def claim(self, limit: int, visibility_timeout: timedelta) -> list[Row]:
+        """
+        Занять до limit ожидающих событий на visibility_timeout.
+        Занятые другими обработчиками строки пропускаются (SKIP LOCKED).
+        Коммит на уровне сервиса.
+        """
+        pending = (
+            select(WebhookInboxModel.id)
+            .where(
+                WebhookInboxModel.failed_at.is_(None),
+                or_(
+                    WebhookInboxModel.locked_until.is_(None),
+                    WebhookInboxModel.locked_until < func.now(),
+                ),
+            )
+            .order_by(WebhookInboxModel.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = (
+            update(WebhookInboxModel)
+            .where(WebhookInboxModel.id.in_(pending))
+            .values(
+                locked_until=func.now() + visibility_timeout,
+                attempts=WebhookInboxModel.attempts + 1,
+            )
+            .returning(
+                WebhookInboxModel.id,
+                WebhookInboxModel.payload,
+                WebhookInboxModel.attempts,
+                WebhookInboxModel.created_at,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.session.execute(stmt)
+        return sorted(result, key=lambda row: row.id)
+
+    async def delete_by_ids(self, event_ids: list[int]) -> None:
+        stmt = delete(WebhookInboxModel).where(WebhookInboxModel.id.in_(event_ids))
+        await self.session.execute(stmt, execution_options={"synchronize_session": False})
+
+    async def mark_failed(self, event_ids: list[int], error: str) -> None:
+        stmt = (
+            update(WebhookInboxModel)
+            .where(WebhookInboxModel.id.in_(event_ids))
+            .values(failed_at=func.now(), locked_until=None, last_error=error)
+            .execution_options(synchronize_session=False)
+        )
+        await self.session.execute(stmt)
+
+    async def set_error(self, event_ids: list[int], error: str) -> None:
+        """Сохранить ошибку; событие вернётся в очередь после истечения locked_until"""
+        stmt = (
+            update(WebhookInboxModel)
+            .where(WebhookInboxModel.id.in_(event_ids))
+            .values(last_error=error)
+            .execution_options(synchronize_session=False)
+        )
+        await self.session.execute(stmt)
+
+    async def get_pending_stats(self) -> tuple[int, datetime | None]:
+        """Вернуть число ожидающих событий и время создания самого старого из них"""
+        stmt = (
+            select(func.count(), func.min(WebhookInboxModel.created_at))
+            .where(WebhookInboxModel.failed_at.is_(None))
+        )
+        result = await self.session.execute(stmt)
+        depth, oldest = result.one()
+        return depth, oldest
@@ -6,5 +6,14 @@ class UserAuthSchema(BaseModel):
     email: EmailStr
     hashed_password: str
     role: UserRole
+    token_version: int = 0
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class PrincipalSchema(BaseModel):
+    """Аутентифицированный субъект запроса: только то, что нужно для авторизации"""
+    id: int
+    role: UserRole
 
     model_config = ConfigDict(from_attributes=True)
@@ -36,3 +36,15 @@ class PaymentUpdateSchema(BaseModel):
         populate_by_name=True,
         alias_generator=to_camel
     )
+
+
+# ------------------- Filters ------------------- #
+class PaymentFilterSchema(BaseModel):
+    created_from: datetime | None = None
+    created_to: datetime | None = None
+    account_id: int | None = None
+    model_config = ConfigDict(
+        from_attributes=True,
+        populate_by_name=True,
+        alias_generator=to_camel
+    )
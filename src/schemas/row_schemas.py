@@ -0,0 +1,42 @@
+"""
+Лёгкие строки проецированных запросов репозиториев.
+
+В отличие от ORM-сущностей не попадают в identity map сессии и не несут
+состояния SQLAlchemy; __slots__ убирает __dict__ у каждой строки.
+Данные приходят из БД, поэтому при сборке схем ответа используется model_construct.
+"""
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+
+from src.enums.user_role import UserRole
+
+
+@dataclass(slots=True, frozen=True)
+class UserRow:
+    """Пользователь без hashed_password: всё, что нужно get_current_user и ответам API"""
+    id: int
+    email: str
+    full_name: str
+    role: UserRole
+
+
+@dataclass(slots=True, frozen=True)
+class UserAuthRow:
+    """Поля для проверки пароля при логине и выпуска токенов"""
+    id: int
+    email: str
+    hashed_password: str
+    role: UserRole
+    token_version: int
+
+
+@dataclass(slots=True, frozen=True)
+class PaymentRow:
+    """Платеж в колонках PaymentRepository.READ_COLUMNS (amount уже float)"""
+    id: int
+    transaction_id: uuid.UUID
+    amount: float
+    user_id: int
+    account_id: int
+    created_at: datetime
@@ -1,4 +1,28 @@
-from pydantic import BaseModel, ConfigDict
+from datetime import datetime
+
+from pydantic import BaseModel, ConfigDict, Field, SecretStr
+from pydantic.alias_generators import to_camel
 
 class BaseSignatureSchema(BaseModel):
-    pass
\ No newline at end of file
+    pass
+
+
+class SignatureKeySchema(BaseModel):
+    """Ключ подписи webhook с окном действия; границы окна необязательны"""
+    id: str
+    secret: SecretStr
+    not_before: datetime | None = None
+    not_after: datetime | None = None
+
+    model_config = ConfigDict(
+        from_attributes=True, populate_by_name=True, alias_generator=to_camel
+    )
+
+
+class SignatureKeyringSchema(BaseModel):
+    """Содержимое файла WEBHOOK_KEYRING_FILE"""
+    keys: list[SignatureKeySchema] = Field(min_length=1)
+
+    model_config = ConfigDict(
+        from_attributes=True, populate_by_name=True, alias_generator=to_camel
+    )
@@ -28,4 +28,12 @@ class UserUpdateSchema(BaseModel):
 
     model_config = ConfigDict(
         from_attributes=True, populate_by_name=True, alias_generator=to_camel
-    )
\ No newline at end of file
+    )
+
+class UserFilterSchema(BaseModel):
+    role: UserRole | None = None
+    email_prefix: str | None = None
+
+    model_config = ConfigDict(
+        from_attributes=True, populate_by_name=True, alias_generator=to_camel
+    )
@@ -0,0 +1,24 @@
+from datetime import datetime
+
+from pydantic import BaseModel, ConfigDict
+from pydantic.alias_generators import to_camel
+
+
+class WebhookInboxEventSchema(BaseModel):
+    id: int
+    payload: dict
+    attempts: int
+    created_at: datetime
+
+    model_config = ConfigDict(
+        from_attributes=True, populate_by_name=True, alias_generator=to_camel
+    )
+
+
+class WebhookInboxStatsSchema(BaseModel):
+    depth: int
+    lag_seconds: float
+
+    model_config = ConfigDict(
+        from_attributes=True, populate_by_name=True, alias_generator=to_camel
+    )
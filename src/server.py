@@ -0,0 +1,119 @@
+"""
+Продакшен-запуск приложения: несколько процессов uvicorn с настройками из Config.
+
+    python -m src.server
+
+Число воркеров — SERVER_WORKERS или число доступных CPU. Пул соединений каждого
+воркера урезается так, чтобы все воркеры вместе не превысили DB_MAX_CONNECTIONS
+за вычетом DB_RESERVED_CONNECTIONS; размеры передаются воркерам через окружение
+и выставляются в config текущего процесса (до импорта src.main).
+Метрики воркеров сводятся через каталог снимков METRICS_MULTIPROCESS_DIR, так что
+/metrics любого воркера описывает весь сервер.
+uvloop и httptools используются, если установлены. По SIGTERM воркеры перестают
+принимать соединения, дожидаются начатых запросов (не дольше
+SERVER_GRACEFUL_SHUTDOWN_SECONDS) и останавливают фоновые обработчики в lifespan.
+"""
+import importlib.util
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import uvicorn
+
+from src.config import config
+
+logger = logging.getLogger(__name__)
+
+
+def get_worker_count() -> int:
+    if config.SERVER_WORKERS > 0:
+        return config.SERVER_WORKERS
+    # учитывает привязку процесса к CPU (taskset, cpuset), в отличие от os.cpu_count()
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def get_pool_limits(workers: int) -> tuple[int, int]:
+    """
+    Размер пула и переполнения на воркер в пределах бюджета соединений.
+
+    :return: (pool_size, max_overflow)
+    :raises ValueError: если бюджета не хватает даже на одно соединение на воркер
+    """
+    budget = config.DB_MAX_CONNECTIONS - config.DB_RESERVED_CONNECTIONS
+    per_worker = budget // workers
+    if per_worker < 1:
+        raise ValueError(
+            f"{workers} воркерам не хватает соединений: "
+            f"DB_MAX_CONNECTIONS={config.DB_MAX_CONNECTIONS}, DB_RESERVED_CONNECTIONS={config.DB_RESERVED_CONNECTIONS}"
+        )
+    pool_size = min(config.DB_POOL_SIZE, per_worker)
+    max_overflow = min(config.DB_MAX_OVERFLOW, per_worker - pool_size)
+    return pool_size, max_overflow
+
+
+def prepare_metrics_directory() -> Path:
+    """
+    Каталог снимков метрик для воркеров: METRICS_MULTIPROCESS_DIR или новый временный.
+    Снимки прошлого запуска удаляются, иначе их счётчики попали бы в сумму.
+    """
+    directory = config.METRICS_MULTIPROCESS_DIR
+    if directory is None:
+        directory = Path(tempfile.mkdtemp(prefix="metrics-"))
+    directory.mkdir(parents=True, exist_ok=True)
+    for snapshot in directory.glob("*.json"):
+        snapshot.unlink()
+    os.environ["METRICS_MULTIPROCESS_DIR"] = str(directory)
+    config.METRICS_MULTIPROCESS_DIR = directory
+    return directory
+
+
+def main() -> None:
+    logging.basicConfig(level=config.LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    workers = get_worker_count()
+    pool_size, max_overflow = get_pool_limits(workers)
+    # воркеры — отдельные процессы и читают Config заново, переменные окружения важнее .env;
+    # при одном воркере приложение импортируется в этом же процессе с уже созданным config
+    os.environ["DB_POOL_SIZE"] = str(pool_size)
+    os.environ["DB_MAX_OVERFLOW"] = str(max_overflow)
+    config.DB_POOL_SIZE = pool_size
+    config.DB_MAX_OVERFLOW = max_overflow
+
+    temporary_metrics = workers > 1 and config.METRICS_MULTIPROCESS_DIR is None
+    if workers > 1:
+        prepare_metrics_directory()
+
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+    http = "httptools" if importlib.util.find_spec("httptools") else "h11"
+    logger.info(
+        "🚀 Запуск %s воркеров на %s:%s (loop=%s, http=%s), пул БД на воркер: %s + %s",
+        workers, config.SERVER_HOST, config.SERVER_PORT, loop, http, pool_size, max_overflow,
+    )
+
+    try:
+        uvicorn.run(
+            "src.main:app",
+            host=config.SERVER_HOST,
+            port=config.SERVER_PORT,
+            workers=workers,
+            loop=loop,
+            http=http,
+            backlog=config.SERVER_BACKLOG,
+            timeout_keep_alive=config.SERVER_KEEP_ALIVE_SECONDS,
+            limit_concurrency=config.SERVER_LIMIT_CONCURRENCY,
+            timeout_graceful_shutdown=config.SERVER_GRACEFUL_SHUTDOWN_SECONDS,
+            # логирование воркеров настраивает create_app, записи uvicorn идут туда же
+            log_config=None,
+            proxy_headers=True,
+        )
+    finally:
+        if temporary_metrics:
+            shutil.rmtree(config.METRICS_MULTIPROCESS_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,44 +1,63 @@
+from typing import TypeVar
+
+from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.models import AccountModel
-from src.schemas.account_schemas import AccountReadSchema, AccountCreateSchema
+from src.config import config
+from src.enums.balance_mode import BalanceMode
+from src.schemas.account_schemas import AccountReadSchema
 from src.repositories.account_repositories import AccountRepositories
 
+SchemaT = TypeVar("SchemaT", bound=BaseModel)
 
 
 class AccountService:
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, balance_mode: BalanceMode | None = None):
         self.session = session
+        self.balance_mode = balance_mode or config.BALANCE_MODE
         self.account_repositories = AccountRepositories(self.session)
 
-    async def get_accounts_by_user_id(self, user_id: int) -> list[AccountReadSchema]:
-        accounts =  await self.account_repositories.find_by_user_id(user_id)
-
-        return[
-            AccountReadSchema.model_validate(account)
-        for account in accounts
-        ]
-
-    async def get_by_account_user_pair(self, account_id: int, user_id: int) -> AccountReadSchema | None:
-        account = await self.account_repositories.find_by_id_user_id_pair(find_id=account_id, user_id=user_id)
-        if account:
-            return AccountReadSchema.model_validate(account)
-
-        return None
-
-    async def create(self, account: AccountCreateSchema) -> AccountReadSchema:
-        _new_account = AccountModel(
-            user_id=account.user_id,
-            balance=account.balance,
-        )
-        if account.id:
-            _new_account.id = account.id
+    async def get_accounts_by_user_id(
+            self,
+            user_id: int,
+            schema: type[SchemaT] = AccountReadSchema,
+    ) -> list[SchemaT]:
+        """
+        Счета пользователя с текущим балансом.
+
+        :param schema: схема с полями id, user_id, balance, в которую собираются строки;
+            вызывающий может сразу получить схему ответа
+        """
+        if self.balance_mode == BalanceMode.LEDGER:
+            accounts = await self.account_repositories.find_with_pending_by_user_id(user_id)
+        elif self.balance_mode == BalanceMode.SHARDED:
+            accounts = await self.account_repositories.find_with_shards_by_user_id(user_id)
+        else:
+            accounts = await self.account_repositories.find_by_user_id(user_id)
+
+        # Строки из БД уже имеют типы схемы: собираем без повторной валидации
+        return [schema.model_construct(**account._mapping) for account in accounts]
+
+    async def compact_balances(self, limit: int) -> int:
+        """
+        Свернуть до limit дельт из журнала в балансы счетов (режим ledger).
+
+        :return: число свёрнутых дельт; 0, если свёртку сейчас выполняет другой процесс
+        """
+        if not await self.account_repositories.try_lock_balance_compaction():
+            await self.session.rollback()
+            return 0
+        compacted = await self.account_repositories.compact_balance_deltas(limit)
+        await self.session.commit()
+        return compacted
 
-        _new_account = await self.account_repositories.create(_new_account)
+    async def collapse_balance_shards(self, account_id: int) -> AccountReadSchema | None:
+        """
+        Свернуть подстроки баланса счёта в accounts.balance (режим sharded).
+        Убирает подстроки сверх BALANCE_SHARDS после его уменьшения и нужна перед сменой BALANCE_MODE.
 
+        :return: счёт после свёртки или None, если счёта нет
+        """
+        account = await self.account_repositories.collapse_balance_shards(account_id)
         await self.session.commit()
-        return AccountReadSchema.model_validate(_new_account)
-
-    async def update_balance(self, account_id: int, delta: float) -> None:
-        await self.account_repositories.update_balance_delta(account_id, delta)
-        await self.session.commit()
\ No newline at end of file
+        return AccountReadSchema.model_validate(account) if account else None
@@ -1,36 +1,293 @@
-from src.models import PaymentModel
-from src.schemas.payment_schemas import PaymentReadSchema, PaymentCreateSchema
+import uuid
+from collections import defaultdict
+from collections.abc import AsyncIterator
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+
+from src.api.exceptions.payments_exceptions import TransactionDuplicateError, AccountOwnershipError
+from src.config import config
+from src.enums.balance_mode import BalanceMode
+from src.enums.payment_status import PaymentStatus
+from src.repositories.account_repositories import AccountRepositories
+from src.schemas.payment_schemas import PaymentReadSchema, PaymentCreateSchema, PaymentFilterSchema
 from src.repositories.payment_repositories import PaymentRepository
+from src.schemas.row_schemas import PaymentRow
+from src.utils.cache import TTLCache
 from sqlalchemy.ext.asyncio import AsyncSession
 
+# Платежи, которые точно есть в payments: transaction_id -> отпечаток (account_id, user_id,
+# сумма в копейках). Повтор webhook распознаётся без запроса к БД: совпавший отпечаток —
+# идемпотентный повтор, несовпавший — конфликт. Промах ничего не значит:
+# уникальный индекс остаётся окончательной проверкой, а сохранённый платеж — эталоном.
+recent_transactions: TTLCache[tuple[int, int, int]] = TTLCache(
+    name="recent_transactions",
+    maxsize=config.RECENT_TRANSACTIONS_MAX_SIZE,
+    ttl=config.RECENT_TRANSACTIONS_TTL_SECONDS,
+)
+
+CENT = Decimal("0.01")
+
 
 class PaymentService:
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, balance_mode: BalanceMode | None = None):
         self.session = session
+        self.balance_mode = balance_mode or config.BALANCE_MODE
         self.payment_repository = PaymentRepository(session)
+        self.account_repositories = AccountRepositories(session)
+
+    @staticmethod
+    def _to_schema(row: PaymentRow) -> PaymentReadSchema:
+        """Строка из БД уже в типах схемы — собирается без валидации"""
+        return PaymentReadSchema.model_construct(
+            id=row.id,
+            transaction_id=row.transaction_id,
+            amount=row.amount,
+            user_id=row.user_id,
+            account_id=row.account_id,
+            created_at=row.created_at,
+        )
+
+    async def get_page_by_user_id(
+            self,
+            user_id: int,
+            filters: PaymentFilterSchema,
+            limit: int,
+            after: tuple[datetime, int] | None = None,
+    ) -> list[PaymentReadSchema]:
+        rows = await self.payment_repository.find_page_by_user_id(
+            user_id=user_id, filters=filters, limit=limit, after=after
+        )
+        # Строки из БД уже имеют типы схемы: собираем без повторной валидации
+        return [PaymentReadSchema.model_construct(**row._mapping) for row in rows]
+
+    async def stream_by_user_id(
+            self,
+            user_id: int,
+            filters: PaymentFilterSchema,
+            chunk_size: int,
+    ) -> AsyncIterator[PaymentReadSchema]:
+        rows = await self.payment_repository.stream_by_user_id(
+            user_id=user_id, filters=filters, chunk_size=chunk_size
+        )
+        async for row in rows:
+            yield PaymentReadSchema.model_construct(**row._mapping)
 
-    async def get_by_user_id(self, user_id: int) -> list[PaymentReadSchema]:
-        payments =  await self.payment_repository.find_by_user_id(user_id)
-        return [
-            PaymentReadSchema.model_validate(payment)
-            for payment in payments
-        ]
     async def get_by_transaction_id(self, transaction_id: str) -> PaymentReadSchema | None :
 
         result = await self.payment_repository.find_by_transaction_id(transaction_id)
-        print("Result", result)
-        return PaymentReadSchema.model_validate(result) if result else None
+        return self._to_schema(result) if result else None
 
+    @staticmethod
+    def fingerprint(account_id: int, user_id: int, amount: float | Decimal) -> tuple[int, int, int]:
+        """
+        Отпечаток содержимого платежа для сравнения повтора с сохранённым.
+        Сумма округляется до копеек так же, как при записи в Numeric(12, 2).
+        """
+        cents = Decimal(str(amount)).quantize(CENT, rounding=ROUND_HALF_UP)
+        return account_id, user_id, int(cents * 100)
 
-    async def create(self, payment: PaymentCreateSchema) -> PaymentReadSchema:
-        payment_model = PaymentModel(
-            user_id=payment.user_id,
-            amount=payment.amount,
+    async def warm_recent_transactions(self, limit: int) -> int:
+        """Загрузить последние limit платежей в recent_transactions"""
+        limit = min(limit, recent_transactions.maxsize)
+        payments = await self.payment_repository.find_recent(limit)
+        # от старых к новым, чтобы самые свежие оказались последними в LRU
+        for transaction_id, account_id, user_id, amount in reversed(payments):
+            recent_transactions.set(transaction_id, self.fingerprint(account_id, user_id, amount))
+        return len(payments)
+
+    @staticmethod
+    def is_recent_duplicate(transaction_id: uuid.UUID) -> bool:
+        """True, если transaction_id точно уже сохранён; False — неизвестно"""
+        return recent_transactions.get(transaction_id) is not None
+
+    def recent_retry_status(self, payment: PaymentCreateSchema) -> PaymentStatus | None:
+        """
+        Статус платежа по recent_transactions без запросов к БД.
+
+        :return: DUPLICATE — повтор сохранённого платежа, CONFLICT — transaction_id
+            занят платежом с другим содержимым, None — transaction_id в кэше нет
+        """
+        stored = recent_transactions.get(payment.transaction_id)
+        if stored is None:
+            return None
+        if stored == self.fingerprint(payment.account_id, payment.user_id, payment.amount):
+            return PaymentStatus.DUPLICATE
+        return PaymentStatus.CONFLICT
+
+    async def is_identical_retry(self, payment: PaymentCreateSchema) -> bool:
+        """
+        Совпадает ли платеж с уже сохранённым под тем же transaction_id.
+        Отпечаток берётся из recent_transactions, а при промахе — из payments.
+
+        :return: True — повтор того же платежа, False — другой платеж или transaction_id не найден
+        """
+        stored = recent_transactions.get(payment.transaction_id)
+        if stored is None:
+            existing = await self.payment_repository.find_by_transaction_id(payment.transaction_id)
+            if existing is None:
+                return False
+            stored = self.fingerprint(existing.account_id, existing.user_id, existing.amount)
+            recent_transactions.set(payment.transaction_id, stored)
+        return stored == self.fingerprint(payment.account_id, payment.user_id, payment.amount)
+
+    def _remember(self, payment: PaymentCreateSchema) -> None:
+        recent_transactions.set(
+            payment.transaction_id, self.fingerprint(payment.account_id, payment.user_id, payment.amount)
+        )
+
+    async def create_with_balance(self, payment: PaymentCreateSchema) -> tuple[PaymentReadSchema, bool]:
+        """
+        Сохраняет платеж и обновляет баланс счёта в одной транзакции с одним коммитом.
+
+        :return: созданный платеж и признак того, что счёт был создан
+        :raises TransactionDuplicateError: если transaction_id уже использовался
+        :raises AccountOwnershipError: если счёт принадлежит другому пользователю
+        """
+        if self.is_recent_duplicate(payment.transaction_id):
+            raise TransactionDuplicateError(str(payment.transaction_id))
+        if self.balance_mode != BalanceMode.IN_PLACE:
+            return await self._create_without_account_lock(payment)
+
+        row = await self.payment_repository.create_with_balance(
             transaction_id=payment.transaction_id,
+            amount=payment.amount,
+            user_id=payment.user_id,
             account_id=payment.account_id,
+        )
+        if row is None:
+            await self.session.rollback()
+            raise TransactionDuplicateError(str(payment.transaction_id))
+        if row.created is None:
+            await self.session.rollback()
+            raise AccountOwnershipError(account_id=payment.account_id, user_id=payment.user_id)
+
+        await self.session.commit()
+        self._remember(payment)
+        return PaymentReadSchema.model_validate(row), row.created
 
+    async def _create_without_account_lock(self, payment: PaymentCreateSchema) -> tuple[PaymentReadSchema, bool]:
+        """
+        create_with_balance для режимов ledger и sharded: вместо UPDATE счёта пишется
+        дельта в журнал или в подстроку баланса, поэтому платежи на один счёт
+        не ждут друг друга на блокировке его строки.
+        """
+        # Отдельным запросом: если счёт параллельно создаёт другая транзакция, INSERT дождётся
+        # её коммита, и следующий запрос увидит счёт в своём снимке
+        created = await self.account_repositories.create_if_missing(
+            account_id=payment.account_id, user_id=payment.user_id
         )
-        new_payment = await self.payment_repository.create(payment_model)
+        if self.balance_mode == BalanceMode.SHARDED:
+            row = await self.payment_repository.create_with_balance_shard(
+                transaction_id=payment.transaction_id,
+                amount=payment.amount,
+                user_id=payment.user_id,
+                account_id=payment.account_id,
+                shard=self.balance_shard(payment.transaction_id),
+            )
+        else:
+            row = await self.payment_repository.create_with_ledger_delta(
+                transaction_id=payment.transaction_id,
+                amount=payment.amount,
+                user_id=payment.user_id,
+                account_id=payment.account_id,
+            )
+        if row is None or row.owner_id != payment.user_id:
+            await self.session.rollback()
+            raise AccountOwnershipError(account_id=payment.account_id, user_id=payment.user_id)
+        if row.id is None:
+            await self.session.rollback()
+            raise TransactionDuplicateError(str(payment.transaction_id))
+
         await self.session.commit()
-        return PaymentReadSchema.model_validate(new_payment)
+        self._remember(payment)
+        return PaymentReadSchema.model_validate(row), created
 
+    @staticmethod
+    def balance_shard(transaction_id: uuid.UUID) -> int:
+        """Подстрока баланса для платежа: transaction_id — случайный UUID, поэтому распределение равномерное"""
+        return transaction_id.int % config.BALANCE_SHARDS
+
+    async def create_many(self, payments: list[PaymentCreateSchema]) -> dict[uuid.UUID, PaymentStatus]:
+        """
+        Сохраняет пачку платежей одной транзакцией.
+
+        Недавно виденные transaction_id сразу получают статус DUPLICATE (или CONFLICT,
+        если содержимое отличается от сохранённого) без запросов к БД.
+        Недостающие счета создаются, платежи на чужие счета отбрасываются,
+        платежи вставляются executemany с пропуском существующих transaction_id
+        (пропущенные сравниваются с сохранёнными: DUPLICATE или CONFLICT),
+        баланс каждого счёта обновляется один раз на суммарную дельту
+        (в режиме ledger дельта записывается в журнал, в режиме sharded —
+        по одной суммарной дельте на подстроку).
+
+        :param payments: платежи с уникальными в пределах пачки transaction_id
+        :return: статус каждого платежа по transaction_id
+        """
+        statuses: dict[uuid.UUID, PaymentStatus] = {}
+        fresh: list[PaymentCreateSchema] = []
+        for payment in payments:
+            status = self.recent_retry_status(payment)
+            if status is None:
+                fresh.append(payment)
+            else:
+                statuses[payment.transaction_id] = status
+        payments = fresh
+        if not payments:
+            return statuses
+
+        requested_accounts: dict[int, int] = {}
+        for payment in payments:
+            requested_accounts.setdefault(payment.account_id, payment.user_id)
+        await self.account_repositories.create_missing(requested_accounts)
+        owners = await self.account_repositories.find_owners(list(requested_accounts))
+
+        rows = []
+        for payment in payments:
+            if owners.get(payment.account_id) != payment.user_id:
+                statuses[payment.transaction_id] = PaymentStatus.ACCOUNT_MISMATCH
+                continue
+            statuses[payment.transaction_id] = PaymentStatus.DUPLICATE
+            rows.append({
+                "transaction_id": payment.transaction_id,
+                "amount": payment.amount,
+                "user_id": payment.user_id,
+                "account_id": payment.account_id,
+            })
+
+        deltas: dict[int, Decimal] = defaultdict(Decimal)
+        shard_deltas: dict[tuple[int, int], Decimal] = defaultdict(Decimal)
+        if rows:
+            for transaction_id, account_id, amount in await self.payment_repository.create_many(rows):
+                statuses[transaction_id] = PaymentStatus.ACCEPTED
+                if self.balance_mode == BalanceMode.SHARDED:
+                    shard_deltas[account_id, self.balance_shard(transaction_id)] += amount
+                else:
+                    deltas[account_id] += amount
+        # transaction_id, уже занятые в БД: повтор того же платежа или конфликт.
+        # Сохранённые платежи читаются одним запросом, отпечатки сравниваются в памяти
+        skipped = [payment for payment in payments if statuses[payment.transaction_id] == PaymentStatus.DUPLICATE]
+        if skipped:
+            stored: dict[uuid.UUID, tuple[int, int, int]] = {}
+            for transaction_id, account_id, user_id, amount in await self.payment_repository.find_fingerprints(
+                    [payment.transaction_id for payment in skipped]
+            ):
+                stored[transaction_id] = self.fingerprint(account_id, user_id, amount)
+                recent_transactions.set(transaction_id, stored[transaction_id])
+            for payment in skipped:
+                if stored.get(payment.transaction_id) != self.fingerprint(
+                        payment.account_id, payment.user_id, payment.amount
+                ):
+                    statuses[payment.transaction_id] = PaymentStatus.CONFLICT
+
+        if shard_deltas:
+            await self.account_repositories.add_balance_shard_deltas(shard_deltas)
+        elif deltas and self.balance_mode == BalanceMode.LEDGER:
+            await self.account_repositories.add_balance_deltas(deltas)
+        elif deltas:
+            await self.account_repositories.update_balance_deltas(deltas)
+
+        await self.session.commit()
+        for payment in payments:
+            if statuses[payment.transaction_id] == PaymentStatus.ACCEPTED:
+                self._remember(payment)
+        return statuses
@@ -1,24 +1,91 @@
 from src.schemas.auth_schemas import UserAuthSchema
 from src.models.user_model import UserModel
 from src.repositories.user_repositories import UserRepository
+from src.schemas.row_schemas import UserRow
 from src.schemas.user_shemas import (
     UserCreateSchema,
     UserUpdateSchema,
-    UserReadSchema
+    UserReadSchema,
+    UserFilterSchema,
 )
+from typing import TypeVar
+
+from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.config import config
+from src.enums.count_mode import CountMode
+from src.utils.cache import TTLCache
+
+# Кэш пользователей по id. Процессный: изменения через UserService
+# сбрасывают запись сразу, в остальных процессах — не позже TTL.
+user_cache: TTLCache[UserReadSchema] = TTLCache(
+    name="users",
+    maxsize=config.USER_CACHE_MAX_SIZE,
+    ttl=config.USER_CACHE_TTL_SECONDS,
+)
+
+# Версии токенов для stateless-режима. Источник правды — users.token_version,
+# общий для всех процессов: изменение через UserService сбрасывает запись сразу,
+# в остальных процессах старые токены перестают приниматься не позже TTL.
+token_versions: TTLCache[int] = TTLCache(
+    name="token_versions",
+    maxsize=config.USER_CACHE_MAX_SIZE,
+    ttl=config.TOKEN_VERSION_CACHE_TTL_SECONDS,
+)
+# версия удалённого пользователя: не совпадает ни с одним выпущенным токеном
+DELETED_TOKEN_VERSION = -1
+
+SchemaT = TypeVar("SchemaT", bound=BaseModel)
+
+
 class UserService:
     def __init__(self, session: AsyncSession):
         self.session = session
         self.user_repository = UserRepository(session)
 
-    async def get(self) ->list[UserReadSchema]:
-        accounts = await self.user_repository.find()
-        return [
-            UserReadSchema.model_validate(account)
-            for account in accounts
-        ]
+    async def get_page(
+            self,
+            filters: UserFilterSchema,
+            limit: int,
+            after_id: int | None = None,
+            schema: type[SchemaT] = UserReadSchema,
+    ) -> list[SchemaT]:
+        """
+        Страница пользователей по возрастанию id.
+
+        :param schema: в какую схему собрать строки — вызывающий может сразу
+            получить схему ответа, без промежуточного UserReadSchema
+        """
+        users = await self.user_repository.find_page(filters=filters, limit=limit, after_id=after_id)
+        # Строки из БД уже имеют типы схемы: собираем без повторной валидации
+        return [schema.model_construct(**user._mapping) for user in users]
+
+    async def count(self, filters: UserFilterSchema, mode: CountMode) -> tuple[int | None, bool]:
+        """
+        Число пользователей под фильтрами.
+
+        В режиме ESTIMATED без фильтров берётся pg_class.reltuples, с фильтрами —
+        точный счёт до USERS_COUNT_EXACT_LIMIT строк, а выше — оценка планировщика.
+
+        :return: (total, является ли total оценкой)
+        """
+        if mode == CountMode.NONE:
+            return None, False
+        if mode == CountMode.EXACT:
+            return await self.user_repository.count(filters), False
+
+        if filters.role is None and not filters.email_prefix:
+            estimate = await self.user_repository.estimate_total()
+            if estimate is not None:
+                return estimate, True
+            return await self.user_repository.count(filters), False
+
+        limit = config.USERS_COUNT_EXACT_LIMIT
+        total = await self.user_repository.count(filters, limit=limit + 1)
+        if total <= limit:
+            return total, False
+        return max(await self.user_repository.estimate_count(filters), total), True
 
     async def create(self, user: UserCreateSchema) -> UserReadSchema:
         _user = UserModel(**user.model_dump())
@@ -26,18 +93,38 @@ class UserService:
         await self.session.commit()
         return UserReadSchema.model_validate(_user)
 
+    @staticmethod
+    def _to_schema(row: UserRow) -> UserReadSchema:
+        """Строка из БД уже в типах схемы — собирается без валидации"""
+        return UserReadSchema.model_construct(
+            id=row.id, email=row.email, full_name=row.full_name, role=row.role
+        )
+
     async def get_by_email(self, email: str) -> UserReadSchema | None:
         user = await self.user_repository.find_by_email(email)
         if user is None:
             return None
-        return UserReadSchema.model_validate(user)
+        return self._to_schema(user)
     async def get_by_id(self, user_id: int) -> UserReadSchema | None:
+        cached_user = user_cache.get(user_id)
+        if cached_user is not None:
+            return cached_user
+
         user = await self.user_repository.find_by_id(user_id)
-        return UserReadSchema.model_validate(user) if user else None
+        if user is None:
+            return None
+        user = self._to_schema(user)
+        user_cache.set(user_id, user)
+        return user
 
     async def get_user_with_password(self, email: str) -> UserAuthSchema:
-        user = await self.user_repository.find_by_email(email)
-        return UserAuthSchema.model_validate(user) if user else None
+        user = await self.user_repository.find_auth_by_email(email)
+        if user is None:
+            return None
+        return UserAuthSchema.model_construct(
+            id=user.id, email=user.email, hashed_password=user.hashed_password, role=user.role,
+            token_version=user.token_version,
+        )
 
     async def update(self, user_id: int, user: UserUpdateSchema) -> UserReadSchema:
 
@@ -45,10 +132,33 @@ class UserService:
             k: v for k, v in user.model_dump(exclude_unset=True).items()
             if v is not None
         }
-        user = await self.user_repository.update(user_id=user_id, **update_data)
+        # ранее выпущенные токены перестают приниматься во всех процессах
+        user = await self.user_repository.update(
+            user_id=user_id, token_version=UserModel.token_version + 1, **update_data
+        )
         await self.session.commit()
+        user_cache.invalidate(user_id)
+        token_versions.invalidate(user_id)
         return UserReadSchema.model_validate(user)
 
+    async def get_token_version(self, user_id: int) -> int:
+        """Версия токенов пользователя; для удалённого — DELETED_TOKEN_VERSION"""
+        token_version = token_versions.get(user_id)
+        if token_version is not None:
+            return token_version
+
+        token_version = await self.user_repository.find_token_version(user_id)
+        if token_version is None:
+            token_version = DELETED_TOKEN_VERSION
+        token_versions.set(user_id, token_version)
+        return token_version
+
+    async def update_password_hash(self, user_id: int, hashed_password: str) -> None:
+        await self.user_repository.update(user_id=user_id, hashed_password=hashed_password)
+        await self.session.commit()
+
     async def delete(self, user_id: int) -> None:
         await self.user_repository.delete_by_id(user_id)
         await self.session.commit()
+        user_cache.invalidate(user_id)
+        token_versions.invalidate(user_id)
@@ -0,0 +1,39 @@
+from datetime import datetime, timedelta, UTC
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.repositories.webhook_inbox_repositories import WebhookInboxRepository
+from src.schemas.webhook_inbox_schemas import WebhookInboxEventSchema, WebhookInboxStatsSchema
+
+
+class WebhookInboxService:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self.inbox_repository = WebhookInboxRepository(session)
+
+    async def enqueue(self, payload: dict) -> int:
+        event = await self.inbox_repository.create(payload)
+        await self.session.commit()
+        return event.id
+
+    async def claim(self, limit: int, visibility_timeout: timedelta) -> list[WebhookInboxEventSchema]:
+        events = await self.inbox_repository.claim(limit, visibility_timeout)
+        await self.session.commit()
+        return [WebhookInboxEventSchema.model_validate(event) for event in events]
+
+    async def complete(self, event_ids: list[int]) -> None:
+        await self.inbox_repository.delete_by_ids(event_ids)
+        await self.session.commit()
+
+    async def fail(self, event_ids: list[int], error: str) -> None:
+        await self.inbox_repository.mark_failed(event_ids, error)
+        await self.session.commit()
+
+    async def retry_later(self, event_ids: list[int], error: str) -> None:
+        await self.inbox_repository.set_error(event_ids, error)
+        await self.session.commit()
+
+    async def get_stats(self) -> WebhookInboxStatsSchema:
+        depth, oldest = await self.inbox_repository.get_pending_stats()
+        lag = (datetime.now(UTC) - oldest).total_seconds() if oldest else 0.0
+        return WebhookInboxStatsSchema(depth=depth, lag_seconds=max(lag, 0.0))
@@ -0,0 +1,61 @@
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Generic, TypeVar
+
+from src.helpers.metrics import registry
+
+V = TypeVar("V")
+
+CACHE_REQUESTS = registry.counter(
+    "cache_requests_total", "Обращения к внутрипроцессным кэшам", ["cache", "result"]
+)
+
+
+class TTLCache(Generic[V]):
+    """
+    Ограниченный по размеру LRU-кэш с временем жизни записей.
+
+    Предназначен для однопоточного использования из event loop.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        """
+        :param name: имя кэша для метрик
+        :param maxsize: максимальное число записей
+        :param ttl: время жизни записи в секундах
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, V]] = OrderedDict()
+        self._hits = CACHE_REQUESTS.labels(name, "hit")
+        self._misses = CACHE_REQUESTS.labels(name, "miss")
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> V | None:
+        item = self._data.get(key)
+        if item is not None:
+            expires_at, value = item
+            if expires_at > time.monotonic():
+                self._data.move_to_end(key)
+                self._hits.inc()
+                return value
+            del self._data[key]
+        self._misses.inc()
+        return None
+
+    def set(self, key: Hashable, value: V) -> None:
+        if self.maxsize <= 0:
+            return
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
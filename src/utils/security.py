@@ -1,9 +1,72 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable
+
 from passlib.context import CryptContext
+from passlib.hash import argon2
+
+from src.config import config
+from src.helpers.metrics import registry
+
+
+def create_password_context(
+        schemes: list[str],
+        bcrypt_rounds: int = config.PASSWORD_BCRYPT_ROUNDS,
+        argon2_time_cost: int = config.PASSWORD_ARGON2_TIME_COST,
+        argon2_memory_cost: int = config.PASSWORD_ARGON2_MEMORY_COST,
+        argon2_parallelism: int = config.PASSWORD_ARGON2_PARALLELISM,
+) -> CryptContext:
+    """
+    Контекст хэширования паролей.
+
+    Первая схема используется для новых хэшей, остальные только проверяются
+    и считаются устаревшими. Хэши с другой стоимостью bcrypt тоже устаревшие,
+    поэтому смена настроек применяется при следующем входе пользователя.
 
-pwd_context = CryptContext(
-    schemes=["bcrypt"],
-    deprecated="auto"
+    :raises RuntimeError: argon2 указан в схемах, но argon2-cffi не установлен
+    """
+    if "argon2" in schemes and not argon2.has_backend():
+        # passlib упал бы только на первом хэшировании или входе — проверяем при старте
+        raise RuntimeError(
+            "Схема argon2 в PASSWORD_HASH_SCHEMES требует argon2-cffi: poetry install --extras argon2"
+        )
+    settings = {}
+    if "bcrypt" in schemes:
+        settings.update(
+            bcrypt__default_rounds=bcrypt_rounds,
+            bcrypt__min_rounds=bcrypt_rounds,
+            bcrypt__max_rounds=bcrypt_rounds,
+        )
+    if "argon2" in schemes:
+        settings.update(
+            argon2__type="ID",
+            argon2__rounds=argon2_time_cost,
+            argon2__memory_cost=argon2_memory_cost,
+            argon2__parallelism=argon2_parallelism,
+        )
+    return CryptContext(schemes=schemes, deprecated="auto", **settings)
+
+
+pwd_context = create_password_context(config.PASSWORD_HASH_SCHEMES)
+
+PASSWORD_HASH_QUEUE_TIME = registry.histogram(
+    "password_hash_queue_seconds",
+    "Ожидание свободного обработчика хэширования паролей",
+    ["operation"],
 )
+PASSWORD_HASH_DURATION = registry.histogram(
+    "password_hash_duration_seconds",
+    "Время хэширования/проверки пароля в обработчике",
+    ["operation"],
+)
+_HASH_QUEUE_TIME = PASSWORD_HASH_QUEUE_TIME.labels("hash")
+_HASH_DURATION = PASSWORD_HASH_DURATION.labels("hash")
+_VERIFY_QUEUE_TIME = PASSWORD_HASH_QUEUE_TIME.labels("verify")
+_VERIFY_DURATION = PASSWORD_HASH_DURATION.labels("verify")
+
+_executor: Executor | None = None
+
 
 def hash_password(password: str) -> str:
     """Хэширование пароля"""
@@ -13,3 +76,53 @@ def verify_password(password: str, hashed_password: str) -> bool:
     """Проверка пароля"""
     return pwd_context.verify(password, hashed_password)
 
+def verify_and_update_password(password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """Проверка пароля; для устаревшего хэша возвращает новый хэш по текущей схеме"""
+    return pwd_context.verify_and_update(password, hashed_password)
+
+
+def _get_executor() -> Executor:
+    """Пул для хэширования паролей; число обработчиков ограничивает параллелизм"""
+    global _executor
+    if _executor is None:
+        if config.PASSWORD_HASH_EXECUTOR == "process":
+            _executor = ProcessPoolExecutor(max_workers=config.PASSWORD_HASH_WORKERS)
+        else:
+            _executor = ThreadPoolExecutor(
+                max_workers=config.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+            )
+    return _executor
+
+def shutdown_password_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+
+def _timed(func: Callable[..., Any], *args: Any) -> tuple[Any, float]:
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+async def _run_in_executor(queue_time, duration, func: Callable[..., Any], *args: Any) -> Any:
+    started = time.perf_counter()
+    result, elapsed = await asyncio.get_running_loop().run_in_executor(
+        _get_executor(), _timed, func, *args
+    )
+    duration.observe(elapsed)
+    queue_time.observe(max(time.perf_counter() - started - elapsed, 0.0))
+    return result
+
+async def hash_password_async(password: str) -> str:
+    """Хэширование пароля в пуле, не блокируя event loop"""
+    return await _run_in_executor(_HASH_QUEUE_TIME, _HASH_DURATION, hash_password, password)
+
+async def verify_password_async(password: str, hashed_password: str) -> bool:
+    """Проверка пароля в пуле, не блокируя event loop"""
+    return await _run_in_executor(_VERIFY_QUEUE_TIME, _VERIFY_DURATION, verify_password, password, hashed_password)
+
+async def verify_and_update_password_async(password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """verify_and_update_password в пуле, не блокируя event loop"""
+    return await _run_in_executor(
+        _VERIFY_QUEUE_TIME, _VERIFY_DURATION, verify_and_update_password, password, hashed_password
+    )
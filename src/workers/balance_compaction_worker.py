@@ -0,0 +1,73 @@
+import asyncio
+import logging
+import time
+
+from src.helpers.helper import get_session
+from src.helpers.metrics import registry
+from src.services.account_service import AccountService
+
+logger = logging.getLogger(__name__)
+
+COMPACTED = registry.counter(
+    "balance_deltas_compacted_total", "Дельты балансов, свёрнутые в accounts.balance"
+)
+COMPACTION_ERRORS = registry.counter(
+    "balance_compaction_errors_total", "Прогоны свёртки балансов, завершившиеся ошибкой"
+)
+COMPACTION_DURATION = registry.histogram(
+    "balance_compaction_duration_seconds",
+    "Длительность одного прогона свёртки балансов",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+
+class BalanceCompactionWorker:
+    """
+    Фоновая свёртка журнала account_balance_deltas в accounts.balance (режим ledger).
+
+    Раз в interval секунд переносит накопившиеся дельты в снимок баланса; пока
+    дельт больше batch_size, повторяет прогоны без паузы. Между процессами
+    свёртка сериализована advisory-блокировкой.
+    """
+
+    def __init__(self, interval: float, batch_size: int):
+        self.interval = interval
+        self.batch_size = batch_size
+        self._stopping = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        logger.info("🚀 Запуск свёртки балансов раз в %s с", self.interval)
+        self._stopping.clear()
+        self._task = asyncio.create_task(self._run(), name="balance-compaction")
+
+    async def stop(self) -> None:
+        """Остановить свёртку, дождавшись завершения текущего прогона"""
+        self._stopping.set()
+        if self._task:
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        logger.info("🛑 Свёртка балансов остановлена")
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                compacted = await self._compact()
+            except Exception:
+                COMPACTION_ERRORS.inc()
+                logger.exception("❌ Ошибка свёртки балансов")
+                compacted = 0
+
+            if compacted < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.interval)
+                except TimeoutError:
+                    pass
+
+    async def _compact(self) -> int:
+        started = time.perf_counter()
+        async with get_session() as session:
+            compacted = await AccountService(session).compact_balances(self.batch_size)
+        COMPACTION_DURATION.observe(time.perf_counter() - started)
+        COMPACTED.inc(compacted)
+        return compacted
@@ -0,0 +1,47 @@
+import asyncio
+import logging
+
+from src.helpers.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsSnapshotWriter:
+    """
+    Периодический снимок метрик процесса для сборки /metrics по всем воркерам.
+
+    Раз в interval секунд обновляет метрики процесса (без общих, из БД) и пишет
+    снимок в каталог registry; при остановке пишет последний снимок, чтобы
+    счётчики завершившегося воркера остались в сумме.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._stopping = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self._stopping.clear()
+        self._task = asyncio.create_task(self._run(), name="metrics-snapshot-writer")
+
+    async def stop(self) -> None:
+        self._stopping.set()
+        if self._task:
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self._write()
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.interval)
+            except TimeoutError:
+                await self._write()
+
+    @staticmethod
+    async def _write() -> None:
+        try:
+            await registry.collect(shared=False)
+            registry.write_snapshot()
+        except Exception:
+            logger.exception("❌ Не удалось записать снимок метрик")
@@ -0,0 +1,83 @@
+import asyncio
+import logging
+import signal
+from pathlib import Path
+
+from src.api.payments.service.signature_service import SignatureService
+
+logger = logging.getLogger(__name__)
+
+
+class SignatureKeyringWatcher:
+    """
+    Перезагрузка ключей подписи webhook без рестарта.
+
+    Файл ключей перечитывается по SIGHUP и, если interval > 0, при изменении
+    его mtime (проверка раз в interval секунд). Опрос нужен для процессов,
+    до которых SIGHUP не доходит, например воркеров под менеджером процессов.
+    """
+
+    def __init__(self, service: SignatureService, path: Path, interval: float):
+        self.service = service
+        self.path = path
+        self.interval = interval
+        self._mtime = self._current_mtime()
+        self._stopping = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._sighup = False
+
+    def start(self) -> None:
+        logger.info("🚀 Отслеживание ключей подписи webhook: %s", self.path)
+        self._stopping.clear()
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, self.reload)
+            self._sighup = True
+        except (AttributeError, NotImplementedError, RuntimeError):
+            # SIGHUP нет на Windows, а обработчики сигналов ставятся только в главном потоке
+            logger.warning("⚠️ SIGHUP недоступен, ключи перечитываются только по изменению файла")
+        if self.interval > 0:
+            self._task = asyncio.create_task(self._run(), name="signature-keyring-watcher")
+
+    async def stop(self) -> None:
+        self._stopping.set()
+        if self._sighup:
+            asyncio.get_running_loop().remove_signal_handler(signal.SIGHUP)
+            self._sighup = False
+        if self._task:
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def reload(self) -> bool:
+        """
+        Перечитать файл ключей.
+
+        mtime запоминается только после успешной загрузки: если файл был записан
+        не до конца или с ошибкой, опрос повторит попытку на следующей проверке.
+
+        :return: удалось ли загрузить ключи
+        """
+        # mtime до чтения: запись, пришедшая во время загрузки, вызовет ещё одну
+        mtime = self._current_mtime()
+        try:
+            self.service.reload(self.path)
+        except Exception:
+            logger.exception("❌ Не удалось перечитать ключи подписи из %s, остаются прежние", self.path)
+            return False
+        self._mtime = mtime
+        return True
+
+    def _current_mtime(self) -> float | None:
+        try:
+            return self.path.stat().st_mtime
+        except OSError:
+            return None
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.interval)
+            except TimeoutError:
+                pass
+            mtime = self._current_mtime()
+            if mtime is not None and mtime != self._mtime:
+                self.reload()
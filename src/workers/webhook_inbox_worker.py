@@ -0,0 +1,161 @@
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, UTC
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.api.payments.payment_requests import PaymentBatchCreateRequest
+from src.api.payments.service.payments_api_service import PaymentApiService
+from src.enums.payment_status import PaymentStatus
+from src.helpers.helper import get_session
+from src.helpers.metrics import registry
+from src.schemas.webhook_inbox_schemas import WebhookInboxEventSchema
+from src.services.webhook_inbox_service import WebhookInboxService
+
+logger = logging.getLogger(__name__)
+
+# состояние очереди общее для всех воркеров: отдаёт процесс, ответивший на /metrics
+INBOX_DEPTH = registry.gauge(
+    "webhook_inbox_depth", "Число необработанных событий в webhook_inbox", multiprocess_mode="local"
+)
+INBOX_LAG = registry.gauge(
+    "webhook_inbox_lag_seconds", "Возраст самого старого необработанного события", multiprocess_mode="local"
+)
+PROCESSING_LAG = registry.histogram(
+    "webhook_inbox_processing_lag_seconds",
+    "Время от постановки события в очередь до его обработки",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0),
+)
+PROCESSED = registry.counter(
+    "webhook_inbox_processed_total", "Обработанные события webhook_inbox по статусу", ["status"]
+)
+PROCESSED_BY_STATUS = {status: PROCESSED.labels(status) for status in PaymentStatus}
+PROCESSING_ERRORS = registry.counter(
+    "webhook_inbox_errors_total", "События webhook_inbox, обработка которых завершилась ошибкой"
+)
+
+COMPLETED_STATUSES = (PaymentStatus.ACCEPTED, PaymentStatus.DUPLICATE)
+
+
+class WebhookInboxWorkerPool:
+    """
+    Пул фоновых обработчиков очереди webhook_inbox.
+
+    Каждый обработчик занимает пачку событий (SELECT ... FOR UPDATE SKIP LOCKED)
+    и записывает её через пакетный путь PaymentApiService.create_payments.
+    Параллелизм ограничен числом обработчиков.
+    """
+
+    def __init__(
+            self,
+            workers: int,
+            batch_size: int,
+            poll_interval: float,
+            visibility_timeout: timedelta,
+            max_attempts: int,
+    ):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self._stopping = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+
+    def start(self) -> None:
+        logger.info("🚀 Запуск %s обработчиков webhook_inbox", self.workers)
+        self._stopping.clear()
+        # запрос к БД только при ответе на /metrics, а не в каждом снимке воркера
+        registry.add_collector(self.refresh_metrics, shared=True)
+        self._tasks = [
+            asyncio.create_task(self._run(), name=f"webhook-inbox-worker-{number}")
+            for number in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        """Остановить обработчики, дождавшись завершения текущих пачек"""
+        self._stopping.set()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        registry.remove_collector(self.refresh_metrics)
+        logger.info("🛑 Обработчики webhook_inbox остановлены")
+
+    async def refresh_metrics(self) -> None:
+        async with get_session() as session:
+            stats = await WebhookInboxService(session).get_stats()
+        INBOX_DEPTH.set(stats.depth)
+        INBOX_LAG.set(stats.lag_seconds)
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                processed = await self._process_batch()
+            except Exception:
+                logger.exception("❌ Ошибка обработчика webhook_inbox")
+                processed = 0
+
+            if not processed:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+                except TimeoutError:
+                    pass
+
+    async def _process_batch(self) -> int:
+        async with get_session() as session:
+            events = await WebhookInboxService(session).claim(self.batch_size, self.visibility_timeout)
+            if not events:
+                return 0
+            await self._ingest(session, events)
+        return len(events)
+
+    async def _ingest(self, session: AsyncSession, events: list[WebhookInboxEventSchema]) -> None:
+        """
+        Записать события одной транзакцией.
+
+        Если пачка падает с исключением (например, IntegrityError из-за одного
+        некорректного события), она делится пополам и половины пишутся отдельно,
+        пока ошибка не сузится до одного события: попытки копит и в failed
+        уходит только оно, остальные события пачки записываются.
+        """
+        inbox_service = WebhookInboxService(session)
+        try:
+            result = await PaymentApiService(session).create_payments(
+                PaymentBatchCreateRequest(payments=[event.payload for event in events])
+            )
+        except Exception as e:
+            await session.rollback()
+            if len(events) == 1:
+                event = events[0]
+                PROCESSING_ERRORS.inc()
+                logger.exception("❌ Не удалось обработать событие webhook_inbox ID=%s", event.id)
+                if event.attempts >= self.max_attempts:
+                    await inbox_service.fail([event.id], repr(e))
+                else:
+                    await inbox_service.retry_later([event.id], repr(e))
+                return
+            logger.warning("⚠️ Пачка из %s событий не записана (%r), обрабатываем по частям", len(events), e)
+            result = None
+
+        if result is None:
+            middle = len(events) // 2
+            await self._ingest(session, events[:middle])
+            await self._ingest(session, events[middle:])
+            return
+
+        completed: list[int] = []
+        failed: dict[PaymentStatus, list[int]] = defaultdict(list)
+        now = datetime.now(UTC)
+        for event, item in zip(events, result.items):
+            if item.status in COMPLETED_STATUSES:
+                completed.append(event.id)
+            else:
+                failed[item.status].append(event.id)
+            PROCESSED_BY_STATUS[item.status].inc()
+            PROCESSING_LAG.observe((now - event.created_at).total_seconds())
+
+        if completed:
+            await inbox_service.complete(completed)
+        for status, event_ids in failed.items():
+            logger.warning("⚠️ %s событий webhook_inbox отклонено: %s", len(event_ids), status)
+            await inbox_service.fail(event_ids, status)
@@ -0,0 +1,34 @@
+import json
+import logging
+
+import pytest
+
+from src.helpers.logs import JsonFormatter, RedactingFilter, SecretRedactor
+
+REDACTOR = SecretRedactor(["signature", "password", "authorization"])
+
+
+@pytest.mark.parametrize(("text", "expected"), [
+    ("signature='abc def'", "signature='***'"),
+    ("password='p,w' user=x", "password='***' user=x"),
+    ('{"password": "p\\"w, x", "id": 1}', '{"password": "***", "id": 1}'),
+    ("password=abc, id=1", "password=***, id=1"),
+    ("password='abc", "password='***"),
+])
+def test_quoted_values_are_masked_up_to_closing_quote(text, expected):
+    assert REDACTOR(text) == expected
+
+
+def test_json_formatter_redacts_extra_fields():
+    record = logging.LogRecord("test", logging.INFO, __file__, 1, "webhook %s", ("ok",), None)
+    record.Signature = "abc def"
+    record.headers = "Authorization: Bearer token"
+    record.account_id = 7
+    RedactingFilter(REDACTOR).filter(record)
+
+    payload = json.loads(JsonFormatter(REDACTOR).format(record))
+
+    assert payload["message"] == "webhook ok"
+    assert payload["Signature"] == "***"
+    assert "token" not in payload["headers"]
+    assert payload["account_id"] == 7
@@ -0,0 +1,61 @@
+import json
+import os
+
+from src.helpers.metrics import MetricsRegistry
+
+# pid, которого заведомо нет: выше максимального pid в Linux
+DEAD_PID = 2 ** 22 + 1
+
+
+def make_registry(directory) -> MetricsRegistry:
+    registry = MetricsRegistry()
+    registry.counter("requests_total", "Запросы", ["route"]).labels("/a").inc(2)
+    registry.histogram("latency_seconds", "Время", buckets=(0.1, 1.0)).observe(0.05)
+    registry.gauge("pool_checked_out", "Соединения").set(3)
+    registry.gauge("queue_depth", "Очередь", multiprocess_mode="local").set(7)
+    registry.enable_multiprocess(directory)
+    return registry
+
+
+def write_worker_snapshot(directory, pid: int) -> None:
+    (directory / f"{pid}.json").write_text(json.dumps({
+        "requests_total": [[["/a"], 5.0], [["/b"], 1.0]],
+        "latency_seconds": [[[], [[0, 1, 0], 0.5]]],
+        "pool_checked_out": [[[], 4.0]],
+        "queue_depth": [[[], 100.0]],
+    }))
+
+
+def test_render_sums_snapshots_of_all_workers(tmp_path):
+    registry = make_registry(tmp_path)
+    write_worker_snapshot(tmp_path, os.getppid())
+
+    rendered = registry.render()
+
+    assert 'requests_total{route="/a"} 7.0' in rendered
+    assert 'requests_total{route="/b"} 1.0' in rendered
+    assert 'latency_seconds_bucket{le="0.1"} 1' in rendered
+    assert 'latency_seconds_bucket{le="1.0"} 2' in rendered
+    assert "latency_seconds_count 2" in rendered
+    assert "pool_checked_out 7.0" in rendered
+    # общая величина берётся у отвечающего процесса, а не складывается
+    assert "queue_depth 7\n" in rendered
+
+
+def test_finished_worker_keeps_counters_but_not_gauges(tmp_path):
+    registry = make_registry(tmp_path)
+    write_worker_snapshot(tmp_path, DEAD_PID)
+
+    rendered = registry.render()
+
+    assert 'requests_total{route="/a"} 7.0' in rendered
+    assert "pool_checked_out 3.0" in rendered
+
+
+def test_render_writes_own_snapshot(tmp_path):
+    registry = make_registry(tmp_path)
+
+    registry.render()
+
+    snapshot = json.loads((tmp_path / f"{os.getpid()}.json").read_text())
+    assert snapshot["requests_total"] == [[["/a"], 2.0]]
@@ -0,0 +1,62 @@
+import socket
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from src.config import config
+from src.helpers.helper import session_manager
+from src.helpers.sql_instrumentation import current_query_stats
+from src.main import app
+from src.services.user_service import user_cache, token_versions
+
+
+def database_available() -> bool:
+    try:
+        socket.create_connection((config.POSTGRES_HOST, int(config.POSTGRES_PORT)), timeout=1).close()
+    except OSError:
+        return False
+    return True
+
+
+pytestmark = pytest.mark.skipif(not database_available(), reason="PostgreSQL недоступен")
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def access_token(client) -> str:
+    response = client.post("/api/v1/auth/login", json={
+        "email": config.DEFAULT_USER_EMAIL,
+        "password": config.DEFAULT_USER_PASSWORD,
+    })
+    assert response.status_code == 200
+    return response.json()["accessToken"]
+
+
+def test_authenticated_request_checks_out_one_connection(client, access_token):
+    """Пользователь для авторизации и данные эндпоинта читаются через одну сессию запроса"""
+    checkouts = []
+
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        # фоновые обработчики тоже берут соединения: считаем только те, что внутри HTTP-запроса
+        if current_query_stats.get() is not None:
+            checkouts.append(connection_record)
+
+    # без кэша пользователь загружается из БД, как в первом запросе после входа
+    user_cache.clear()
+    token_versions.clear()
+    event.listen(session_manager.engine.sync_engine, "checkout", on_checkout)
+    try:
+        response = client.get(
+            "/api/v1/users/me/payments", headers={"Authorization": f"Bearer {access_token}"}
+        )
+    finally:
+        event.remove(session_manager.engine.sync_engine, "checkout", on_checkout)
+
+    assert response.status_code == 200
+    assert len(checkouts) == 1
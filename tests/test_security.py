@@ -0,0 +1,17 @@
+import pytest
+from passlib.hash import argon2
+
+from src.utils.security import create_password_context
+
+
+def test_argon2_without_backend_fails_at_startup(monkeypatch):
+    monkeypatch.setattr(argon2, "has_backend", lambda name="any", dryrun=False: False)
+
+    with pytest.raises(RuntimeError, match="argon2-cffi"):
+        create_password_context(["argon2", "bcrypt"])
+
+
+def test_bcrypt_only_context_does_not_need_argon2(monkeypatch):
+    monkeypatch.setattr(argon2, "has_backend", lambda name="any", dryrun=False: False)
+
+    assert create_password_context(["bcrypt"]).schemes() == ("bcrypt",)
@@ -0,0 +1,30 @@
+import json
+import os
+
+from src.api.payments.service.signature_service import SignatureService
+from src.workers.signature_keyring_watcher import SignatureKeyringWatcher
+
+
+def write_keyring(path, content: str, mtime: float) -> None:
+    path.write_text(content)
+    os.utime(path, (mtime, mtime))
+
+
+def test_failed_reload_is_retried_on_next_poll(tmp_path):
+    path = tmp_path / "keyring.json"
+    write_keyring(path, json.dumps({"keys": [{"id": "old", "secret": "s1"}]}), 1000)
+    service = SignatureService(secret_keys=["s1"])
+    watcher = SignatureKeyringWatcher(service, path, interval=1)
+
+    # файл дописан не до конца: ключи прежние, mtime не запомнен
+    write_keyring(path, '{"keys": [', 2000)
+    assert watcher.reload() is False
+    assert [key.id for key in service.keys] == ["current"]
+    assert watcher._mtime == 1000
+
+    # дописан с тем же mtime: следующая проверка всё равно перечитывает файл
+    write_keyring(path, json.dumps({"keys": [{"id": "new", "secret": "s2"}]}), 2000)
+    assert watcher._current_mtime() != watcher._mtime
+    assert watcher.reload() is True
+    assert [key.id for key in service.keys] == ["new"]
+    assert watcher._mtime == 2000
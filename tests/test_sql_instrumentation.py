@@ -0,0 +1,73 @@
+import uuid
+from datetime import datetime, UTC
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import asyncpg, insert
+
+from src.helpers.sql_instrumentation import normalize_statement
+from src.models.payment_model import PaymentModel
+from src.models.user_model import UserModel
+
+DIALECT = asyncpg.dialect()
+
+
+def compile_asyncpg(statement) -> str:
+    """Текст запроса в том виде, в каком его выполняет asyncpg: $n с приведением типа"""
+    return str(statement.compile(dialect=DIALECT, compile_kwargs={"render_postcompile": True}))
+
+
+def payment_rows(count: int) -> list[dict]:
+    return [
+        {
+            "transaction_id": uuid.uuid4(),
+            "amount": 10,
+            "user_id": 1,
+            "account_id": 1,
+            "created_at": datetime.now(UTC),
+        }
+        for _ in range(count)
+    ]
+
+
+@pytest.mark.parametrize("size", [2, 3, 50])
+def test_in_list_with_casts_is_collapsed(size):
+    statement = compile_asyncpg(select(UserModel.id).where(UserModel.id.in_(range(size))))
+    assert "$1::INTEGER, $2::INTEGER" in statement
+
+    assert normalize_statement(statement) == "SELECT users.id FROM users WHERE users.id IN (?...)"
+
+
+def test_in_lists_of_different_length_share_label():
+    statements = {
+        normalize_statement(compile_asyncpg(
+            select(PaymentModel.id).where(PaymentModel.transaction_id.in_([uuid.uuid4() for _ in range(size)]))
+        ))
+        for size in (2, 7, 100)
+    }
+    assert statements == {"SELECT payments.id FROM payments WHERE payments.transaction_id IN (?...)"}
+
+
+@pytest.mark.parametrize("size", [2, 10])
+def test_multi_row_values_with_casts_is_collapsed(size):
+    statement = compile_asyncpg(insert(PaymentModel).values(payment_rows(size)).on_conflict_do_nothing())
+    assert "::NUMERIC(12, 2)" in statement and "::TIMESTAMP WITH TIME ZONE" in statement
+
+    assert normalize_statement(statement) == (
+        "INSERT INTO payments (transaction_id, amount, user_id, account_id, created_at) "
+        "VALUES (?...), ... ON CONFLICT DO NOTHING"
+    )
+
+
+def test_single_column_values_with_casts_is_collapsed():
+    statement = "INSERT INTO t (id) VALUES ($1::INTEGER), ($2::INTEGER), ($3::INTEGER)"
+
+    assert normalize_statement(statement) == "INSERT INTO t (id) VALUES (?::INTEGER), ..."
+
+
+def test_scalar_parameters_keep_casts():
+    statement = compile_asyncpg(select(UserModel.id).where(UserModel.id == 5, UserModel.email == "a@b.c"))
+
+    assert normalize_statement(statement) == (
+        "SELECT users.id FROM users WHERE users.id = ?::INTEGER AND users.email = ?::VARCHAR"
+    )